@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+"""
+Benchmarks for filament's command construction, dispatch and search overhead.
+
+Run through nox with ``nox -s benchmark`` or directly with ``python benchmarks/run.py``. Results
+are written as JSON to stdout, or to the file given by ``--output``, so that they can be compared
+between releases. No network access is required.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import typing as t
+
+import lightbulb
+from lightbulb import commands
+
+from lightbulb.ext import filament
+from lightbulb.ext.filament.commands import impl
+from lightbulb.ext.filament.exts import superuser
+
+
+class FakeContext:
+    """Minimal stand-in for :obj:`lightbulb.context.base.Context` used by the benchmarks."""
+
+    def __init__(self, raw_options: t.Optional[t.Dict[str, t.Any]] = None) -> None:
+        self.raw_options = raw_options or {}
+        self.guild_id = 0
+        self.channel_id = 0
+        self.bot = None
+        self.author = argparse.Namespace(id=0)
+        self.invoked_with = "exec"
+
+    @property
+    def options(self) -> t.Any:
+        return argparse.Namespace(**self.raw_options)
+
+    async def respond(self, *_: t.Any, **__: t.Any) -> None:
+        pass
+
+
+def _timed(
+    func: t.Callable[[], t.Any], repeat: int, setup: t.Optional[t.Callable[[], t.Any]] = None
+) -> t.List[float]:
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _result(
+    benchmark: str, params: t.Mapping[str, t.Any], ops: int, timings: t.Sequence[float]
+) -> t.Dict[str, t.Any]:
+    best = min(timings)
+    return {
+        "benchmark": benchmark,
+        "params": dict(params),
+        "ops": ops,
+        "repeat": len(timings),
+        "best_s": best,
+        "median_s": statistics.median(timings),
+        "per_op_us": best / ops * 1e6 if ops else 0.0,
+    }
+
+
+def _make_flat(count: int, n_options: int) -> t.List[t.Type[filament.CommandLike]]:
+    classes = []
+    for i in range(count):
+        ns: t.Dict[str, t.Any] = {
+            "implements": [commands.PrefixCommand, commands.SlashCommand],
+            "name": f"cmd{i}",
+            "description": "benchmark command",
+        }
+        for j in range(n_options):
+            ns[f"opt{j}"] = filament.opt(f"opt{j}", "benchmark option", default=j)
+        classes.append(type(f"Cmd{i}", (filament.CommandLike,), ns))
+    return classes
+
+
+def _make_tree(depth: int, width: int, prefix: str = "t") -> t.Type[filament.CommandLike]:
+    group_types = [commands.PrefixCommandGroup] if prefix == "t" else [commands.PrefixSubGroup]
+    root = type(
+        f"Group_{prefix}",
+        (filament.CommandLike,),
+        {"implements": group_types, "name": prefix, "description": "benchmark group"},
+    )
+    for i in range(width):
+        if depth > 1:
+            root.child(_make_tree(depth - 1, width, f"{prefix}{i}"))
+        else:
+            root.child(
+                type(
+                    f"Sub_{prefix}{i}",
+                    (filament.CommandLike,),
+                    {"implements": [commands.PrefixSubCommand], "name": f"{prefix}{i}", "description": "benchmark"},
+                )
+            )
+    return root
+
+
+def bench_construction(sizes: t.Sequence[int], repeat: int) -> t.List[t.Dict[str, t.Any]]:
+    results = []
+    for size in sizes:
+        for n_options in (0, 5):
+            start = time.perf_counter()
+            classes = _make_flat(size, n_options)
+            define_time = time.perf_counter() - start
+            results.append(_result("define_classes", {"commands": size, "options": n_options}, size, [define_time]))
+            timings = _timed(lambda: [c() for c in classes], repeat)
+            results.append(_result("build_flat", {"commands": size, "options": n_options}, size, timings))
+
+    for depth, width in ((1, 10), (2, 10), (3, 10), (4, 10), (2, 100)):
+        total = sum(width**d for d in range(depth + 1))
+        if total > max(sizes) * 1.2:
+            continue
+        root = _make_tree(depth, width)
+        tree = [root, *impl._descendants(root)]
+        params = {"depth": depth, "width": width, "commands": total}
+
+        def clear_cache() -> None:
+            # Unchanged leaf subcommands are reused between builds, so clear them to measure building the whole tree
+            for klass in tree:
+                klass._built = None
+
+        timings = _timed(root, repeat, clear_cache)
+        results.append(_result("build_tree", params, total, timings))
+        root()
+        timings = _timed(root, repeat)
+        results.append(_result("build_tree_cached", params, total, timings))
+    return results
+
+
+def _run_coro_loop(
+    loop: asyncio.AbstractEventLoop, func: t.Callable[[FakeContext], t.Any], ctx: FakeContext, n: int
+) -> t.Callable[[], None]:
+    async def runner() -> None:
+        for _ in range(n):
+            await func(ctx)
+
+    return lambda: loop.run_until_complete(runner())
+
+
+def bench_dispatch(invocations: int, repeat: int) -> t.List[t.Dict[str, t.Any]]:
+    loop = asyncio.new_event_loop()
+    results = []
+    ctx = FakeContext({"text": "hello", "count": 3})
+
+    class Echo(filament.CommandLike):
+        implements = [commands.PrefixCommand]
+        name = "echo"
+        description = "benchmark"
+        text = filament.opt("text", "text")
+        count = filament.opt("count", "count", arg_type=int)
+
+        async def callback(self, ctx_: t.Any) -> None:
+            pass
+
+    async def raw(ctx_: t.Any) -> None:
+        pass
+
+    async def raw_kwargs(ctx_: t.Any, text: str, count: int) -> None:
+        pass
+
+    cmd_like = Echo()
+    cases = {
+        "raw_coroutine": raw,
+        "filament_bound_method": object.__new__(Echo).callback,
+        "filament_callback": cmd_like.callback,
+        "pass_options": filament.utils.pass_options(raw_kwargs),
+    }
+    try:
+        for name, func in cases.items():
+            timings = _timed(_run_coro_loop(loop, func, ctx, invocations), repeat)
+            results.append(_result("dispatch", {"case": name}, invocations, timings))
+    finally:
+        loop.close()
+    return results
+
+
+async def _run_executor(executor: t.Callable[..., t.Any], ctx: FakeContext, program: str, code: str, n: int) -> None:
+    for _ in range(n):
+        await executor(ctx, program, code)
+
+
+def bench_superuser(invocations: int, repeat: int) -> t.List[t.Dict[str, t.Any]]:
+    loop = asyncio.new_event_loop()
+    results = []
+    ctx = FakeContext()
+    cases: t.List[t.Tuple[str, t.Callable[..., t.Any], str, str, int]] = [
+        ("execute_in_session", superuser.execute_in_session, "python", "1 + 1", invocations),
+        ("execute_in_session", superuser.execute_in_session, "python", "print('x' * 1000)", invocations),
+        ("execute_in_session", superuser.execute_in_session, "python", "for i in range(1000):\n    pass", invocations),
+    ]
+    if superuser.shutil.which(superuser.SHELL):
+        n_shell = max(1, invocations // 100)
+        cases.append(("execute_in_shell", superuser.execute_in_shell, superuser.SHELL, "echo hello", n_shell))
+
+    try:
+        for name, executor, program, code, n in cases:
+            timings = _timed(lambda: loop.run_until_complete(_run_executor(executor, ctx, program, code, n)), repeat)
+            results.append(_result(name, {"program": program, "code": code}, n, timings))
+    finally:
+        loop.close()
+    return results
+
+
+_SEARCH_WORDS = (
+    "user server music queue role channel message config level rank game stats poll remind timer weather image "
+    "meme quote tag"
+).split()
+
+
+def bench_search(sizes: t.Sequence[int], invocations: int, repeat: int) -> t.List[t.Dict[str, t.Any]]:
+    results = []
+    rng = random.Random(0)
+    for size in sizes:
+        bot = lightbulb.BotApp("x" * 60, banner=None)
+        for i in range(size):
+            bot.command(
+                type(
+                    f"Cmd{i}",
+                    (filament.CommandLike,),
+                    {
+                        "implements": [commands.SlashCommand],
+                        "name": f"cmd{i}",
+                        "description": " ".join(rng.choice(_SEARCH_WORDS) for _ in range(6)),
+                    },
+                )()
+            )
+        index = filament.CommandIndex(bot)
+        timings = _timed(index.refresh, repeat)
+        results.append(_result("search_build", {"commands": size}, size, timings))
+
+        queries = {
+            "exact": f"cmd{size // 2}",
+            "prefix": "cmd1",
+            "misspelled_name": f"cdm{size // 2}",
+            "description": "queue",
+            "misspelled_description": "queu",
+            "multiple_words": "music queue",
+        }
+        for case, query in queries.items():
+            timings = _timed(lambda: [index.search(query) for _ in range(invocations)], repeat)
+            results.append(_result("search", {"commands": size, "case": case}, invocations, timings))
+        timings = _timed(lambda: [index.suggest(queries["misspelled_name"]) for _ in range(invocations)], repeat)
+        results.append(_result("suggest", {"commands": size}, invocations, timings))
+    return results
+
+
+SUITES: t.Final[t.Mapping[str, t.Callable[[argparse.Namespace], t.List[t.Dict[str, t.Any]]]]] = {
+    "construction": lambda args: bench_construction(args.sizes, args.repeat),
+    "dispatch": lambda args: bench_dispatch(args.invocations, args.repeat),
+    "superuser": lambda args: bench_superuser(max(1, args.invocations // 10), args.repeat),
+    "search": lambda args: bench_search(args.sizes, max(1, args.invocations // 100), args.repeat),
+}
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run filament's benchmark suite.")
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(x) for x in s.split(",")],
+        default=[10, 100, 1000, 10000],
+        help="Comma separated command counts to build. Defaults to '10,100,1000,10000'.",
+    )
+    parser.add_argument("--invocations", type=int, default=10000, help="Invocations per dispatch measurement.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of times to repeat each measurement.")
+    parser.add_argument("--suite", action="append", choices=list(SUITES), help="Suite(s) to run. Defaults to all.")
+    parser.add_argument("-o", "--output", help="File to write the JSON results to. Defaults to stdout.")
+    args = parser.parse_args(argv)
+
+    results: t.List[t.Dict[str, t.Any]] = []
+    for suite in args.suite or SUITES:
+        results.extend(SUITES[suite](args))
+
+    report = {
+        "filament_version": filament.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fp:
+            fp.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,14 +15,57 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
-from . import commands
-from . import utils
-from .commands import *
+# Submodules are imported the first time one of their names is accessed, see filament._lazy
+import typing as t
 
+from . import _lazy
+
+if t.TYPE_CHECKING:
+    from . import commands
+    from . import utils
+    from .commands import *
+
+# Kept the same as commands.__all__ so that importing filament does not load the commands package, see
+# tests/test_importtime.py
 __all__ = [
     "opt",
     "option",
+    "unlink_module",
     "CommandLike",
+    "LazyCommandLike",
+    "CheckGroup",
+    "with_cost",
+    "find_commands",
+    "build_commands",
+    "register_commands",
+    "BuildReport",
+    "create_manifest",
+    "register_from_manifest",
+    "CommandSpec",
+    "shape_hash",
+    "sync_application_commands",
+    "install_command_sync",
+    "SyncResult",
+    "InvocationRecord",
+    "CommandStats",
+    "MetricsSink",
+    "InMemorySink",
+    "PrometheusSink",
+    "CallbackSink",
+    "LoggingSink",
+    "LimitStore",
+    "InMemoryLimitStore",
+    "SQLiteLimitStore",
+    "set_default_limit_store",
+    "Limit",
+    "TokenBucket",
+    "SlidingWindow",
+    "ConcurrencyLimit",
+    "CommandIndex",
+    "IndexEntry",
+    "SearchResult",
 ]
 
 __version__ = "0.1.3"
+
+__getattr__, __dir__ = _lazy.attach(__name__, ["commands", "utils"], {name: "commands" for name in __all__})
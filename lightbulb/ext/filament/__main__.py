@@ -15,33 +15,77 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
-import argparse
+from __future__ import annotations
+
 import importlib
 import sys
+import typing as t
 
 from . import __version__
 
-parser = argparse.ArgumentParser()
-parser.add_argument("-n", "--new", action="store_true", help="Create a template project in the current directory.")
-parser.add_argument(
-    "-s",
-    "--style",
-    default="lightbulb",
-    choices=["lightbulb", "filament"],
-    help="The command style to use in the created project. Defaults to 'lightbulb'",
-)
-
-args = parser.parse_args()
-if args.new:
-    if args.style not in ["lightbulb", "filament"]:
-        sys.stderr.write("Invalid value provided for '--style'. Must be one of: 'lightbulb', 'filament'")
-        sys.exit()
+if t.TYPE_CHECKING:
+    import argparse
+
+
+def _parse_args() -> argparse.Namespace:
+    import argparse
 
-    from . import _t
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--new", action="store_true", help="Create a template project in the current directory.")
+    parser.add_argument(
+        "-s",
+        "--style",
+        default="lightbulb",
+        choices=["lightbulb", "filament"],
+        help="The command style to use in the created project. Defaults to 'lightbulb'",
+    )
+    parser.add_argument(
+        "-d",
+        "--directory",
+        default=".",
+        help="The directory to create the project in. Defaults to the current directory.",
+    )
+    parser.add_argument("--name", default="bot", help="The name of the bot's package. Defaults to 'bot'.")
+    parser.add_argument(
+        "--commands",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Generate N additional synthetic commands, for load testing. Defaults to 0.",
+    )
+    parser.add_argument(
+        "--per-module",
+        type=int,
+        default=50,
+        metavar="N",
+        help="The number of synthetic commands in each extension module. Defaults to 50.",
+    )
+    parser.add_argument(
+        "--sharded",
+        action="store_true",
+        help="Create a launcher which runs the bot's shards across multiple processes.",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Show the files that would be created without creating them."
+    )
+    parser.add_argument("--force", action="store_true", help="Overwrite files that already exist.")
+    return parser.parse_args()
 
-    _t.run(args)
 
-    sys.exit()
+# Running without arguments only prints the version, so skip building the parser. The package's
+# submodules are imported lazily, so nothing else from filament is loaded.
+if sys.argv[1:]:
+    args = _parse_args()
+    if args.new:
+        if args.style not in ["lightbulb", "filament"]:
+            sys.stderr.write("Invalid value provided for '--style'. Must be one of: 'lightbulb', 'filament'")
+            sys.exit()
+
+        from . import _t
+
+        _t.run(args)
+
+        sys.exit()
 
 
 sys.stderr.write(f"lightbulb-filament ({__version__})\n")
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+# Support for loading a package's submodules the first time one of their attributes is accessed, instead of
+# when the package is imported (PEP 562). Keeps importing the package, and anything which only needs part of it,
+# such as the CLI, cheap.
+from __future__ import annotations
+
+import importlib
+import sys
+import typing as t
+
+
+def attach(
+    package: str, submodules: t.Iterable[str], exports: t.Mapping[str, str]
+) -> t.Tuple[t.Callable[[str], t.Any], t.Callable[[], t.List[str]]]:
+    # exports maps each exported name to the submodule, relative to the package, that it is defined in.
+    # Returns the module-level __getattr__ and __dir__ functions for the package.
+    submodules = frozenset(submodules)
+    namespace = vars(sys.modules[package])
+
+    def __getattr__(name: str) -> t.Any:
+        if name in submodules:
+            return importlib.import_module(f"{package}.{name}")
+        if name in exports:
+            value = getattr(importlib.import_module(f"{package}.{exports[name]}"), name)
+            # Store the value so that later lookups do not go through __getattr__
+            namespace[name] = value
+            return value
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+    def __dir__() -> t.List[str]:
+        return sorted({*namespace, *submodules, *exports})
+
+    return __getattr__, __dir__
@@ -17,26 +17,138 @@
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
-__all__ = ["run"]
+__all__ = ["run", "generate"]
 
+import json
+import math
 import pathlib
+import sys
 import typing as t
 
-from nusex.api import template
-from nusex.api import profile
+from . import templates
 
 if t.TYPE_CHECKING:
     from argparse import Namespace
 
-PROFILE = profile.Profile(
-    "default",
-    author_name="tandemdude",
-    author_email="tandemdude1@gmail.com",
-    preferred_license="unlicense",
-    starting_version="0.1.0",
-)
+# The extension modules created in every project, and the commands they contain
+_DEFAULT_MODULES: t.Dict[str, t.List[t.Tuple[str, str, str, bool]]] = {
+    "general": [("ping", "Checks that the bot is alive.", "Pong!", False)],
+    "info": [("about", "Shows information about the bot.", "A bot made with lightbulb.", False)],
+    "admin": [("shutdown", "Stops the bot.", "Shutting down.", True)],
+}
+
+
+def _quote(value: str) -> str:
+    # JSON strings are valid python string literals, and use double quotes like the rest of the generated code
+    return json.dumps(value)
+
+
+def _command_source(style: str, name: str, description: str, response: str, owner_only: bool, option: bool) -> str:
+    if style == "filament":
+        return templates.FILAMENT_COMMAND.format(
+            cls="".join(part.title() for part in name.split("_")),
+            name=_quote(name),
+            description=_quote(description),
+            response=_quote(response),
+            checks=templates.FILAMENT_CHECKS if owner_only else "",
+            option=templates.FILAMENT_OPTION if option else "",
+        )
+    return templates.LIGHTBULB_COMMAND.format(
+        func=name,
+        name=_quote(name),
+        description=_quote(description),
+        response=_quote(response),
+        checks=templates.LIGHTBULB_CHECKS if owner_only else "",
+        option=templates.LIGHTBULB_OPTION if option else "",
+    )
+
+
+def _module_source(style: str, module: str, commands: t.Sequence[t.Tuple[str, str, str, bool]], option: bool) -> str:
+    body = "\n\n".join(_command_source(style, *command, option) for command in commands)
+    template = templates.FILAMENT_MODULE if style == "filament" else templates.LIGHTBULB_MODULE
+    return template.format(module=_quote(module), commands=body)
+
+
+def generate(
+    style: str = "lightbulb",
+    package: str = "bot",
+    n_commands: int = 0,
+    per_module: int = 50,
+    sharded: bool = False,
+) -> t.Dict[str, str]:
+    """
+    Generates the files for a new bot project.
+
+    Args:
+        style (:obj:`str`): The command style to use - ``lightbulb`` or ``filament``. Defaults to ``lightbulb``.
+        package (:obj:`str`): The name of the bot's package. Defaults to ``bot``.
+        n_commands (:obj:`int`): The number of synthetic commands to generate for load testing, in addition to the
+            default commands. Defaults to ``0``.
+        per_module (:obj:`int`): The number of synthetic commands in each extension module. Defaults to ``50``.
+        sharded (:obj:`bool`): Whether to create a launcher which runs the bot's shards across multiple processes.
+            Defaults to ``False``.
+
+    Returns:
+        Dict[:obj:`str`, :obj:`str`]: Mapping of the path of each file, relative to the project directory, to
+        the contents of the file.
+    """
+    if not package.isidentifier():
+        raise ValueError(f"Invalid package name {package!r} - must be a valid python identifier")
+    if n_commands < 0:
+        raise ValueError("The number of synthetic commands cannot be negative")
+    if per_module < 1:
+        raise ValueError("The number of commands per module must be at least 1")
+
+    files = {
+        f"{package}/__init__.py": "",
+        f"{package}/__main__.py": templates.MAIN.format(package=package),
+        f"{package}/bot.py": templates.BOT.format(package=package),
+        f"{package}/exts/__init__.py": "",
+        "token.txt": "YOUR_TOKEN_HERE\n",
+        "benchmarks/startup.py": templates.BENCHMARK.format(package=package),
+    }
+    for module, commands in _DEFAULT_MODULES.items():
+        files[f"{package}/exts/{module}.py"] = _module_source(style, module, commands, False)
+
+    n_modules = math.ceil(n_commands / per_module)
+    width = len(str(max(n_commands - 1, 0)))
+    for m in range(n_modules):
+        numbers = range(m * per_module, min((m + 1) * per_module, n_commands))
+        commands = [(f"cmd_{i:0{width}}", f"Synthetic command {i}.", f"Response {i}", False) for i in numbers]
+        module = f"synthetic_{m:0{len(str(n_modules - 1))}}"
+        files[f"{package}/exts/{module}.py"] = _module_source(style, module, commands, True)
+
+    if sharded:
+        files["launcher.py"] = templates.LAUNCHER.format(package=package)
+    return files
 
 
 def run(args: Namespace) -> None:
-    tp = template.Template.from_disk(f"{args.style}_bot", from_dir=pathlib.Path(__file__[:-11]))
-    tp.deploy(pathlib.Path("."), project_name=f"{args.style}_bot", profile=PROFILE)
+    try:
+        files = generate(args.style, args.name, args.commands, args.per_module, args.sharded)
+    except ValueError as ex:
+        sys.stderr.write(f"{ex}\n")
+        sys.exit(1)
+
+    root = pathlib.Path(args.directory)
+    existing = [path for path in files if (root / path).exists()]
+    if existing and not (args.force or args.dry_run):
+        sys.stderr.write(
+            "The following files already exist - pass '--force' to overwrite them:\n"
+            + "".join(f"  {path}\n" for path in existing)
+        )
+        sys.exit(1)
+
+    for path, content in files.items():
+        if args.dry_run:
+            sys.stdout.write(f"{'overwrite' if path in existing else 'create':<9} {path} ({len(content)} bytes)\n")
+            continue
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content, encoding="utf-8")
+
+    n_modules = sum(1 for path in files if path.startswith(f"{args.name}/exts/") and not path.endswith("__init__.py"))
+    sys.stdout.write(
+        f"{'Would create' if args.dry_run else 'Created'} {len(files)} files in {root.resolve()} "
+        f"({n_modules} extension modules, {args.commands + sum(map(len, _DEFAULT_MODULES.values()))} commands)\n"
+    )
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+# Templates for the files created by ``python -m lightbulb.ext.filament --new``. These are formatted
+# using str.format, so any braces in the generated code must be doubled. String values are passed to
+# the templates already quoted.
+
+MAIN = """\
+from {package}.bot import run_bot
+
+run_bot()
+"""
+
+BOT = """\
+import os
+import typing as t
+
+import lightbulb
+
+
+def get_token() -> str:
+    token = os.environ.get("BOT_TOKEN")
+    if token:
+        return token
+    with open("token.txt") as fp:
+        return fp.read().strip()
+
+
+def create_bot(token: str, **kwargs: t.Any) -> lightbulb.BotApp:
+    bot = lightbulb.BotApp(token, prefix="!", delete_unbound_commands=False, **kwargs)
+    bot.load_extensions_from("./{package}/exts")
+    return bot
+
+
+def run_bot(**kwargs: t.Any) -> None:
+    create_bot(get_token()).run(**kwargs)
+"""
+
+LIGHTBULB_MODULE = """\
+import lightbulb
+from lightbulb import commands
+
+plugin = lightbulb.Plugin({module})
+
+
+{commands}
+
+def load(bot: lightbulb.BotApp) -> None:
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
+"""
+
+LIGHTBULB_COMMAND = """\
+@plugin.command{checks}
+{option}@lightbulb.command({name}, {description})
+@lightbulb.implements(commands.PrefixCommand, commands.SlashCommand)
+async def {func}(ctx: lightbulb.context.Context) -> None:
+    await ctx.respond({response})
+"""
+
+LIGHTBULB_CHECKS = "\n@lightbulb.add_checks(lightbulb.owner_only)"
+
+LIGHTBULB_OPTION = '@lightbulb.option("value", "A value to ignore.", required=False)\n'
+
+FILAMENT_MODULE = """\
+import lightbulb
+from lightbulb import commands
+from lightbulb.ext import filament
+
+plugin = lightbulb.Plugin({module})
+
+
+{commands}
+
+def load(bot: lightbulb.BotApp) -> None:
+    filament.register_commands(plugin, __name__)
+    bot.add_plugin(plugin)
+
+
+def unload(bot: lightbulb.BotApp) -> None:
+    bot.remove_plugin(plugin)
+    filament.unlink_module(__name__)
+"""
+
+FILAMENT_COMMAND = """\
+class {cls}(filament.CommandLike):
+    implements = [commands.PrefixCommand, commands.SlashCommand]
+    name = {name}
+    description = {description}{checks}{option}
+
+    async def callback(self, ctx: lightbulb.context.Context) -> None:
+        await ctx.respond({response})
+"""
+
+FILAMENT_CHECKS = "\n    checks = [lightbulb.owner_only]"
+
+FILAMENT_OPTION = '\n\n    value = filament.opt("value", "A value to ignore.", required=False)'
+
+BENCHMARK = '''\
+"""
+Measures how long the bot takes to import, load its extensions and create its commands. No network access
+is required, so this can be run in CI to catch regressions in startup time.
+
+Run from the project directory with ``python benchmarks/startup.py``.
+"""
+import os
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def main() -> None:
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+
+    start = time.perf_counter()
+    from {package}.bot import create_bot
+
+    imported = time.perf_counter()
+    bot = create_bot("benchmark", banner=None, logs="WARNING")
+    loaded = time.perf_counter()
+
+    n_commands = sum(
+        len(set(map(id, mapping.values())))
+        for mapping in (bot.prefix_commands, bot.slash_commands, bot.message_commands, bot.user_commands)
+    )
+    print(f"import:     {{(imported - start) * 1000:.1f}}ms")
+    print(f"extensions: {{(loaded - imported) * 1000:.1f}}ms ({{len(bot.extensions)}} loaded)")
+    print(f"commands:   {{n_commands}}")
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+LAUNCHER = '''\
+"""
+Runs the bot with its shards split across multiple processes.
+
+Usage: ``python launcher.py --shards 16 --processes 4``
+
+Each process connects its own shards to the gateway, so note that every process also syncs the bot's
+application commands when it starts.
+"""
+import argparse
+import multiprocessing
+import typing as t
+
+
+def _run(shard_ids: t.List[int], shard_count: int) -> None:
+    from {package}.bot import run_bot
+
+    run_bot(shard_ids=shard_ids, shard_count=shard_count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the bot with its shards split across multiple processes.")
+    parser.add_argument("--shards", type=int, required=True, help="The total number of shards.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=multiprocessing.cpu_count(),
+        help="The number of processes to run. Defaults to the number of CPUs.",
+    )
+    args = parser.parse_args()
+
+    n_processes = max(1, min(args.processes, args.shards))
+    workers = [
+        multiprocessing.Process(target=_run, args=(list(range(i, args.shards, n_processes)), args.shards))
+        for i in range(n_processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == "__main__":
+    main()
+'''
@@ -15,6 +15,99 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
-from .impl import *
+# Submodules are imported the first time one of their names is accessed, see filament._lazy
+import typing as t
 
-__all__ = ["opt", "option", "CommandLike"]
+from .. import _lazy
+
+if t.TYPE_CHECKING:
+    from .checks import *
+    from .impl import *
+    from .limits import *
+    from .loading import *
+    from .manifest import *
+    from .metrics import *
+    from .search import *
+    from .spec import *
+    from .sync import *
+
+__all__ = [
+    "opt",
+    "option",
+    "unlink_module",
+    "CommandLike",
+    "LazyCommandLike",
+    "CheckGroup",
+    "with_cost",
+    "find_commands",
+    "build_commands",
+    "register_commands",
+    "BuildReport",
+    "create_manifest",
+    "register_from_manifest",
+    "CommandSpec",
+    "shape_hash",
+    "sync_application_commands",
+    "install_command_sync",
+    "SyncResult",
+    "InvocationRecord",
+    "CommandStats",
+    "MetricsSink",
+    "InMemorySink",
+    "PrometheusSink",
+    "CallbackSink",
+    "LoggingSink",
+    "LimitStore",
+    "InMemoryLimitStore",
+    "SQLiteLimitStore",
+    "set_default_limit_store",
+    "Limit",
+    "TokenBucket",
+    "SlidingWindow",
+    "ConcurrencyLimit",
+    "CommandIndex",
+    "IndexEntry",
+    "SearchResult",
+]
+
+_SUBMODULES = ["checks", "impl", "limits", "loading", "manifest", "metrics", "search", "spec", "sync"]
+_EXPORTS = {
+    "opt": "impl",
+    "option": "impl",
+    "unlink_module": "impl",
+    "CommandLike": "impl",
+    "LazyCommandLike": "impl",
+    "CheckGroup": "checks",
+    "with_cost": "checks",
+    "find_commands": "loading",
+    "build_commands": "loading",
+    "register_commands": "loading",
+    "BuildReport": "loading",
+    "create_manifest": "manifest",
+    "register_from_manifest": "manifest",
+    "CommandSpec": "spec",
+    "shape_hash": "sync",
+    "sync_application_commands": "sync",
+    "install_command_sync": "sync",
+    "SyncResult": "sync",
+    "InvocationRecord": "metrics",
+    "CommandStats": "metrics",
+    "MetricsSink": "metrics",
+    "InMemorySink": "metrics",
+    "PrometheusSink": "metrics",
+    "CallbackSink": "metrics",
+    "LoggingSink": "metrics",
+    "LimitStore": "limits",
+    "InMemoryLimitStore": "limits",
+    "SQLiteLimitStore": "limits",
+    "set_default_limit_store": "limits",
+    "Limit": "limits",
+    "TokenBucket": "limits",
+    "SlidingWindow": "limits",
+    "ConcurrencyLimit": "limits",
+    "CommandIndex": "search",
+    "IndexEntry": "search",
+    "SearchResult": "search",
+}
+
+__getattr__, __dir__ = _lazy.attach(__name__, _SUBMODULES, _EXPORTS)
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["CheckGroup", "with_cost"]
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import typing as t
+
+import lightbulb
+from lightbulb import errors
+
+if t.TYPE_CHECKING:
+    from lightbulb import context
+
+_CheckT = t.Union[lightbulb.Check, t.Callable[["context.Context"], t.Any]]
+_ResultT = t.Union[bool, t.Coroutine[t.Any, t.Any, bool]]
+
+# The results of the checks evaluated for the context currently being invoked. Each invocation is
+# run in its own task, so the results are never shared between invocations.
+_MEMO: contextvars.ContextVar[t.Tuple[context.Context, t.Dict[t.Any, t.Any]]] = contextvars.ContextVar(
+    "filament_check_memo"
+)
+
+
+def _memo_for(context_: context.Context) -> t.Dict[t.Any, t.Any]:
+    memo = _MEMO.get(None)
+    if memo is None or memo[0] is not context_:
+        memo = (context_, {})
+        _MEMO.set(memo)
+    return memo[1]
+
+
+def _check_name(check: t.Any) -> str:
+    name = getattr(check, "__name__", None)
+    return name if isinstance(name, str) else repr(check)
+
+
+def _is_async(func: t.Any) -> bool:
+    while isinstance(func, functools.partial):
+        func = func.func
+    return inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "__call__", None))
+
+
+def _default_cost(check: _CheckT) -> float:
+    if isinstance(check, (_MemoisedCheck, CheckGroup)):
+        return check.cost
+    if isinstance(check, lightbulb.Check):
+        callbacks = (check.prefix_callback, check.slash_callback, check.message_callback, check.user_callback)
+        return 1.0 if any(_is_async(c) for c in callbacks) else 0.0
+    return 1.0 if _is_async(check) else 0.0
+
+
+def _replay(outcome: t.Any) -> bool:
+    if isinstance(outcome, BaseException):
+        raise outcome
+    return outcome
+
+
+class _InFlight:
+    # Memo entry for an asynchronous check which is currently being evaluated
+    __slots__ = ("future", "evaluation", "result")
+
+    def __init__(
+        self,
+        future: asyncio.Future[bool],
+        evaluation: t.Coroutine[t.Any, t.Any, bool],
+        result: t.Coroutine[t.Any, t.Any, bool],
+    ) -> None:
+        self.future = future
+        self.evaluation = evaluation
+        self.result = result
+
+
+class _MemoisedCheck(lightbulb.Check):
+    # Wrapper around a check which only evaluates it once per invocation, even if it is
+    # used by multiple commands in the invocation, such as a parent and an inheriting subcommand
+    __slots__ = ("check", "cost", "_key")
+
+    def __init__(self, check: _CheckT, cost: float) -> None:
+        super().__init__(check, add_hook=getattr(check, "add_to_object_hook", None))
+        self.check = check
+        self.cost = cost
+        self._key = check
+
+    def __repr__(self) -> str:
+        return repr(self.check)
+
+    @property
+    def __name__(self) -> str:
+        return _check_name(self.check)
+
+    def __call__(self, context_: context.Context) -> _ResultT:
+        memo = _memo_for(context_)
+        if self._key in memo:
+            outcome = memo[self._key]
+            if isinstance(outcome, _InFlight):
+                return self._wait(outcome.future, context_)
+            return _replay(outcome)
+
+        try:
+            result = self.check(context_)
+        except Exception as ex:
+            memo[self._key] = ex
+            raise
+
+        if inspect.iscoroutine(result):
+            # Store the future before returning so that any evaluations of the check made before the returned
+            # coroutine starts running wait for it instead of evaluating the check again
+            future: asyncio.Future[bool] = asyncio.get_running_loop().create_future()
+            evaluation = self._evaluate(result, memo, future)
+            memo[self._key] = _InFlight(future, evaluation, result)
+            return evaluation
+        memo[self._key] = result
+        return result
+
+    async def _evaluate(
+        self, result: t.Coroutine[t.Any, t.Any, bool], memo: t.Dict[t.Any, t.Any], future: asyncio.Future[bool]
+    ) -> bool:
+        try:
+            outcome = await result
+        except Exception as ex:
+            memo[self._key] = ex
+            future.set_exception(ex)
+            # Mark the exception as retrieved so it is not logged if nothing was waiting for the check
+            future.exception()
+            raise
+        except BaseException:
+            # The check was cancelled before completing, so it needs to be evaluated again if it is used later
+            del memo[self._key]
+            future.cancel()
+            raise
+        memo[self._key] = outcome
+        future.set_result(outcome)
+        return outcome
+
+    def _close(self, context_: context.Context, evaluation: t.Coroutine[t.Any, t.Any, bool]) -> None:
+        # Closes a coroutine returned by this check which will never be awaited. Closing a coroutine that has
+        # not started does not run any of its code, so the memo entry is removed here instead.
+        memo = _memo_for(context_)
+        outcome = memo.get(self._key)
+        if isinstance(outcome, _InFlight) and outcome.evaluation is evaluation:
+            del memo[self._key]
+            outcome.future.cancel()
+            outcome.result.close()
+        evaluation.close()
+
+    async def _wait(self, future: asyncio.Future[bool], context_: context.Context) -> bool:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise
+        # The evaluation being waited for was cancelled, so evaluate the check again
+        result = self(context_)
+        return (await result) if inspect.iscoroutine(result) else result
+
+
+def _close_unstarted(
+    context_: context.Context, pending: t.Sequence[t.Tuple[_MemoisedCheck, t.Coroutine[t.Any, t.Any, bool]]]
+) -> None:
+    for check, coro in pending:
+        if inspect.getcoroutinestate(coro) == inspect.CORO_CREATED:
+            check._close(context_, coro)
+
+
+def _memoised(check: _CheckT, cost: t.Optional[float] = None) -> _MemoisedCheck:
+    if isinstance(check, _MemoisedCheck):
+        if cost is None or cost == check.cost:
+            return check
+        check = check.check
+    return _MemoisedCheck(check, _default_cost(check) if cost is None else cost)
+
+
+def with_cost(check: _CheckT, cost: float) -> lightbulb.Check:
+    """
+    Sets the cost hint for a check, used by :obj:`~CheckGroup` to decide the order that checks are evaluated in.
+    Checks with a lower cost are evaluated first.
+
+    If a cost is not set then synchronous checks have a cost of ``0`` and asynchronous checks have a cost of ``1``.
+
+    Args:
+        check (:obj:`lightbulb.checks.Check`): The check to set the cost for.
+        cost (:obj:`float`): The cost of the check.
+
+    Returns:
+        :obj:`lightbulb.checks.Check`: The check with the cost hint set.
+
+    Example:
+
+        .. code-block:: python
+
+            class MyCommand(filament.CommandLike):
+                ...
+                checks = [
+                    filament.CheckGroup(
+                        lightbulb.guild_only,
+                        filament.with_cost(has_premium, 5),  # Requires an HTTP request
+                        filament.with_cost(has_permission, 2),  # Requires a database lookup
+                        concurrent=False,
+                    )
+                ]
+    """
+    return _memoised(check, cost)
+
+
+class CheckGroup(lightbulb.Check):
+    """
+    A check which passes only if all the checks in the group pass. Unlike a flat sequence of checks, which
+    lightbulb evaluates one after another, a group evaluates its checks in order of cost (see :obj:`~with_cost`)
+    and stops at the first check that fails. Synchronous checks are always evaluated before any asynchronous
+    checks are awaited, and the asynchronous checks are then run concurrently.
+
+    Groups can be nested, and can be used anywhere that a check is accepted.
+
+    The result of each check is stored for the rest of the invocation, so a check which appears in multiple
+    groups, or in both a parent command and a subcommand which inherits checks from it, is only evaluated once.
+
+    Args:
+        *checks (:obj:`lightbulb.checks.Check`): The checks in the group.
+
+    Keyword Args:
+        concurrent (:obj:`bool`): Whether the asynchronous checks should be run concurrently. If ``False``, they
+            are awaited one after another in order of cost instead. Defaults to ``True``.
+        cost (Optional[:obj:`float`]): The cost hint for the group, used when it is nested in another group.
+            Defaults to the highest cost of the checks in the group.
+
+    Example:
+
+        .. code-block:: python
+
+            class MyCommand(filament.CommandLike):
+                ...
+                checks = [filament.CheckGroup(lightbulb.guild_only, has_db_permission, is_premium_user)]
+    """
+
+    __slots__ = ("checks", "concurrent", "cost")
+
+    def __init__(self, *checks: _CheckT, concurrent: bool = True, cost: t.Optional[float] = None) -> None:
+        super().__init__(self._evaluate, add_hook=self._add_hook)
+        memoised = [_memoised(c) for c in checks]
+        # sorted is stable, so checks with the same cost are evaluated in the order they were given
+        self.checks: t.Sequence[_MemoisedCheck] = sorted(memoised, key=lambda c: c.cost)
+        """The checks in the group, in the order they will be evaluated."""
+        self.concurrent = concurrent
+        self.cost: float = cost if cost is not None else max((c.cost for c in memoised), default=0.0)
+
+    def __repr__(self) -> str:
+        return f"CheckGroup({', '.join(repr(c) for c in self.checks)})"
+
+    @property
+    def __name__(self) -> str:
+        return repr(self)
+
+    def _add_hook(self, obj: t.Any) -> t.Any:
+        for check in self.checks:
+            obj = check.add_to_object_hook(obj)
+        return obj
+
+    def __call__(self, context_: context.Context) -> _ResultT:
+        return self._evaluate(context_)
+
+    def _evaluate(self, context_: context.Context) -> _ResultT:
+        # Ensure the results are stored in this task before any checks are run concurrently in other tasks
+        _memo_for(context_)
+
+        pending: t.List[t.Tuple[_MemoisedCheck, t.Coroutine[t.Any, t.Any, bool]]] = []
+        seen: t.Set[t.Any] = set()
+        try:
+            for index, check in enumerate(self.checks):
+                if check._key in seen:
+                    continue
+                seen.add(check._key)
+
+                result = check(context_)
+                if inspect.iscoroutine(result):
+                    if not self.concurrent:
+                        return self._evaluate_sequential(context_, check, result, index, seen)
+                    pending.append((check, result))
+                elif not result:
+                    raise errors.CheckFailure(f"Check {check.__name__!r} failed")
+        except BaseException:
+            # Close any coroutines that have not been started to avoid "never awaited" warnings
+            _close_unstarted(context_, pending)
+            raise
+
+        if not pending:
+            return True
+        return self._evaluate_concurrent(context_, pending)
+
+    async def _evaluate_sequential(
+        self,
+        context_: context.Context,
+        check: _MemoisedCheck,
+        result: t.Coroutine[t.Any, t.Any, bool],
+        index: int,
+        seen: t.Set[t.Any],
+    ) -> bool:
+        await _require(check, result)
+        for check in self.checks[index + 1 :]:
+            if check._key in seen:
+                continue
+            seen.add(check._key)
+            await _require(check, check(context_))
+        return True
+
+    @staticmethod
+    async def _evaluate_concurrent(
+        context_: context.Context, pending: t.List[t.Tuple[_MemoisedCheck, t.Coroutine[t.Any, t.Any, bool]]]
+    ) -> bool:
+        tasks = [asyncio.ensure_future(_require(check, coro)) for check, coro in pending]
+        try:
+            for future in asyncio.as_completed(tasks):
+                await future
+        finally:
+            # If a check failed then the remaining checks are no longer needed
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+            # Tasks cancelled before they started never run the checks' coroutines
+            _close_unstarted(context_, pending)
+        return True
+
+
+async def _require(check: _MemoisedCheck, result: _ResultT) -> bool:
+    if inspect.iscoroutine(result):
+        result = await result
+    if not result:
+        raise errors.CheckFailure(f"Check {check.__name__!r} failed")
+    return True
@@ -17,11 +17,12 @@
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
 from __future__ import annotations
 
-__all__ = ["opt", "option", "CommandLike"]
+__all__ = ["opt", "option", "unlink_module", "CommandLike", "LazyCommandLike"]
 
 import abc
-import collections
 import functools
+import time
+import types
 import typing as t
 
 import hikari
@@ -30,6 +31,11 @@ import lightbulb
 from lightbulb import commands
 from lightbulb import context
 
+from . import checks as checks_
+from . import limits as limits_
+from . import metrics
+from .spec import CommandSpec
+
 
 def opt(name: str, description: str, **kwargs: t.Any) -> commands.OptionLike:
     """
@@ -54,61 +60,344 @@ option = opt
 """Alias for :obj:`~opt`."""
 
 
-class CommandLike(abc.ABC):
+def _build_option_schema(cls: type) -> t.Dict[str, commands.OptionLike]:
+    # Walk the MRO from the base class downwards so that options are kept in the order that
+    # they were declared, and so that subclasses can override or remove options defined by a parent
+    by_attr: t.Dict[str, commands.OptionLike] = {}
+    for klass in reversed(cls.__mro__):
+        for attr, obj in vars(klass).items():
+            if isinstance(obj, commands.OptionLike):
+                by_attr[attr] = obj
+            elif attr in by_attr:
+                del by_attr[attr]
+    return {o.name: o for o in by_attr.values()}
+
+
+def _iter_command_classes() -> t.Iterator[t.Type[CommandLike]]:
+    # Classes only hold weak references to their subclasses so this will
+    # not find any command classes that have already been garbage collected
+    stack = list(CommandLike.__subclasses__())
+    while stack:
+        klass = stack.pop()
+        yield klass
+        stack.extend(klass.__subclasses__())
+
+
+def unlink_module(module: t.Union[str, types.ModuleType]) -> None:
+    """
+    Removes all references that filament holds to command classes defined in the given module, or any of
+    its submodules. Command classes defined in the module are detached from any parent commands defined
+    elsewhere, and have their own children, error handler and help getter cleared.
+
+    This should be called from an extension's ``unload`` function if the extension defines command classes
+    and is going to be reloaded, so that the old classes can be garbage collected.
+
+    Args:
+        module (Union[:obj:`str`, :obj:`types.ModuleType`]): The module, or name of the module, to unlink.
+
+    Returns:
+        ``None``
+
+    Example:
+
+        .. code-block:: python
+
+            def unload(bot):
+                bot.remove_command(bot.get_slash_command("foo"))
+                filament.unlink_module(__name__)
+    """
+    name = module if isinstance(module, str) else module.__name__
+
+    def in_module(klass: type) -> bool:
+        return klass.__module__ == name or klass.__module__.startswith(name + ".")
+
+    for klass in list(_iter_command_classes()):
+        if in_module(klass):
+            klass._subcommands = []
+            klass._error_handler = None
+            klass._help_getter = None
+            klass._check_exempt = None
+            klass._built = None
+        elif any(in_module(s) for s in klass._subcommands):
+            klass._subcommands[:] = [s for s in klass._subcommands if not in_module(s)]
+
+
+def _descendants(cls: t.Type[CommandLike]) -> t.Set[t.Type[CommandLike]]:
+    found: t.Set[t.Type[CommandLike]] = set()
+    stack = list(cls._subcommands)
+    while stack:
+        klass = stack.pop()
+        if klass not in found:
+            found.add(klass)
+            stack.extend(klass._subcommands)
+    return found
+
+
+def _check_siblings(parent: t.Type[CommandLike]) -> None:
+    # Lightbulb stores subcommands by name, so a later child would silently replace an earlier one. Children
+    # may share a name if they implement different command types, e.g. a prefix and a slash subcommand.
+    seen: t.Dict[t.Tuple[str, t.Type[commands.Command]], t.Type[CommandLike]] = {}
+    for child in parent._subcommands:
+        spec = child.get_spec()
+        for cmd_type in spec.implements:
+            other = seen.setdefault((spec.name, cmd_type), child)
+            if other is not child:
+                raise ValueError(
+                    f"Commands {other.__qualname__!r} and {child.__qualname__!r} are both children of "
+                    f"{parent.__qualname__!r} with the name {spec.name!r}"
+                )
+
+
+def _build_state(cls: t.Type[CommandLike], children: t.List[commands.CommandLike]) -> t.Tuple[t.Any, ...]:
+    # Everything that the built command depends on. The spec is recreated whenever a public attribute
+    # of the class is changed, so comparing it by identity detects any changes to the command's metadata.
+    return (cls.get_spec(), cls._error_handler, cls._help_getter, cls._check_exempt, cls._metrics_sink, *children)
+
+
+def _build_children(
+    parent: t.Type[CommandLike],
+    built: t.Optional[t.Dict[t.Type[CommandLike], commands.CommandLike]] = None,
+    timings: t.Optional[t.Dict[t.Type[CommandLike], float]] = None,
+) -> t.List[commands.CommandLike]:
+    # Builds every descendant of the given command class using an iterative post-order traversal, so that the
+    # depth of the command tree is not limited by the recursion limit. Each class is built at most once per call,
+    # even if it is the child of multiple commands. Subcommands without children of their own are also reused
+    # between calls if they have not changed. Groups are always built again, as lightbulb records every command
+    # created from a group on its subcommand list, so a reused group would keep every previous parent alive.
+    built = {} if built is None else built
+    stack: t.List[t.Tuple[t.Type[CommandLike], bool]] = [(c, False) for c in reversed(parent._subcommands)]
+    in_progress: t.Set[t.Type[CommandLike]] = {parent}
+    while stack:
+        cls, children_built = stack.pop()
+        if cls in built:
+            continue
+        if not children_built:
+            if cls in in_progress:
+                raise ValueError(f"Command {cls.__qualname__!r} is a descendant of itself")
+            in_progress.add(cls)
+            stack.append((cls, True))
+            stack.extend((child, False) for child in reversed(cls._subcommands) if child not in built)
+            continue
+
+        in_progress.discard(cls)
+        start = time.perf_counter()
+        children = [built[c] for c in cls._subcommands]
+        state = _build_state(cls, children)
+        cached = cls._built
+        if cached is not None and len(cached[0]) == len(state) and all(a is b for a, b in zip(cached[0], state)):
+            built[cls] = cached[1]
+        else:
+            _check_siblings(cls)
+            built[cls] = object.__new__(cls)._as_lightbulb_commandlike(children)
+            cls._built = None if children else (state, built[cls])
+        if timings is not None:
+            timings[cls] = time.perf_counter() - start
+
+    _check_siblings(parent)
+    return [built[c] for c in parent._subcommands]
+
+
+class _StaticHelp:
+    # Help getter for help text that does not depend on the context, so that it can be cached by the command index
+    __slots__ = ("text",)
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def __call__(self, _: commands.Command, __: context.Context) -> str:
+        return self.text
+
+
+class _CommandLikeMeta(abc.ABCMeta):
+    # Metaclass used so that the cached option schema can be invalidated if
+    # options are added to or removed from the class after it has been defined. Changing any other
+    # public attribute (e.g. overriding a property) only invalidates the cached spec.
+    def __setattr__(cls, name: str, value: t.Any) -> None:
+        previous = cls.__dict__.get(name)
+        super().__setattr__(name, value)
+        if isinstance(value, commands.OptionLike) or isinstance(previous, commands.OptionLike):
+            cls._invalidate_caches("_option_schema", "_spec")
+        elif not name.startswith("_"):
+            cls._invalidate_caches("_spec")
+
+    def __delattr__(cls, name: str) -> None:
+        previous = cls.__dict__.get(name)
+        super().__delattr__(name)
+        if isinstance(previous, commands.OptionLike):
+            cls._invalidate_caches("_option_schema", "_spec")
+        elif not name.startswith("_"):
+            cls._invalidate_caches("_spec")
+
+    def _invalidate_caches(cls, *caches: str) -> None:
+        stack = [cls]
+        while stack:
+            klass = stack.pop()
+            for cache in caches:
+                type.__setattr__(klass, cache, None)
+            stack.extend(klass.__subclasses__())
+
+
+class CommandLike(abc.ABC, metaclass=_CommandLikeMeta):
     """
     Base class for filament's command implementation. All of your command's must
     be a subclass of this.
+
+    The options defined on a command class are collected once, when the class is created, and
+    cached in declaration order. Adding or removing options from the class at a later point will
+    cause the cached options to be rebuilt the next time the command is instantiated.
+
+    Passing ``lazy=True`` in the class definition causes instances of the command to be returned as a
+    :obj:`~LazyCommandLike` handle instead, deferring creation of the lightbulb command (and all of its
+    subcommands) until it is first required.
+
+    Example:
+
+        .. code-block:: python
+
+            class EchoCommand(filament.CommandLike, lazy=True):
+                ...
     """
 
-    _subcommands: t.Dict[t.Type[CommandLike], t.List[t.Type[CommandLike]]] = collections.defaultdict(list)
-    _error_handlers: t.Dict[t.Type[CommandLike], t.Callable[[context.Context], t.Coroutine[t.Any, t.Any, bool]]] = {}
-    _help_getters: t.Dict[t.Type[CommandLike], t.Callable[[commands.Command, context.Context], str]] = {}
-    _check_exempts: t.Dict[
-        t.Type[CommandLike], t.Callable[[context.Context], t.Union[bool, t.Coroutine[t.Any, t.Any, bool]]]
-    ] = {}
+    _option_schema: t.ClassVar[t.Optional[t.Dict[str, commands.OptionLike]]] = None
+    _spec: t.ClassVar[t.Optional[CommandSpec]] = None
+    _lazy: t.ClassVar[bool] = False
+
+    # Per-class registries. These are reset for each subclass in __init_subclass__ so that they are
+    # not inherited, and are freed along with the class that they belong to.
+    _subcommands: t.ClassVar[t.List[t.Type[CommandLike]]] = []
+    _error_handler: t.ClassVar[t.Optional[t.Callable[[context.Context], t.Coroutine[t.Any, t.Any, bool]]]] = None
+    _help_getter: t.ClassVar[t.Optional[t.Callable[[commands.Command, context.Context], str]]] = None
+    _check_exempt: t.ClassVar[
+        t.Optional[t.Callable[[context.Context], t.Union[bool, t.Coroutine[t.Any, t.Any, bool]]]]
+    ] = None
+    # The lightbulb command last built for this class as a subcommand without children, and the state that it was
+    # built from.
+    # Commands are only ever shared as subcommands - the command returned when instantiating a class is always new.
+    _built: t.ClassVar[t.Optional[t.Tuple[t.Tuple[t.Any, ...], commands.CommandLike]]] = None
+    # Unlike the registries above this is inherited, so that instrumentation can be enabled for a whole hierarchy
+    _metrics_sink: t.ClassVar[t.Optional[metrics.MetricsSink]] = None
+
+    def __init_subclass__(cls, lazy: t.Optional[bool] = None, **kwargs: t.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        type.__setattr__(cls, "_option_schema", _build_option_schema(cls))
+        type.__setattr__(cls, "_spec", None)
+        cls._subcommands = []
+        cls._error_handler = None
+        cls._help_getter = None
+        cls._check_exempt = None
+        cls._built = None
+        if lazy is not None:
+            type.__setattr__(cls, "_lazy", lazy)
+
+    def __new__(cls, *args: t.Any, **kwargs: t.Any) -> t.Union[commands.CommandLike, LazyCommandLike]:
+        if cls._lazy:
+            return LazyCommandLike(cls, *args, **kwargs)
+        return cls._materialise(*args, **kwargs)
 
-    def __new__(cls, *args: t.Any, **kwargs: t.Any) -> commands.CommandLike:
+    @classmethod
+    def _materialise(cls, *args: t.Any, **kwargs: t.Any) -> commands.CommandLike:
         new = super().__new__(cls, *args, **kwargs)
         # Turn the created filament CommandLike into a lightbulb CommandLike so it can
         # actually be added to the bot
         return new._as_lightbulb_commandlike()
 
-    def _find_options(self) -> t.MutableMapping[str, commands.OptionLike]:
-        options = {}
-        # Search through the class' attributes to find all defined options
-        for item in dir(self):
-            obj = getattr(self, item)
-            if isinstance(obj, commands.OptionLike):
-                options[obj.name] = obj
-        return options
+    @classmethod
+    def _get_option_schema(cls) -> t.Dict[str, commands.OptionLike]:
+        schema = cls._option_schema
+        if schema is None:
+            schema = _build_option_schema(cls)
+            type.__setattr__(cls, "_option_schema", schema)
+        return schema
 
-    def _as_lightbulb_commandlike(self) -> commands.CommandLike:
-        # We need to wrap the callback here so that we can set the __cmd_types__ attribute
-        # in order for lightbulb to be able to detect what command types to create
-        @functools.wraps(self.callback)
-        async def _callback(*args: t.Any, **kwargs: t.Any) -> None:
-            await self.callback(*args, **kwargs)
+    @classmethod
+    def get_spec(cls) -> CommandSpec:
+        """
+        Gets the :obj:`~.spec.CommandSpec` containing the metadata for this command class. The spec is created
+        from the class' properties the first time this method is called, and is cached until an attribute
+        of the class is changed.
 
-        setattr(_callback, "__cmd_types__", self.implements)
+        Returns:
+            :obj:`~.spec.CommandSpec`: The spec for this command class.
+
+        Raises:
+            :obj:`TypeError`: If the class is abstract.
+        """
+        spec = cls._spec
+        if spec is None:
+            instance = object.__new__(cls)
+            spec = CommandSpec(
+                instance.name,
+                instance.description,
+                instance.implements,
+                tuple(cls._get_option_schema().values()),
+                instance.checks,
+                instance.aliases,
+                instance.guilds,
+                instance.parser,
+                instance.cooldown_manager,
+                instance.auto_defer,
+                instance.ephemeral,
+                instance.hidden,
+                instance.inherit_checks,
+                instance.limits,
+            )
+            type.__setattr__(cls, "_spec", spec)
+        return spec
+
+    def _find_options(self) -> t.MutableMapping[str, commands.OptionLike]:
+        # Copy the cached schema as lightbulb may add to the options of the created command
+        return dict(self._get_option_schema())
+
+    def _bind_callback(
+        self,
+        implements: t.Optional[t.Sequence[t.Type[commands.Command]]] = None,
+        limiter: t.Optional[limits_._LimitManager] = None,
+    ) -> t.Callable[..., t.Coroutine[t.Any, t.Any, None]]:
+        # We need a callable that we can set the __cmd_types__ attribute on in order for lightbulb
+        # to be able to detect what command types to create. Bound methods do not support setting attributes
+        # so we bind the underlying function using a partial instead, which calls straight through to the
+        # callback's coroutine without needing an additional coroutine frame on each invocation.
+        callback = self.callback
+        func = getattr(callback, "__func__", None)
+        bound: t.Callable[..., t.Coroutine[t.Any, t.Any, None]] = (
+            functools.partial(func, self) if func is not None else functools.partial(callback)
+        )
+        if limiter is not None:
+            bound = limiter.wrap(bound)
+        # Only wrap the callback if instrumentation is enabled so that there is no overhead otherwise
+        if (sink := self._metrics_sink) is not None:
+            bound = metrics._instrument(bound, sink, self.get_spec().name)
+        functools.update_wrapper(bound, callback)
+        setattr(bound, "__cmd_types__", list(implements if implements is not None else self.implements))
+        return bound
+
+    def _as_lightbulb_commandlike(
+        self, subcommands: t.Optional[t.List[commands.CommandLike]] = None
+    ) -> commands.CommandLike:
+        # Properties are read from the cached spec rather than being evaluated again for every conversion
+        spec = self.get_spec()
+        limiter = limits_._manager_for(type(self), spec.limits, spec.cooldown_manager)
+        _callback = self._bind_callback(spec.implements, limiter)
 
         return commands.CommandLike(
             _callback,
-            self.name,
-            self.description,
-            self._find_options(),
-            self.checks,
-            self._error_handlers.get(self.__class__),
-            self.aliases,
-            self.guilds if not isinstance(self.guilds, int) else [self.guilds],
-            [s() for s in self._subcommands.get(self.__class__, [])],
-            self.parser,
-            self.cooldown_manager,
-            self._help_getters.get(self.__class__),
-            self.auto_defer,
-            self.ephemeral,
-            self._check_exempts.get(self.__class__),
-            self.hidden,
-            self.inherit_checks,
+            spec.name,
+            spec.description,
+            {o.name: o for o in spec.options},
+            # Wrap the checks so that checks shared with the parent command are only evaluated once per invocation
+            [checks_._memoised(c) for c in spec.checks],
+            self._error_handler,
+            list(spec.aliases),
+            list(spec.guilds) if spec.guilds is not hikari.UNDEFINED else hikari.UNDEFINED,
+            subcommands if subcommands is not None else _build_children(type(self)),
+            spec.parser,
+            limiter if limiter is not None else spec.cooldown_manager,  # type: ignore[arg-type]
+            self._help_getter,
+            spec.auto_defer,
+            spec.ephemeral,
+            self._check_exempt,
+            spec.hidden,
+            spec.inherit_checks,
         )
 
     @property
@@ -171,6 +460,15 @@ class CommandLike(abc.ABC):
         """
         return None
 
+    @property
+    def limits(self) -> t.Sequence[limits_.Limit]:
+        """
+        Sequence of cooldowns and concurrency limits to apply to this command. Unlike :obj:`~CommandLike.cooldown_manager`
+        these can keep their state in a store shared between multiple processes. See :obj:`~.limits.TokenBucket`,
+        :obj:`~.limits.SlidingWindow` and :obj:`~.limits.ConcurrencyLimit`.
+        """
+        return []
+
     @property
     def auto_defer(self) -> bool:
         """
@@ -220,17 +518,79 @@ class CommandLike(abc.ABC):
         Registers a :obj:`~CommandLike` subclass as a child to this command.
         This can be used as a first or second order decorator, or called manually with the :obj:`~CommandLike`
         subclass to add as a child.
+
+        A class can be the child of multiple commands, in which case its lightbulb command is only built once
+        and is shared between them. Adding a class that is already a child of this command has no effect. If a
+        class with the same module and qualified name is already a child of this command, such as an older
+        version of the class from before an extension was reloaded, it is replaced.
+
+        Raises:
+            :obj:`ValueError`: If adding the class would make a command a descendant of itself.
         """
         if other is not None:
-            CommandLike._subcommands[cls].append(other)
+            cls._add_child(other)
             return other
 
         def decorate(other_: t.Type[CommandLike]) -> t.Type[CommandLike]:
-            CommandLike._subcommands[cls].append(other_)
+            cls._add_child(other_)
             return other_
 
         return decorate
 
+    @classmethod
+    def _add_child(cls, other: t.Type[CommandLike]) -> None:
+        if other in cls._subcommands:
+            return
+        if other is cls or cls in _descendants(other):
+            raise ValueError(f"Adding {other.__qualname__!r} as a child of {cls.__qualname__!r} would create a cycle")
+
+        for i, existing in enumerate(cls._subcommands):
+            if existing.__module__ == other.__module__ and existing.__qualname__ == other.__qualname__:
+                cls._subcommands[i] = other
+                return
+        cls._subcommands.append(other)
+
+    @classmethod
+    def instrument(cls, sink: t.Optional[metrics.MetricsSink]) -> None:
+        """
+        Enables recording of invocation metrics for this command class and all of its subclasses that do not
+        set their own sink. Calling this on :obj:`~CommandLike` itself enables metrics for every command.
+
+        This only affects commands created after this method is called. Instrumentation adds a small amount of
+        overhead to each invocation, but commands that are not instrumented are unaffected.
+
+        Args:
+            sink (Optional[:obj:`~.metrics.MetricsSink`]): The sink to send the metrics to, or ``None`` to
+                disable instrumentation.
+
+        Returns:
+            ``None``
+
+        Example:
+
+            .. code-block:: python
+
+                sink = filament.PrometheusSink()
+                filament.CommandLike.instrument(sink)
+                ...
+                print(sink.render())
+        """
+        type.__setattr__(cls, "_metrics_sink", sink)
+
+    @classmethod
+    def remove_child(cls, other: t.Type[CommandLike]) -> None:
+        """
+        Removes a :obj:`~CommandLike` subclass previously registered as a child of this command. If the given
+        class is not a child of this command then this method does nothing.
+
+        Args:
+            other (Type[:obj:`~CommandLike`]): The child command class to remove.
+
+        Returns:
+            ``None``
+        """
+        cls._subcommands[:] = [s for s in cls._subcommands if s is not other]
+
     @classmethod
     def set_error_handler(
         cls, other: t.Optional[t.Callable[[context.Context], t.Coroutine[t.Any, t.Any, bool]]] = None
@@ -246,13 +606,13 @@ class CommandLike(abc.ABC):
         second order decorator, or called manually with the function to register.
         """
         if other is not None:
-            CommandLike._error_handlers[cls] = other
+            cls._error_handler = staticmethod(other)
             return other
 
         def decorate(
             other_: t.Callable[[context.Context], t.Coroutine[t.Any, t.Any, bool]]
         ) -> t.Callable[[context.Context], t.Coroutine[t.Any, t.Any, bool]]:
-            CommandLike._error_handlers[cls] = other_
+            cls._error_handler = staticmethod(other_)
             return other_
 
         return decorate
@@ -275,17 +635,94 @@ class CommandLike(abc.ABC):
                 the function will be assumed to be a decorator.
         """
         if text is not None:
-
-            def return_text(_: commands.Command, __: context.Context, *, text_: str) -> str:
-                return text_
-
-            CommandLike._help_getters[cls] = functools.partial(return_text, text_=text)  # type: ignore
+            cls._help_getter = staticmethod(_StaticHelp(text))  # type: ignore
             return None
 
         def decorate(
             func: t.Callable[[commands.Command, context.Context], str]
         ) -> t.Callable[[commands.Command, context.Context], str]:
-            CommandLike._help_getters[cls] = func
+            cls._help_getter = staticmethod(func)
             return func
 
         return decorate
+
+
+class LazyCommandLike:
+    """
+    Lightweight handle returned when instantiating a :obj:`~CommandLike` subclass defined with ``lazy=True``.
+
+    The handle can be passed anywhere that a :obj:`lightbulb.commands.base.CommandLike` is expected. The
+    lightbulb command, including its subcommand tree, is only created the first time that an attribute which
+    requires it is accessed - usually when the command is added to the bot. Simple metadata such as the
+    command's name or guilds can be read and modified without creating the lightbulb command.
+
+    Args:
+        cls (Type[:obj:`~CommandLike`]): The command class that this handle is for.
+        *args: Positional arguments to pass through when instantiating the command class.
+        **kwargs: Keyword arguments to pass through when instantiating the command class.
+    """
+
+    __slots__ = ("_cls", "_args", "_kwargs", "_overrides", "_command")
+
+    _METADATA: t.Final[t.FrozenSet[str]] = frozenset(
+        ["name", "description", "aliases", "guilds", "hidden", "auto_defer", "ephemeral", "inherit_checks"]
+    )
+
+    def __init__(self, cls: t.Type[CommandLike], *args: t.Any, **kwargs: t.Any) -> None:
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_args", args)
+        object.__setattr__(self, "_kwargs", kwargs)
+        object.__setattr__(self, "_overrides", {})
+        object.__setattr__(self, "_command", None)
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> t.Type[t.Any]:
+        # Allows the handle to pass lightbulb's isinstance checks, e.g. in BotApp.remove_command
+        return commands.CommandLike
+
+    @property
+    def command_class(self) -> t.Type[CommandLike]:
+        """
+        The filament command class that this handle is for.
+        """
+        return self._cls
+
+    @property
+    def is_materialised(self) -> bool:
+        """
+        Whether or not the lightbulb command has been created yet.
+        """
+        return self._command is not None
+
+    def materialise(self) -> commands.CommandLike:
+        """
+        Creates the lightbulb command for this handle if it has not yet been created.
+
+        Returns:
+            :obj:`lightbulb.commands.base.CommandLike`: The created lightbulb command object.
+        """
+        if self._command is None:
+            command = self._cls._materialise(*self._args, **self._kwargs)
+            for name, value in self._overrides.items():
+                setattr(command, name, value)
+            object.__setattr__(self, "_command", command)
+            self._overrides.clear()
+        return self._command
+
+    def __getattr__(self, item: str) -> t.Any:
+        if self._command is None and item in self._METADATA:
+            if item in self._overrides:
+                return self._overrides[item]
+            value = getattr(self._cls.get_spec(), item)
+            return list(value) if isinstance(value, tuple) else value
+        return getattr(self.materialise(), item)
+
+    def __setattr__(self, key: str, value: t.Any) -> None:
+        if self._command is None and key in self._METADATA:
+            self._overrides[key] = value
+            return
+        setattr(self.materialise(), key, value)
+
+    def __repr__(self) -> str:
+        state = "materialised" if self.is_materialised else "pending"
+        return f"<LazyCommandLike {self._cls.__qualname__} ({state})>"
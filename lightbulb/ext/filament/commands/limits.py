@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = [
+    "LimitStore",
+    "InMemoryLimitStore",
+    "SQLiteLimitStore",
+    "set_default_limit_store",
+    "Limit",
+    "TokenBucket",
+    "SlidingWindow",
+    "ConcurrencyLimit",
+]
+
+import abc
+import asyncio
+import inspect
+import json
+import math
+import threading
+import time
+import typing as t
+
+from lightbulb import buckets
+from lightbulb import errors
+
+if t.TYPE_CHECKING:
+    import os
+
+    from lightbulb import context
+    from lightbulb import cooldowns
+
+T = t.TypeVar("T")
+StateT = t.Tuple[float, ...]
+UpdateFuncT = t.Callable[[t.Optional[StateT]], t.Tuple[t.Optional[StateT], T]]
+
+# Number of updates between sweeps of expired keys
+_SWEEP_INTERVAL = 1024
+
+
+class LimitStore(abc.ABC):
+    """
+    Abstract base class for a store which holds the state of cooldowns and concurrency limits. The state for
+    each key is a small tuple of floats, which must be updated atomically so that the store can be shared
+    between multiple processes.
+    """
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    async def update(self, key: str, func: UpdateFuncT[T], ttl: float) -> T:
+        """
+        Atomically updates the state stored under the given key.
+
+        Args:
+            key (:obj:`str`): The key to update.
+            func (Callable[[Optional[Tuple[:obj:`float`, ...]]], Tuple[Optional[Tuple[:obj:`float`, ...]], T]]):
+                Function which takes the current state, or ``None`` if there is no state stored for the key, and
+                returns the new state (or ``None`` to delete the key) and a value to return to the caller.
+            ttl (:obj:`float`): The number of seconds after which the new state can be discarded.
+
+        Returns:
+            T: The value returned by ``func``.
+        """
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Deletes the state stored under the given key.
+
+        Args:
+            key (:obj:`str`): The key to delete.
+
+        Returns:
+            ``None``
+        """
+        ...
+
+
+class InMemoryLimitStore(LimitStore):
+    """
+    Limit store which holds state in memory. State is not shared between processes.
+    """
+
+    __slots__ = ("_data", "_updates")
+
+    def __init__(self) -> None:
+        self._data: t.Dict[str, t.Tuple[StateT, float]] = {}
+        self._updates = 0
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, (_, expires) in self._data.items() if expires <= now]:
+            del self._data[key]
+
+    async def update(self, key: str, func: UpdateFuncT[T], ttl: float) -> T:
+        # There is no await between the read and the write so this is atomic within the event loop
+        now = time.time()
+        entry = self._data.get(key)
+        new, result = func(entry[0] if entry is not None and entry[1] > now else None)
+        if new is None:
+            self._data.pop(key, None)
+        else:
+            self._data[key] = (new, now + ttl)
+
+        self._updates += 1
+        if self._updates % _SWEEP_INTERVAL == 0:
+            self._sweep(now)
+        return result
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class SQLiteLimitStore(LimitStore):
+    """
+    Limit store which holds state in a SQLite database, so that limits can be shared between multiple processes
+    running on the same machine. Queries are run in a worker thread so that they do not block the event loop.
+
+    Args:
+        path (Union[:obj:`str`, :obj:`os.PathLike`]): The path to the database file. It will be created if
+            it does not exist.
+        timeout (:obj:`float`): The number of seconds to wait for another process to release its lock on the
+            database. Defaults to ``5``.
+    """
+
+    __slots__ = ("_conn", "_lock", "_updates")
+
+    def __init__(self, path: t.Union[str, os.PathLike[str]], timeout: float = 5.0) -> None:
+        # Imported here so that sqlite3 is only loaded if the store is used
+        import sqlite3
+
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS filament_limits "
+            "(key TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._updates = 0
+
+    def _update(self, key: str, func: UpdateFuncT[T], ttl: float) -> T:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the database write lock, so no other process can modify the key
+            # between us reading the state and writing the new state
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT state FROM filament_limits WHERE key = ? AND expires > ?", (key, now)
+                ).fetchone()
+                new, result = func(tuple(json.loads(row[0])) if row is not None else None)
+                if new is None:
+                    self._conn.execute("DELETE FROM filament_limits WHERE key = ?", (key,))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO filament_limits (key, state, expires) VALUES (?, ?, ?)",
+                        (key, json.dumps(new), now + ttl),
+                    )
+
+                self._updates += 1
+                if self._updates % _SWEEP_INTERVAL == 0:
+                    self._conn.execute("DELETE FROM filament_limits WHERE expires <= ?", (now,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            return result
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM filament_limits WHERE key = ?", (key,))
+
+    async def update(self, key: str, func: UpdateFuncT[T], ttl: float) -> T:
+        return await asyncio.get_running_loop().run_in_executor(None, self._update, key, func, ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self._delete, key)
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+
+        Returns:
+            ``None``
+        """
+        self._conn.close()
+
+
+_default_store: LimitStore = InMemoryLimitStore()
+
+
+def set_default_limit_store(store: LimitStore) -> None:
+    """
+    Sets the store used by limits which were not given a store explicitly. By default, an
+    :obj:`~InMemoryLimitStore` is used.
+
+    Args:
+        store (:obj:`~LimitStore`): The store to use.
+
+    Returns:
+        ``None``
+    """
+    global _default_store
+    _default_store = store
+
+
+class Limit(abc.ABC):
+    """
+    Base class for all cooldowns and concurrency limits that can be declared in the
+    :obj:`filament.commands.impl.CommandLike.limits` of a command.
+
+    Args:
+        bucket (Type[:obj:`lightbulb.buckets.Bucket`]): The bucket to apply the limit under. Defaults to
+            :obj:`lightbulb.buckets.UserBucket`.
+        store (Optional[:obj:`~LimitStore`]): The store to keep the limit's state in. If not provided then the
+            default store (see :obj:`~set_default_limit_store`) will be used.
+    """
+
+    __slots__ = ("bucket", "store")
+
+    def __init__(self, bucket: t.Type[buckets.Bucket] = buckets.UserBucket, store: t.Optional[LimitStore] = None):
+        self.bucket = bucket
+        self.store = store
+
+    def _params(self) -> t.Tuple[t.Any, ...]:
+        return (type(self), *(getattr(self, a) for k in type(self).__mro__ for a in getattr(k, "__slots__", ())))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Limit):
+            return NotImplemented
+        return self._params() == other._params()
+
+    def __hash__(self) -> int:
+        return hash(self._params())
+
+    def __repr__(self) -> str:
+        params = ", ".join(f"{a}={getattr(self, a)!r}" for a in type(self).__slots__)
+        return f"{type(self).__name__}({params})"
+
+    def _store(self) -> LimitStore:
+        return self.store if self.store is not None else _default_store
+
+    def _key(self, prefix: str, context_: context.Context) -> str:
+        return f"{prefix}:{type(self).__name__}:{self.bucket.__name__}:{self.bucket.extract_hash(context_)}"
+
+    async def reset(self, prefix: str, context_: context.Context) -> None:
+        """
+        Resets the limit under the given context.
+
+        Args:
+            prefix (:obj:`str`): The prefix for the key that the limit's state is stored under.
+            context_ (:obj:`lightbulb.context.base.Context`): The context to reset the limit under.
+
+        Returns:
+            ``None``
+        """
+        await self._store().delete(self._key(prefix, context_))
+
+
+class _RateLimit(Limit, abc.ABC):
+    __slots__ = ()
+
+    @property
+    @abc.abstractmethod
+    def _ttl(self) -> float:
+        ...
+
+    @abc.abstractmethod
+    def _hit(self, state: t.Optional[StateT], now: float) -> t.Tuple[StateT, float]:
+        ...
+
+    async def hit(self, prefix: str, context_: context.Context) -> float:
+        """
+        Records a use of the command under the given context.
+
+        Args:
+            prefix (:obj:`str`): The prefix for the key that the limit's state is stored under.
+            context_ (:obj:`lightbulb.context.base.Context`): The context the command is being invoked under.
+
+        Returns:
+            :obj:`float`: ``0`` if the command is allowed to be used, otherwise the number of seconds until
+            it will be allowed.
+        """
+        now = time.time()
+        return await self._store().update(self._key(prefix, context_), lambda s: self._hit(s, now), self._ttl)
+
+
+class TokenBucket(_RateLimit):
+    """
+    Token bucket cooldown. Each bucket holds up to ``capacity`` tokens, and each invocation of the command takes one
+    token. Tokens are refilled continuously at a rate of ``capacity`` tokens every ``period`` seconds, which allows
+    short bursts of invocations while limiting the average rate.
+
+    Args:
+        capacity (:obj:`int`): The maximum number of tokens in the bucket.
+        period (:obj:`float`): The number of seconds taken to refill the bucket from empty.
+        bucket (Type[:obj:`lightbulb.buckets.Bucket`]): The bucket to apply the limit under. Defaults to
+            :obj:`lightbulb.buckets.UserBucket`.
+        store (Optional[:obj:`~LimitStore`]): The store to keep the limit's state in.
+
+    Raises:
+        :obj:`ValueError`: If ``capacity`` or ``period`` is not greater than ``0``.
+    """
+
+    __slots__ = ("capacity", "period")
+
+    def __init__(
+        self,
+        capacity: int,
+        period: float,
+        bucket: t.Type[buckets.Bucket] = buckets.UserBucket,
+        store: t.Optional[LimitStore] = None,
+    ) -> None:
+        if capacity <= 0 or period <= 0:
+            raise ValueError("capacity and period must both be greater than 0")
+        super().__init__(bucket, store)
+        self.capacity = capacity
+        self.period = period
+
+    @property
+    def _ttl(self) -> float:
+        # Once the bucket has completely refilled the state is the same as if the key did not exist
+        return self.period
+
+    def _hit(self, state: t.Optional[StateT], now: float) -> t.Tuple[StateT, float]:
+        rate = self.capacity / self.period
+        tokens = float(self.capacity) if state is None else min(self.capacity, state[0] + (now - state[1]) * rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0.0
+        return (tokens, now), (1 - tokens) / rate
+
+
+class SlidingWindow(_RateLimit):
+    """
+    Sliding window cooldown. Allows at most ``limit`` invocations of the command within any ``window`` seconds.
+
+    The number of invocations within the window is estimated from the counts for the current and previous fixed
+    windows, so that only two counters need to be stored for each bucket.
+
+    Args:
+        limit (:obj:`int`): The maximum number of invocations allowed within the window.
+        window (:obj:`float`): The length of the window in seconds.
+        bucket (Type[:obj:`lightbulb.buckets.Bucket`]): The bucket to apply the limit under. Defaults to
+            :obj:`lightbulb.buckets.UserBucket`.
+        store (Optional[:obj:`~LimitStore`]): The store to keep the limit's state in.
+
+    Raises:
+        :obj:`ValueError`: If ``limit`` or ``window`` is not greater than ``0``.
+    """
+
+    __slots__ = ("limit", "window")
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        bucket: t.Type[buckets.Bucket] = buckets.UserBucket,
+        store: t.Optional[LimitStore] = None,
+    ) -> None:
+        if limit <= 0 or window <= 0:
+            raise ValueError("limit and window must both be greater than 0")
+        super().__init__(bucket, store)
+        self.limit = limit
+        self.window = window
+
+    @property
+    def _ttl(self) -> float:
+        return 2 * self.window
+
+    def _hit(self, state: t.Optional[StateT], now: float) -> t.Tuple[StateT, float]:
+        start = math.floor(now / self.window) * self.window
+        current, previous = 0.0, 0.0
+        if state is not None:
+            if state[0] == start:
+                current, previous = state[1], state[2]
+            elif state[0] == start - self.window:
+                previous = state[1]
+
+        elapsed = (now - start) / self.window
+        if previous * (1 - elapsed) + current + 1 <= self.limit:
+            return (start, current + 1, previous), 0.0
+
+        # Work out when the weighted count will next drop low enough to allow another invocation
+        if current + 1 <= self.limit:
+            retry_at = start + self.window * (1 - (self.limit - 1 - current) / previous)
+        else:
+            retry_at = start + self.window * (2 - (self.limit - 1) / current)
+        return (start, current, previous), max(retry_at - now, 0.0)
+
+
+class ConcurrencyLimit(Limit):
+    """
+    Limits the number of invocations of the command that can be running at the same time.
+
+    Args:
+        limit (:obj:`int`): The maximum number of concurrent invocations.
+        bucket (Type[:obj:`lightbulb.buckets.Bucket`]): The bucket to apply the limit under. Defaults to
+            :obj:`lightbulb.buckets.UserBucket`.
+        store (Optional[:obj:`~LimitStore`]): The store to keep the limit's state in.
+        timeout (:obj:`float`): The number of seconds after which running invocations are assumed to have been lost,
+            for example if the process running them was killed. Defaults to ``600``.
+
+    Raises:
+        :obj:`ValueError`: If ``limit`` or ``timeout`` is not greater than ``0``.
+    """
+
+    __slots__ = ("limit", "timeout")
+
+    def __init__(
+        self,
+        limit: int,
+        bucket: t.Type[buckets.Bucket] = buckets.UserBucket,
+        store: t.Optional[LimitStore] = None,
+        timeout: float = 600.0,
+    ) -> None:
+        if limit <= 0 or timeout <= 0:
+            raise ValueError("limit and timeout must both be greater than 0")
+        super().__init__(bucket, store)
+        self.limit = limit
+        self.timeout = timeout
+
+    def _acquire(self, state: t.Optional[StateT]) -> t.Tuple[t.Optional[StateT], bool]:
+        running = state[0] if state is not None else 0
+        if running >= self.limit:
+            return state, False
+        return (running + 1,), True
+
+    @staticmethod
+    def _release(state: t.Optional[StateT]) -> t.Tuple[t.Optional[StateT], None]:
+        running = state[0] - 1 if state is not None else 0
+        return ((running,) if running > 0 else None), None
+
+    async def acquire(self, prefix: str, context_: context.Context) -> bool:
+        """
+        Attempts to acquire a slot for an invocation of the command under the given context.
+
+        Args:
+            prefix (:obj:`str`): The prefix for the key that the limit's state is stored under.
+            context_ (:obj:`lightbulb.context.base.Context`): The context the command is being invoked under.
+
+        Returns:
+            :obj:`bool`: Whether a slot was acquired.
+        """
+        return await self._store().update(self._key(prefix, context_), self._acquire, self.timeout)
+
+    async def release(self, prefix: str, context_: context.Context) -> None:
+        """
+        Releases a slot previously acquired using :obj:`~ConcurrencyLimit.acquire`.
+
+        Args:
+            prefix (:obj:`str`): The prefix for the key that the limit's state is stored under.
+            context_ (:obj:`lightbulb.context.base.Context`): The context the command was invoked under.
+
+        Returns:
+            ``None``
+        """
+        await self._store().update(self._key(prefix, context_), self._release, self.timeout)
+
+
+class _LimitManager:
+    # Duck-typed replacement for lightbulb's CooldownManager which enforces filament limits, and then any
+    # cooldown manager that the command defines
+    __slots__ = ("prefix", "rate_limits", "concurrency_limits", "cooldown_manager")
+
+    def __init__(
+        self, prefix: str, limits: t.Sequence[Limit], cooldown_manager: t.Optional[cooldowns.CooldownManager]
+    ) -> None:
+        self.prefix = prefix
+        self.rate_limits = [lim for lim in limits if isinstance(lim, _RateLimit)]
+        self.concurrency_limits = [lim for lim in limits if isinstance(lim, ConcurrencyLimit)]
+        self.cooldown_manager = cooldown_manager
+
+    async def add_cooldown(self, context_: context.Context) -> None:
+        if self.cooldown_manager is not None:
+            await self.cooldown_manager.add_cooldown(context_)
+
+        for limit in self.rate_limits:
+            if (retry_after := await limit.hit(self.prefix, context_)) > 0:
+                raise errors.CommandIsOnCooldown("This command is on cooldown", retry_after=retry_after)
+
+    async def _acquire(self, context_: context.Context) -> None:
+        for i, concurrency in enumerate(self.concurrency_limits):
+            if not await concurrency.acquire(self.prefix, context_):
+                for acquired in self.concurrency_limits[:i]:
+                    await acquired.release(self.prefix, context_)
+                raise errors.MaxConcurrencyLimitReached(
+                    "The maximum number of concurrent invocations for this command has been reached",
+                    bucket=concurrency.bucket,
+                )
+
+    async def _release(self, context_: context.Context) -> None:
+        for limit in self.concurrency_limits:
+            await limit.release(self.prefix, context_)
+
+    async def reset_cooldown(self, context_: context.Context) -> None:
+        if self.cooldown_manager is not None:
+            await self.cooldown_manager.reset_cooldown(context_)
+        for limit in [*self.rate_limits, *self.concurrency_limits]:
+            await limit.reset(self.prefix, context_)
+
+    def wrap(
+        self, callback: t.Callable[..., t.Coroutine[t.Any, t.Any, None]]
+    ) -> t.Callable[..., t.Coroutine[t.Any, t.Any, None]]:
+        # Concurrency slots are acquired here rather than in add_cooldown, as lightbulb can fail to invoke the
+        # callback after evaluating cooldowns (e.g. if an argument cannot be converted) which would leak the slots
+        if not self.concurrency_limits:
+            return callback
+
+        async def limited(context_: context.Context, *args: t.Any, **kwargs: t.Any) -> None:
+            await self._acquire(context_)
+            try:
+                await callback(context_, *args, **kwargs)
+            finally:
+                await self._release(context_)
+
+        return limited
+
+
+def _manager_for(
+    cls: type, limits: t.Sequence[Limit], cooldown_manager: t.Optional[cooldowns.CooldownManager]
+) -> t.Optional[_LimitManager]:
+    if not limits:
+        return None
+    for limit in limits:
+        if not isinstance(limit, Limit) or inspect.isabstract(type(limit)):
+            raise TypeError(f"Command {cls.__qualname__!r}: {limit!r} is not a valid limit")
+    # The key prefix needs to be the same in every process, so cannot use the id of the class
+    return _LimitManager(f"{cls.__module__}.{cls.__qualname__}", limits, cooldown_manager)
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["find_commands", "build_commands", "register_commands", "BuildReport"]
+
+import importlib
+import inspect
+import pkgutil
+import time
+import types
+import typing as t
+
+from lightbulb import commands
+
+from . import impl
+
+if t.TYPE_CHECKING:
+    import lightbulb
+
+CommandSourceT = t.Union[str, types.ModuleType, t.Iterable[t.Type[impl.CommandLike]]]
+
+
+def _is_command_class(obj: t.Any) -> bool:
+    return (
+        isinstance(obj, type)
+        and issubclass(obj, impl.CommandLike)
+        and obj is not impl.CommandLike
+        and not inspect.isabstract(obj)
+    )
+
+
+def _module_commands(module: types.ModuleType) -> t.List[t.Type[impl.CommandLike]]:
+    # Only include classes defined in the module itself, not ones that it has imported. A class may be bound
+    # to multiple names in the module, so duplicates are removed.
+    return list(
+        dict.fromkeys(
+            obj for obj in vars(module).values() if _is_command_class(obj) and obj.__module__ == module.__name__
+        )
+    )
+
+
+def find_commands(source: CommandSourceT) -> t.List[t.Type[impl.CommandLike]]:
+    """
+    Finds all the non-abstract :obj:`~.impl.CommandLike` subclasses in the given module or package. If a package
+    is given then all of its submodules are imported and searched as well.
+
+    Args:
+        source (Union[:obj:`str`, :obj:`types.ModuleType`, Iterable[Type[:obj:`~.impl.CommandLike`]]]): The module,
+            package, or name of the module or package to search. If an iterable of command classes is passed then
+            the classes are returned unchanged.
+
+    Returns:
+        List[Type[:obj:`~.impl.CommandLike`]]: The command classes found, in the order they were defined.
+    """
+    if isinstance(source, str):
+        source = importlib.import_module(source)
+    if not isinstance(source, types.ModuleType):
+        return list(source)
+
+    found = _module_commands(source)
+    if hasattr(source, "__path__"):
+        for info in pkgutil.walk_packages(source.__path__, prefix=source.__name__ + "."):
+            found.extend(_module_commands(importlib.import_module(info.name)))
+    return found
+
+
+def _find_roots(
+    classes: t.Sequence[t.Type[impl.CommandLike]],
+) -> t.Tuple[t.List[t.Type[impl.CommandLike]], t.List[t.Type[impl.CommandLike]]]:
+    # Splits the classes into the top-level commands, and subcommands whose parent is not one of the classes
+    children = {child for cls in classes for child in cls._subcommands}
+    # Children of commands outside of the classes, which must not be built as top-level commands
+    external_children = {child for cls in impl._iter_command_classes() for child in cls._subcommands} - children
+
+    roots, skipped = [], []
+    for cls in classes:
+        if cls in children:
+            continue
+        implements = cls.get_spec().implements
+        is_subcommand = bool(implements) and all(issubclass(c, commands.SubCommandTrait) for c in implements)
+        if is_subcommand or cls in external_children:
+            skipped.append(cls)
+        else:
+            roots.append(cls)
+    return roots, skipped
+
+
+class BuildReport:
+    """
+    The result of building a set of filament commands using :obj:`~build_commands` or :obj:`~register_commands`.
+    """
+
+    __slots__ = ("commands", "build_times", "skipped")
+
+    def __init__(self) -> None:
+        self.commands: t.Dict[t.Type[impl.CommandLike], commands.CommandLike] = {}
+        """Mapping of each built command class to the created lightbulb command. Includes subcommands."""
+        self.build_times: t.Dict[t.Type[impl.CommandLike], float] = {}
+        """
+        Mapping of each built command class to the time in seconds taken to build it. This does not
+        include the time taken to build the command's subcommands.
+        """
+        self.skipped: t.List[t.Type[impl.CommandLike]] = []
+        """
+        Subcommand classes which were found but whose parent command was not, so they were not built. Their parent
+        command should be built instead, which builds them as well.
+        """
+
+    @property
+    def total_time(self) -> float:
+        """The total time in seconds taken to build all the commands."""
+        return sum(self.build_times.values())
+
+    def slowest(self, n: int = 10) -> t.List[t.Tuple[t.Type[impl.CommandLike], float]]:
+        """
+        Gets the command classes that took the longest to build.
+
+        Args:
+            n (:obj:`int`): The number of command classes to return. Defaults to ``10``.
+
+        Returns:
+            List[Tuple[Type[:obj:`~.impl.CommandLike`], :obj:`float`]]: The command classes and their build times,
+            slowest first.
+        """
+        return sorted(self.build_times.items(), key=lambda i: i[1], reverse=True)[:n]
+
+
+def build_commands(
+    source: CommandSourceT,
+) -> t.Tuple[t.List[commands.CommandLike], BuildReport]:
+    """
+    Builds lightbulb commands from all the filament command classes in the given source in a single pass. Each
+    command class is only built once, even if it is a child of multiple commands, and the command tree is built
+    iteratively so deeply nested groups are supported.
+
+    Args:
+        source (Union[:obj:`str`, :obj:`types.ModuleType`, Iterable[Type[:obj:`~.impl.CommandLike`]]]): The module,
+            package or command classes to build. See :obj:`~find_commands`.
+
+    Returns:
+        Tuple[List[:obj:`lightbulb.commands.base.CommandLike`], :obj:`~BuildReport`]: The built top-level
+        commands (those which are not a child of any other command), and a report containing the time taken to
+        build each command.
+
+    Raises:
+        :obj:`ValueError`: If a command is a descendant of itself, or two children of a command have the same name.
+    """
+    classes = list(dict.fromkeys(find_commands(source)))
+    roots, skipped = _find_roots(classes)
+
+    report = BuildReport()
+    report.skipped.extend(skipped)
+    built = report.commands
+    for root in roots:
+        subcommands = impl._build_children(root, built, report.build_times)
+        start = time.perf_counter()
+        built[root] = object.__new__(root)._as_lightbulb_commandlike(subcommands)
+        report.build_times[root] = time.perf_counter() - start
+
+    return [built[root] for root in roots], report
+
+
+def register_commands(
+    target: t.Union[lightbulb.BotApp, lightbulb.Plugin], source: CommandSourceT
+) -> BuildReport:
+    """
+    Builds all the filament command classes in the given source using :obj:`~build_commands` and adds the
+    top-level commands to the given bot or plugin.
+
+    The commands are built in a single pass, sharing subcommands which are used by multiple commands and reusing
+    any that have already been built. Each top-level command is then added using the target's ``command`` method.
+    Lightbulb only syncs application commands once, when the bot starts, so adding commands individually does not
+    cause any extra requests to discord.
+
+    Args:
+        target (Union[:obj:`lightbulb.app.BotApp`, :obj:`lightbulb.plugins.Plugin`]): The bot or plugin to add the
+            commands to.
+        source (Union[:obj:`str`, :obj:`types.ModuleType`, Iterable[Type[:obj:`~.impl.CommandLike`]]]): The module,
+            package or command classes to build. See :obj:`~find_commands`.
+
+    Returns:
+        :obj:`~BuildReport`: Report containing the built commands and the time taken to build each of them.
+
+    Example:
+
+        .. code-block:: python
+
+            report = filament.register_commands(bot, "bot.commands")
+            for cls, seconds in report.slowest(5):
+                print(f"{cls.__qualname__} took {seconds * 1000:.2f}ms to build")
+    """
+    roots, report = build_commands(source)
+    for cmd_like in roots:
+        target.command(cmd_like)
+    return report
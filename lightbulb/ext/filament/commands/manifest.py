@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["create_manifest", "register_from_manifest"]
+
+import enum
+import importlib
+import json
+import os
+import typing as t
+
+import hikari
+
+from lightbulb import commands
+
+from . import impl
+from . import loading
+
+if t.TYPE_CHECKING:
+    import lightbulb
+
+_MANIFEST_VERSION = 1
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+# Attributes copied from the real command onto the placeholder once the command's module has been imported
+_DEFERRED_ATTRS = ("callback", "checks", "error_handler", "cooldown_manager", "help_getter", "check_exempt")
+
+
+class _NotSerialisable(Exception):
+    pass
+
+
+def _path_of(obj: t.Any) -> str:
+    if isinstance(obj, enum.Enum):
+        return f"{_path_of(type(obj))}.{obj.name}"
+    if not isinstance(obj, type) or "<locals>" in obj.__qualname__:
+        raise _NotSerialisable
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def _resolve(path: str) -> t.Any:
+    module, _, qualname = path.partition(":")
+    obj: t.Any = importlib.import_module(module)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _dump_option(option: commands.OptionLike) -> t.Dict[str, t.Any]:
+    data: t.Dict[str, t.Any] = {
+        "name": option.name,
+        "description": option.description,
+        "arg_type": _path_of(option.arg_type),
+        "required": option.required,
+        "modifier": option.modifier.name,
+        "autocomplete": option.autocomplete,
+    }
+    if option.default is not hikari.UNDEFINED:
+        if not isinstance(option.default, _JSON_SCALARS):
+            raise _NotSerialisable
+        data["default"] = option.default
+    if option.choices is not None:
+        data["choices"] = [
+            {"name": c.name, "value": c.value} if isinstance(c, hikari.CommandChoice) else c for c in option.choices
+        ]
+    if option.channel_types is not None:
+        data["channel_types"] = [int(c) for c in option.channel_types]
+    for attr in ("min_value", "max_value", "min_length", "max_length"):
+        if (value := getattr(option, attr)) is not None:
+            data[attr] = value
+    for attr in ("name_localizations", "description_localizations"):
+        if value := getattr(option, attr):
+            data[attr] = {str(k): v for k, v in value.items()}
+    return data
+
+
+def _load_option(data: t.Dict[str, t.Any]) -> commands.OptionLike:
+    kwargs = dict(data)
+    kwargs["arg_type"] = _resolve(kwargs["arg_type"])
+    kwargs["modifier"] = commands.OptionModifier[kwargs["modifier"]]
+    if "choices" in kwargs:
+        kwargs["choices"] = [hikari.CommandChoice(**c) if isinstance(c, dict) else c for c in kwargs["choices"]]
+    if "channel_types" in kwargs:
+        kwargs["channel_types"] = [hikari.ChannelType(c) for c in kwargs["channel_types"]]
+    return commands.OptionLike(**kwargs)
+
+
+def _dump_command(cls: t.Type[impl.CommandLike]) -> t.Dict[str, t.Any]:
+    spec = cls.get_spec()
+    data: t.Dict[str, t.Any] = {
+        "name": spec.name,
+        "description": spec.description,
+        "implements": [_path_of(i) for i in spec.implements],
+        "aliases": list(spec.aliases),
+        "guilds": None if spec.guilds is hikari.UNDEFINED else list(spec.guilds),
+        "auto_defer": spec.auto_defer,
+        "ephemeral": spec.ephemeral,
+        "hidden": spec.hidden,
+        "inherit_checks": spec.inherit_checks,
+        "children": [_path_of(c) for c in cls._subcommands],
+        "lazy": True,
+    }
+    try:
+        data["options"] = [_dump_option(o) for o in spec.options]
+    except _NotSerialisable:
+        data["options"] = None
+        data["lazy"] = False
+    # The parser is used before the callback is invoked, so cannot be swapped in afterwards
+    if spec.parser is not None:
+        data["lazy"] = False
+    return data
+
+
+def create_manifest(
+    source: loading.CommandSourceT, path: t.Optional[t.Union[str, os.PathLike[str]]] = None
+) -> t.Dict[str, t.Any]:
+    """
+    Creates a manifest describing all the filament command classes in the given source, which can later be passed
+    to :obj:`~register_from_manifest` to register the commands without importing the modules that they are
+    defined in. The manifest contains the path, name, options and children of each command class.
+
+    Args:
+        source (Union[:obj:`str`, :obj:`types.ModuleType`, Iterable[Type[:obj:`~.impl.CommandLike`]]]): The module,
+            package or command classes to create the manifest for. See :obj:`~.loading.find_commands`.
+        path (Optional[Union[:obj:`str`, :obj:`os.PathLike`]]): The file to write the manifest to as JSON. If not
+            provided then the manifest will only be returned.
+
+    Returns:
+        Dict[:obj:`str`, Any]: The created manifest.
+    """
+    classes = list(dict.fromkeys(loading.find_commands(source)))
+    roots, _ = loading._find_roots(classes)
+
+    entries: t.Dict[str, t.Dict[str, t.Any]] = {}
+    stack = list(reversed(classes))
+    while stack:
+        cls = stack.pop()
+        if (key := _path_of(cls)) in entries:
+            continue
+        entries[key] = _dump_command(cls)
+        stack.extend(reversed(cls._subcommands))
+
+    manifest = {
+        "version": _MANIFEST_VERSION,
+        "roots": [_path_of(cls) for cls in roots],
+        "commands": entries,
+    }
+    if path is not None:
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(manifest, fp, indent=2)
+    return manifest
+
+
+class _ManifestTree:
+    __slots__ = ("placeholders", "loaded")
+
+    def __init__(self) -> None:
+        self.placeholders: t.Dict[str, commands.CommandLike] = {}
+        self.loaded = False
+
+    def load(self) -> None:
+        if self.loaded:
+            return
+        for path, placeholder in self.placeholders.items():
+            cls = _resolve(path)
+            real = object.__new__(cls)._as_lightbulb_commandlike([])
+            for attr in _DEFERRED_ATTRS:
+                setattr(placeholder, attr, getattr(real, attr))
+        self.loaded = True
+
+    def placeholder_for(self, path: str, entry: t.Dict[str, t.Any]) -> commands.CommandLike:
+        tree = self
+
+        async def callback(context: lightbulb.context.Context, **kwargs: t.Any) -> None:
+            # Only run for the first invocation of any command in the tree. Once loaded, the command's
+            # real checks, cooldowns and callback replace the placeholder ones so they must be processed here
+            tree.load()
+            invoked = context.invoked
+            assert invoked is not None
+            await invoked.evaluate_checks(context)
+            await invoked.evaluate_cooldowns(context)
+            await invoked(context, **kwargs)
+
+        callback.__name__ = callback.__qualname__ = entry["name"]
+        setattr(callback, "__cmd_types__", [_resolve(i) for i in entry["implements"]])
+
+        self.placeholders[path] = commands.CommandLike(
+            callback,
+            entry["name"],
+            entry["description"],
+            {o["name"]: _load_option(o) for o in entry["options"]},
+            aliases=entry["aliases"],
+            guilds=entry["guilds"] if entry["guilds"] is not None else hikari.UNDEFINED,
+            auto_defer=entry["auto_defer"],
+            ephemeral=entry["ephemeral"],
+            hidden=entry["hidden"],
+            inherit_checks=entry["inherit_checks"],
+        )
+        return self.placeholders[path]
+
+
+def _build_tree(root: str, entries: t.Dict[str, t.Dict[str, t.Any]]) -> t.Optional[commands.CommandLike]:
+    tree = _ManifestTree()
+    built: t.Dict[str, commands.CommandLike] = {}
+    in_progress: t.Set[str] = set()
+    stack: t.List[t.Tuple[str, bool]] = [(root, False)]
+    while stack:
+        path, children_built = stack.pop()
+        if path in built:
+            continue
+        entry = entries[path]
+        if not entry["lazy"]:
+            return None
+        if not children_built:
+            if path in in_progress:
+                raise ValueError(f"Command {path!r} is a descendant of itself")
+            in_progress.add(path)
+            stack.append((path, True))
+            stack.extend((child, False) for child in entry["children"])
+            continue
+        in_progress.discard(path)
+        built[path] = tree.placeholder_for(path, entry)
+        built[path].subcommands = [built[child] for child in entry["children"]]
+    return built[root]
+
+
+def register_from_manifest(
+    target: t.Union[lightbulb.BotApp, lightbulb.Plugin],
+    manifest: t.Union[str, os.PathLike[str], t.Dict[str, t.Any]],
+) -> t.List[commands.CommandLike]:
+    """
+    Registers the commands described by a manifest created using :obj:`~create_manifest` to the given bot or
+    plugin. The modules that the commands are defined in are not imported until one of the commands in the
+    same command tree is first invoked.
+
+    A command tree is imported immediately if any of its commands use a custom parser, or have an option with a
+    default value that cannot be stored in the manifest.
+
+    The manifest must be recreated whenever a command's name, description, options or children are changed.
+
+    Args:
+        target (Union[:obj:`lightbulb.app.BotApp`, :obj:`lightbulb.plugins.Plugin`]): The bot or plugin to add the
+            commands to.
+        manifest (Union[:obj:`str`, :obj:`os.PathLike`, Dict[:obj:`str`, Any]]): The manifest, or path to the
+            manifest file.
+
+    Returns:
+        List[:obj:`lightbulb.commands.base.CommandLike`]: The top-level commands that were added.
+
+    Raises:
+        :obj:`ValueError`: If the manifest was created by an incompatible version of filament, or a command
+            is a descendant of itself.
+
+    Example:
+
+        .. code-block:: python
+
+            # Run once, for example as part of your deployment process
+            filament.create_manifest("bot.commands", "commands.json")
+
+            # On startup
+            filament.register_from_manifest(bot, "commands.json")
+    """
+    if not isinstance(manifest, dict):
+        with open(manifest, encoding="utf-8") as fp:
+            manifest = json.load(fp)
+    assert isinstance(manifest, dict)
+    if manifest.get("version") != _MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version {manifest.get('version')!r}")
+
+    entries = manifest["commands"]
+    eager: t.List[t.Type[impl.CommandLike]] = []
+    added: t.List[commands.CommandLike] = []
+    for root in manifest["roots"]:
+        if (cmd_like := _build_tree(root, entries)) is None:
+            eager.append(_resolve(root))
+            continue
+        added.append(target.command(cmd_like))
+
+    if eager:
+        roots, _ = loading.build_commands(eager)
+        added.extend(target.command(cmd_like) for cmd_like in roots)
+    return added
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = [
+    "InvocationRecord",
+    "CommandStats",
+    "MetricsSink",
+    "InMemorySink",
+    "PrometheusSink",
+    "CallbackSink",
+    "LoggingSink",
+]
+
+import abc
+import bisect
+import logging
+import math
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from lightbulb import context
+
+_LOGGER = logging.getLogger("lightbulb.ext.filament.metrics")
+
+# Upper bounds, in seconds, of the histogram buckets. These are the same as the
+# default buckets used by the Prometheus client libraries.
+_BUCKETS: t.Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+class InvocationRecord:
+    """
+    Timings for a single invocation of an instrumented command.
+    """
+
+    __slots__ = ("path", "duration", "first_response", "deferred", "error")
+
+    def __init__(
+        self,
+        path: str,
+        duration: float,
+        first_response: t.Optional[float],
+        deferred: bool,
+        error: t.Optional[BaseException],
+    ) -> None:
+        self.path = path
+        """The qualified name of the invoked command, including the names of any parent commands."""
+        self.duration = duration
+        """The time in seconds taken for the command's callback to complete."""
+        self.first_response = first_response
+        """
+        The time in seconds from the callback being invoked until the first call to ``respond``, or
+        ``None`` if the callback did not respond.
+        """
+        self.deferred = deferred
+        """Whether the response had already been deferred by lightbulb's ``auto_defer`` when the callback started."""
+        self.error = error
+        """The exception raised by the callback, or ``None`` if it completed successfully."""
+
+    def __repr__(self) -> str:
+        return f"InvocationRecord(path={self.path!r}, duration={self.duration:.6f}, error={self.error!r})"
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        # Linearly interpolate within the bucket that contains the requested rank
+        rank, seen, lower = q * self.count, 0, 0.0
+        for bound, n in zip(_BUCKETS, self.counts):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * ((rank - seen) / n)
+            seen += n
+            lower = bound
+        return self.max
+
+
+class CommandStats:
+    """
+    Aggregated statistics for a single command, collected by :obj:`~InMemorySink`.
+    """
+
+    __slots__ = ("invocations", "errors", "deferred", "_latency", "_first_response")
+
+    def __init__(self) -> None:
+        self.invocations: int = 0
+        """The number of times that the command has been invoked."""
+        self.errors: int = 0
+        """The number of invocations that raised an exception."""
+        self.deferred: int = 0
+        """The number of invocations that had been deferred by ``auto_defer`` before the callback started."""
+        self._latency = _Histogram()
+        self._first_response = _Histogram()
+
+    def add(self, record: InvocationRecord) -> None:
+        """
+        Adds an invocation to the statistics.
+
+        Args:
+            record (:obj:`~InvocationRecord`): The invocation to add.
+
+        Returns:
+            ``None``
+        """
+        self.invocations += 1
+        self._latency.observe(record.duration)
+        if record.error is not None:
+            self.errors += 1
+        if record.deferred:
+            self.deferred += 1
+        if record.first_response is not None:
+            self._first_response.observe(record.first_response)
+
+    def latency(self, q: float) -> float:
+        """
+        Estimates the given quantile of the command's latency.
+
+        Args:
+            q (:obj:`float`): The quantile to estimate, between ``0`` and ``1``.
+
+        Returns:
+            :obj:`float`: The estimated latency in seconds.
+        """
+        return self._latency.percentile(q)
+
+    def first_response(self, q: float) -> float:
+        """
+        Estimates the given quantile of the time taken for the command to first respond.
+
+        Args:
+            q (:obj:`float`): The quantile to estimate, between ``0`` and ``1``.
+
+        Returns:
+            :obj:`float`: The estimated time to first response in seconds.
+        """
+        return self._first_response.percentile(q)
+
+    @property
+    def p50(self) -> float:
+        """The estimated median latency in seconds."""
+        return self.latency(0.5)
+
+    @property
+    def p95(self) -> float:
+        """The estimated 95th percentile latency in seconds."""
+        return self.latency(0.95)
+
+    @property
+    def p99(self) -> float:
+        """The estimated 99th percentile latency in seconds."""
+        return self.latency(0.99)
+
+    def __repr__(self) -> str:
+        return (
+            f"CommandStats(invocations={self.invocations}, errors={self.errors}, "
+            f"p50={self.p50:.6f}, p95={self.p95:.6f}, p99={self.p99:.6f})"
+        )
+
+
+class MetricsSink(abc.ABC):
+    """
+    Abstract base class for destinations of command invocation metrics. Pass an instance of
+    a subclass to :obj:`filament.commands.impl.CommandLike.instrument` to start recording metrics.
+    """
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def record(self, record: InvocationRecord) -> None:
+        """
+        Records a single command invocation. This is called once the command's callback has completed, and
+        should not block.
+
+        Args:
+            record (:obj:`~InvocationRecord`): The invocation to record.
+
+        Returns:
+            ``None``
+        """
+        ...
+
+
+class InMemorySink(MetricsSink):
+    """
+    Sink which aggregates invocation metrics in memory, by command.
+    """
+
+    __slots__ = ("stats",)
+
+    def __init__(self) -> None:
+        self.stats: t.Dict[str, CommandStats] = {}
+        """Mapping of command path to the statistics collected for that command."""
+
+    def record(self, record: InvocationRecord) -> None:
+        stats = self.stats.get(record.path)
+        if stats is None:
+            stats = self.stats[record.path] = CommandStats()
+        stats.add(record)
+
+    def reset(self) -> None:
+        """
+        Clears all the statistics collected so far.
+
+        Returns:
+            ``None``
+        """
+        self.stats.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PrometheusSink(InMemorySink):
+    """
+    Sink which aggregates invocation metrics in memory, and can render them in the Prometheus text
+    exposition format.
+
+    Args:
+        namespace (:obj:`str`): The prefix to use for the metric names. Defaults to ``filament_command``.
+    """
+
+    __slots__ = ("namespace",)
+
+    def __init__(self, namespace: str = "filament_command") -> None:
+        super().__init__()
+        self.namespace = namespace
+
+    def _histogram(self, name: str, help_: str, attr: str) -> t.Iterator[str]:
+        yield f"# HELP {name} {help_}"
+        yield f"# TYPE {name} histogram"
+        for path, stats in self.stats.items():
+            hist: _Histogram = getattr(stats, attr)
+            label = f'command="{_escape(path)}"'
+            cumulative = 0
+            for bound, n in zip(_BUCKETS, hist.counts):
+                cumulative += n
+                le = "+Inf" if math.isinf(bound) else repr(bound)
+                yield f'{name}_bucket{{{label},le="{le}"}} {cumulative}'
+            yield f"{name}_sum{{{label}}} {hist.sum!r}"
+            yield f"{name}_count{{{label}}} {hist.count}"
+
+    def render(self) -> str:
+        """
+        Renders the collected metrics in the Prometheus text exposition format.
+
+        Returns:
+            :obj:`str`: The rendered metrics.
+        """
+        ns = self.namespace
+        lines = [
+            *self._histogram(f"{ns}_duration_seconds", "Time taken for command callbacks to complete.", "_latency"),
+            *self._histogram(
+                f"{ns}_first_response_seconds", "Time taken for commands to first respond.", "_first_response"
+            ),
+        ]
+        for metric, help_, attr in (
+            ("errors", "Number of command invocations that raised an exception.", "errors"),
+            ("deferred", "Number of command invocations that were automatically deferred.", "deferred"),
+        ):
+            lines.append(f"# HELP {ns}_{metric}_total {help_}")
+            lines.append(f"# TYPE {ns}_{metric}_total counter")
+            for path, stats in self.stats.items():
+                lines.append(f'{ns}_{metric}_total{{command="{_escape(path)}"}} {getattr(stats, attr)}')
+        return "\n".join(lines) + "\n"
+
+
+class CallbackSink(MetricsSink):
+    """
+    Sink which passes each invocation record to a function.
+
+    Args:
+        callback (Callable[[:obj:`~InvocationRecord`], ``None``]): The function to call for each invocation.
+    """
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback: t.Callable[[InvocationRecord], None]) -> None:
+        self.callback = callback
+
+    def record(self, record: InvocationRecord) -> None:
+        self.callback(record)
+
+
+class LoggingSink(MetricsSink):
+    """
+    Sink which logs each invocation.
+
+    Args:
+        logger (Optional[:obj:`logging.Logger`]): The logger to log to. Defaults to the
+            ``lightbulb.ext.filament.metrics`` logger.
+        level (:obj:`int`): The level to log successful invocations at. Invocations that raised an exception
+            are always logged at ``WARNING``. Defaults to ``DEBUG``.
+    """
+
+    __slots__ = ("logger", "level")
+
+    def __init__(self, logger: t.Optional[logging.Logger] = None, level: int = logging.DEBUG) -> None:
+        self.logger = logger or _LOGGER
+        self.level = level
+
+    def record(self, record: InvocationRecord) -> None:
+        level = logging.WARNING if record.error is not None else self.level
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(
+            level,
+            "Command %r completed in %.2fms (first response: %s, deferred: %s, error: %r)",
+            record.path,
+            record.duration * 1000,
+            f"{record.first_response * 1000:.2f}ms" if record.first_response is not None else "none",
+            record.deferred,
+            record.error,
+        )
+
+
+class _TimedContext:
+    # Proxy for the context passed to an instrumented callback which records when the command first responds
+    __slots__ = ("_context", "_start", "_first_response")
+
+    def __init__(self, context_: context.Context, start: float) -> None:
+        object.__setattr__(self, "_context", context_)
+        object.__setattr__(self, "_start", start)
+        object.__setattr__(self, "_first_response", None)
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> t.Type[t.Any]:
+        # Allows isinstance checks against the context type to still pass
+        return type(self._context)
+
+    async def respond(self, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        if self._first_response is None:
+            object.__setattr__(self, "_first_response", time.perf_counter() - self._start)
+        return await self._context.respond(*args, **kwargs)
+
+    def __getattr__(self, item: str) -> t.Any:
+        return getattr(self._context, item)
+
+    def __setattr__(self, key: str, value: t.Any) -> None:
+        setattr(self._context, key, value)
+
+
+def _instrument(
+    callback: t.Callable[..., t.Coroutine[t.Any, t.Any, None]], sink: MetricsSink, name: str
+) -> t.Callable[..., t.Coroutine[t.Any, t.Any, None]]:
+    async def instrumented(context_: context.Context, *args: t.Any, **kwargs: t.Any) -> None:
+        start = time.perf_counter()
+        deferred = context_.deferred
+        timed = _TimedContext(context_, start)
+        error: t.Optional[BaseException] = None
+        try:
+            await callback(timed, *args, **kwargs)
+        except Exception as ex:
+            error = ex
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            invoked = context_.invoked
+            try:
+                sink.record(
+                    InvocationRecord(
+                        invoked.qualname if invoked is not None else name,
+                        duration,
+                        timed._first_response,
+                        deferred,
+                        error,
+                    )
+                )
+            except Exception:
+                _LOGGER.exception("Failed to record metrics for command %r", name)
+
+    return instrumented
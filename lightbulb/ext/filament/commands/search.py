@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["CommandIndex", "IndexEntry", "SearchResult"]
+
+import heapq
+import re
+import typing as t
+
+from lightbulb import commands
+
+from . import impl
+
+if t.TYPE_CHECKING:
+    import lightbulb
+    from lightbulb import context
+
+_WORD_RE = re.compile(r"[^\W_]{3,}")
+# Scores for matches against a description word are scaled down so that matches against a name rank first
+_DESCRIPTION_WEIGHT = 0.5
+# Maximum number of description words that the edit distance is calculated for, chosen from those sharing the
+# most trigrams with the query
+_MAX_FUZZY_CANDIDATES = 64
+_MIN_SCORE = 0.3
+_MIN_SUGGESTION_SCORE = 0.5
+
+
+def _trigrams(text: str) -> t.Set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    # Optimal string alignment distance (Levenshtein with transpositions), returning limit + 1 as soon as
+    # the distance is known to exceed the limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # Characters shared by the start or end of both strings do not change the distance, and similar names often
+    # only differ by a few characters in the middle
+    shortest = min(len(a), len(b))
+    prefix = 0
+    while prefix < shortest and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < shortest - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    a, b = a[prefix : len(a) - suffix], b[prefix : len(b) - suffix]
+    if not a or not b:
+        return len(a) + len(b)
+    before: t.List[int] = []
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, before[j - 2] + 1)
+            current.append(value)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _max_distance(text: str) -> int:
+    return 1 if len(text) < 5 else 2
+
+
+def _deletions(text: str, depth: int) -> t.Set[str]:
+    # All the strings that can be made by deleting up to the given number of characters from the text
+    found = {text}
+    layer = {text}
+    for _ in range(depth):
+        layer = {s[:i] + s[i + 1 :] for s in layer for i in range(len(s))} - found
+        found |= layer
+    return found
+
+
+class IndexEntry:
+    """
+    A command in a :obj:`~CommandIndex`. Commands of different types with the same qualified name, such as the prefix
+    and slash versions of a command, share the same entry.
+    """
+
+    __slots__ = ("qualname", "name", "aliases", "description", "hidden", "commands", "help_text")
+
+    def __init__(self, command: commands.Command) -> None:
+        self.qualname: str = command.qualname
+        """The qualified name of the command, including the names of any parent commands."""
+        self.name: str = command.name
+        """The name of the command."""
+        self.aliases: t.List[str] = []
+        """The aliases of the command. Only prefix commands have aliases."""
+        self.description: str = command.description
+        """The description of the command."""
+        self.hidden: bool = command.hidden
+        """Whether the command is hidden. Only ``True`` if all the commands in the entry are hidden."""
+        self.commands: t.List[commands.Command] = []
+        """The commands in the entry."""
+        self.help_text: t.Optional[str] = None
+        """
+        The long help text for the command, if it does not depend on the context. This is only set for help text
+        set using :obj:`filament.commands.impl.CommandLike.set_help` with a string, and is ``None`` if the help text
+        must be retrieved using :obj:`~IndexEntry.get_help` instead.
+        """
+        self._add(command)
+
+    def _add(self, command: commands.Command) -> None:
+        self.commands.append(command)
+        self.aliases.extend(a for a in getattr(command, "aliases", ()) if a not in self.aliases)
+        self.hidden = self.hidden and command.hidden
+        if self.help_text is None and isinstance(getter := command._help_getter, impl._StaticHelp):
+            self.help_text = getter.text
+
+    def get_help(self, context_: context.Context) -> str:
+        """
+        Gets the long help text for the command under the given context. Help text that does not depend on the
+        context is returned from the index without calling the command's help getter.
+
+        Args:
+            context_ (:obj:`lightbulb.context.base.Context`): The context to get the help text under.
+
+        Returns:
+            :obj:`str`: The command's help text, or an empty string if it does not have any.
+        """
+        if self.help_text is not None:
+            return self.help_text
+        return self.commands[0].get_help(context_)
+
+    def __repr__(self) -> str:
+        return f"IndexEntry(qualname={self.qualname!r})"
+
+
+class SearchResult:
+    """
+    A command matching a search made using :obj:`~CommandIndex.search`.
+    """
+
+    __slots__ = ("entry", "score", "term")
+
+    def __init__(self, entry: IndexEntry, score: float, term: str) -> None:
+        self.entry = entry
+        """The command that matched."""
+        self.score = score
+        """How closely the command matched, between ``0`` and ``1``. Exact matches of a name or alias score ``1``."""
+        self.term = term
+        """The name, alias or word from the description that matched."""
+
+    def __repr__(self) -> str:
+        return f"SearchResult(qualname={self.entry.qualname!r}, score={self.score:.3f}, term={self.term!r})"
+
+
+class _TrieNode:
+    __slots__ = ("children", "terms")
+
+    def __init__(self) -> None:
+        self.children: t.Dict[str, _TrieNode] = {}
+        # The ids of all the terms that start with the prefix that this node represents
+        self.terms: t.List[int] = []
+
+
+class CommandIndex:
+    """
+    Searchable index of the names, aliases and descriptions of the commands registered to a bot, for use in help
+    commands and "did you mean" suggestions. The index is built the first time it is searched, and is rebuilt
+    automatically if commands are added to or removed from the bot.
+
+    Names, aliases and the words in descriptions are indexed in a prefix trie so that partially typed names can be
+    completed. Misspelled names and aliases are found using an index of the strings within edit distance two of each
+    name, and misspelled description words using a trigram index.
+
+    Args:
+        app (:obj:`lightbulb.app.BotApp`): The bot to index the commands of.
+
+    Example:
+
+        .. code-block:: python
+
+            index = filament.CommandIndex(bot)
+
+            @bot.listen(lightbulb.CommandErrorEvent)
+            async def on_error(event):
+                if isinstance(event.exception, lightbulb.CommandNotFound):
+                    suggestions = index.suggest(event.exception.invoked_with)
+                    if suggestions:
+                        await event.context.respond(f"Did you mean: {', '.join(suggestions)}?")
+    """
+
+    __slots__ = (
+        "app",
+        "_signature",
+        "_entries",
+        "_by_name",
+        "_terms",
+        "_postings",
+        "_is_name",
+        "_trie",
+        "_trigrams",
+        "_term_trigrams",
+        "_deletes",
+    )
+
+    def __init__(self, app: lightbulb.BotApp) -> None:
+        self.app = app
+        """The bot whose commands are indexed."""
+        self._signature: t.Optional[t.Tuple[t.Any, ...]] = None
+        self._entries: t.List[IndexEntry] = []
+        self._by_name: t.Dict[str, IndexEntry] = {}
+        # Each distinct (casefolded) name, alias and description word is a term. The postings of a term are the
+        # entries that it belongs to, and the weight of matches against it for that entry.
+        self._terms: t.List[str] = []
+        self._postings: t.List[t.List[t.Tuple[int, float]]] = []
+        self._is_name: t.List[bool] = []
+        self._trie = _TrieNode()
+        self._trigrams: t.Dict[str, t.List[int]] = {}
+        self._term_trigrams: t.List[int] = []
+        self._deletes: t.Dict[str, t.List[int]] = {}
+
+    def _current_signature(self) -> t.Tuple[t.Any, ...]:
+        # Commands are only ever appended to or removed from the bot's mappings, never replaced in place, so the
+        # size of each mapping and its most recently added command change whenever the commands do. The commands
+        # themselves are kept rather than their ids so that a removed command's id cannot be reused by a new one.
+        app = self.app
+        signature: t.List[t.Any] = []
+        for mapping in (app.prefix_commands, app.slash_commands, app.message_commands, app.user_commands):
+            signature.append(len(mapping))
+            signature.append(next(reversed(mapping.values()), None))
+        return tuple(signature)
+
+    @property
+    def entries(self) -> t.Sequence[IndexEntry]:
+        """All the commands in the index, including subcommands."""
+        self._ensure_built()
+        return self._entries
+
+    def _ensure_built(self) -> None:
+        signature = self._current_signature()
+        if signature != self._signature:
+            self._build()
+            self._signature = signature
+
+    def refresh(self) -> None:
+        """
+        Rebuilds the index. This only needs to be called if the subcommands of a registered command are changed,
+        as the index is rebuilt automatically when top-level commands are added or removed.
+
+        Returns:
+            ``None``
+        """
+        self._build()
+        self._signature = self._current_signature()
+
+    def _build(self) -> None:
+        app = self.app
+        entries: t.Dict[str, IndexEntry] = {}
+        seen: t.Set[int] = set()
+        # Iterative walk of every command tree. The prefix command mapping includes aliases so a command may
+        # appear more than once.
+        stack: t.List[commands.Command] = [
+            cmd
+            for mapping in (app.user_commands, app.message_commands, app.slash_commands, app.prefix_commands)
+            for cmd in reversed(list(mapping.values()))
+        ]
+        while stack:
+            cmd = stack.pop()
+            if id(cmd) in seen:
+                continue
+            seen.add(id(cmd))
+            entry = entries.get(cmd.qualname)
+            if entry is None:
+                entries[cmd.qualname] = IndexEntry(cmd)
+            else:
+                entry._add(cmd)
+            subcommands = getattr(cmd, "subcommands", None)
+            if subcommands:
+                stack.extend(reversed(list(subcommands.values())))
+
+        self._entries = list(entries.values())
+        self._by_name = {}
+        postings: t.Dict[str, t.Dict[int, float]] = {}
+        for i, entry in enumerate(self._entries):
+            for name in (entry.qualname, entry.name, *entry.aliases):
+                postings.setdefault(name.casefold(), {})[i] = 1.0
+            for word in _WORD_RE.findall(entry.description.casefold()):
+                postings.setdefault(word, {}).setdefault(i, _DESCRIPTION_WEIGHT)
+
+            self._by_name.setdefault(entry.qualname.casefold(), entry)
+            parent = entry.qualname.rpartition(" ")[0]
+            for alias in entry.aliases:
+                self._by_name.setdefault(f"{parent} {alias}".strip().casefold(), entry)
+
+        self._terms = list(postings)
+        self._postings = [list(p.items()) for p in postings.values()]
+        self._is_name = [any(w == 1.0 for w in p.values()) for p in postings.values()]
+        self._trie = _TrieNode()
+        self._trigrams = {}
+        self._term_trigrams = []
+        self._deletes = {}
+        for term_id, text in enumerate(self._terms):
+            node = self._trie
+            for char in text:
+                node = node.children.setdefault(char, _TrieNode())
+                node.terms.append(term_id)
+            grams = _trigrams(text)
+            self._term_trigrams.append(len(grams))
+            for gram in grams:
+                self._trigrams.setdefault(gram, []).append(term_id)
+            if self._is_name[term_id]:
+                for variant in _deletions(text, _max_distance(text)):
+                    self._deletes.setdefault(variant, []).append(term_id)
+
+    def get(self, name: str) -> t.Optional[IndexEntry]:
+        """
+        Gets the command with the given qualified name or alias.
+
+        Args:
+            name (:obj:`str`): The qualified name or alias of the command, e.g. ``"foo bar"``. Case insensitive.
+
+        Returns:
+            Optional[:obj:`~IndexEntry`]: The command, or ``None`` if no command has the given name.
+        """
+        self._ensure_built()
+        return self._by_name.get(" ".join(name.split()).casefold())
+
+    def _score_terms(self, query: str, descriptions: bool) -> t.Dict[int, float]:
+        # Returns a mapping of term id to how closely the term matches the query, before weighting
+        scores: t.Dict[int, float] = {}
+
+        node: t.Optional[_TrieNode] = self._trie
+        for char in query:
+            node = node.children.get(char)
+            if node is None:
+                break
+        if node is not None:
+            for term_id in node.terms:
+                text = self._terms[term_id]
+                scores[term_id] = 1.0 if len(text) == len(query) else 0.75 + 0.2 * len(query) / len(text)
+
+        # Names and aliases within the maximum edit distance of the query share a string with at most that
+        # many characters deleted from both of them, so are all found using the deletion index
+        limit = _max_distance(query)
+        checked: t.Set[int] = set()
+        for variant in _deletions(query, limit):
+            for term_id in self._deletes.get(variant, ()):
+                if term_id in scores or term_id in checked:
+                    continue
+                checked.add(term_id)
+                text = self._terms[term_id]
+                distance = _edit_distance(query, text, limit)
+                if distance <= limit:
+                    scores[term_id] = 0.7 * (1 - distance / max(len(query), len(text)))
+
+        if descriptions:
+            grams = _trigrams(query)
+            shared: t.Dict[int, int] = {}
+            for gram in grams:
+                for term_id in self._trigrams.get(gram, ()):
+                    shared[term_id] = shared.get(term_id, 0) + 1
+            candidates = sorted(
+                (
+                    (n / (len(grams) + self._term_trigrams[term_id] - n), term_id)
+                    for term_id, n in shared.items()
+                    if term_id not in scores and not self._is_name[term_id]
+                ),
+                reverse=True,
+            )[:_MAX_FUZZY_CANDIDATES]
+            for similarity, term_id in candidates:
+                text = self._terms[term_id]
+                distance = _edit_distance(query, text, limit)
+                score = 0.6 * similarity
+                if distance <= limit:
+                    score = max(score, 0.7 * (1 - distance / max(len(query), len(text))))
+                scores[term_id] = score
+
+        return scores
+
+    def _score_entries(self, query: str, descriptions: bool) -> t.Dict[int, t.Tuple[float, int]]:
+        best: t.Dict[int, t.Tuple[float, int]] = {}
+        for term_id, score in self._score_terms(query, descriptions).items():
+            for entry_id, weight in self._postings[term_id]:
+                if weight != 1.0 and not descriptions:
+                    continue
+                weighted = score * weight
+                if entry_id not in best or weighted > best[entry_id][0]:
+                    best[entry_id] = (weighted, term_id)
+        return best
+
+    def search(
+        self, query: str, *, limit: int = 10, include_hidden: bool = False, descriptions: bool = True
+    ) -> t.List[SearchResult]:
+        """
+        Searches for commands whose name, alias or description matches the given query. Exact matches rank highest,
+        followed by names starting with the query, and then names and words that are similar to the query.
+
+        Args:
+            query (:obj:`str`): The text to search for. Case insensitive.
+
+        Keyword Args:
+            limit (:obj:`int`): The maximum number of results to return. Defaults to ``10``.
+            include_hidden (:obj:`bool`): Whether hidden commands should be included. Defaults to ``False``.
+            descriptions (:obj:`bool`): Whether the descriptions of commands should be searched, as well as their
+                names and aliases. Defaults to ``True``.
+
+        Returns:
+            List[:obj:`~SearchResult`]: The matching commands, best match first.
+        """
+        self._ensure_built()
+        query = " ".join(query.split()).casefold()
+        if not query:
+            return []
+
+        best = self._score_entries(query, descriptions)
+        words = query.split()
+        if len(words) > 1:
+            # Also match each word separately, so that e.g. "ban user" matches a command described as "bans a user"
+            totals: t.Dict[int, t.Tuple[float, int]] = {}
+            for word in words:
+                for entry_id, (score, term_id) in self._score_entries(word, descriptions).items():
+                    total, first = totals.get(entry_id, (0.0, term_id))
+                    totals[entry_id] = (total + score, first)
+            for entry_id, (total, term_id) in totals.items():
+                score = total / len(words)
+                if entry_id not in best or score > best[entry_id][0]:
+                    best[entry_id] = (score, term_id)
+
+        entries = self._entries
+        # Only the results that are returned are created, as common description words can match most commands
+        top = heapq.nsmallest(
+            limit,
+            (
+                (-score, entries[entry_id].qualname, entry_id, term_id)
+                for entry_id, (score, term_id) in best.items()
+                if score >= _MIN_SCORE and (include_hidden or not entries[entry_id].hidden)
+            ),
+        )
+        return [SearchResult(entries[entry_id], -score, self._terms[term_id]) for score, _, entry_id, term_id in top]
+
+    def suggest(self, name: str, *, limit: int = 3, include_hidden: bool = False) -> t.List[str]:
+        """
+        Gets the qualified names of the commands whose name or alias is most similar to the given name, for
+        "did you mean" suggestions when a command is not found.
+
+        Args:
+            name (:obj:`str`): The name that was not found.
+
+        Keyword Args:
+            limit (:obj:`int`): The maximum number of suggestions to return. Defaults to ``3``.
+            include_hidden (:obj:`bool`): Whether hidden commands should be suggested. Defaults to ``False``.
+
+        Returns:
+            List[:obj:`str`]: The qualified names of the suggested commands, best match first.
+        """
+        return [
+            r.entry.qualname
+            for r in self.search(name, limit=limit, include_hidden=include_hidden, descriptions=False)
+            if r.score >= _MIN_SUGGESTION_SCORE
+        ]
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["CommandSpec"]
+
+import typing as t
+
+import hikari
+
+import lightbulb
+from lightbulb import commands
+
+if t.TYPE_CHECKING:
+    from . import limits as limits_
+
+
+def _hashable(value: t.Any) -> t.Hashable:
+    try:
+        hash(value)
+    except TypeError:
+        if isinstance(value, t.Mapping):
+            return tuple((k, _hashable(v)) for k, v in value.items())
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return tuple(_hashable(v) for v in value)
+        return repr(value)
+    return value
+
+
+# Objects used when the command is run rather than a description of the command. They are usually created per
+# process, so comparing them would make otherwise identical specs from two versions of a bot compare unequal.
+_RUNTIME_FIELDS: t.Final[t.FrozenSet[str]] = frozenset(("checks", "cooldown_manager"))
+
+
+def _option_key(option: commands.OptionLike) -> t.Tuple[t.Hashable, ...]:
+    return (
+        option.name,
+        option.description,
+        _hashable(option.arg_type),
+        option.required,
+        _hashable(option.choices),
+        _hashable(option.channel_types),
+        _hashable(option.default),
+        option.modifier,
+        option.min_value,
+        option.max_value,
+        option.min_length,
+        option.max_length,
+        option.autocomplete,
+        _hashable(option.name_localizations),
+        _hashable(option.description_localizations),
+    )
+
+
+class CommandSpec:
+    """
+    Immutable snapshot of the metadata of a filament command class. Specs are hashable and can be compared
+    for equality, so can be used to detect whether a command has changed between two versions of a bot.
+
+    The command's ``checks`` and ``cooldown_manager`` are runtime objects rather than part of the command's
+    metadata, so they are available as attributes but are not considered when specs are compared or hashed.
+
+    You should not need to create this class yourself. Use :obj:`filament.commands.impl.CommandLike.get_spec`
+    to get the spec for a command class instead.
+
+    Args:
+        name (:obj:`str`): The name of the command.
+        description (:obj:`str`): The description of the command.
+        implements (Sequence[Type[:obj:`lightbulb.commands.base.Command`]]): The command types the command implements.
+        options (Sequence[:obj:`lightbulb.commands.base.OptionLike`]): The command's options, in order.
+        checks (Sequence[:obj:`lightbulb.checks.Check`]): The command's checks.
+        aliases (Sequence[:obj:`str`]): The command's aliases.
+        guilds (Union[Sequence[:obj:`int`], ``hikari.UNDEFINED``]): The guilds the command is restricted to.
+        parser (Optional[Type[:obj:`lightbulb.utils.parser.BaseParser`]]): The command's argument parser class.
+        cooldown_manager (Optional[:obj:`lightbulb.cooldowns.CooldownManager`]): The command's cooldown manager.
+        auto_defer (:obj:`bool`): Whether invocations of the command are automatically deferred.
+        ephemeral (:obj:`bool`): Whether responses from the command are ephemeral by default.
+        hidden (:obj:`bool`): Whether the command is hidden from the default help command.
+        inherit_checks (:obj:`bool`): Whether the command inherits checks from its parent.
+        limits (Sequence[:obj:`~.limits.Limit`]): The command's cooldowns and concurrency limits.
+    """
+
+    __slots__ = (
+        "name",
+        "description",
+        "implements",
+        "options",
+        "checks",
+        "aliases",
+        "guilds",
+        "parser",
+        "cooldown_manager",
+        "auto_defer",
+        "ephemeral",
+        "hidden",
+        "inherit_checks",
+        "limits",
+        "_key",
+        "_hash",
+    )
+
+    if t.TYPE_CHECKING:
+        name: str
+        description: str
+        implements: t.Tuple[t.Type[commands.Command], ...]
+        options: t.Tuple[commands.OptionLike, ...]
+        checks: t.Tuple[lightbulb.Check, ...]
+        aliases: t.Tuple[str, ...]
+        guilds: t.Union[t.Tuple[int, ...], hikari.UndefinedType]
+        parser: t.Optional[t.Type[lightbulb.utils.BaseParser]]
+        cooldown_manager: t.Optional[lightbulb.CooldownManager]
+        auto_defer: bool
+        ephemeral: bool
+        hidden: bool
+        inherit_checks: bool
+        limits: t.Tuple[limits_.Limit, ...]
+        _key: t.Tuple[t.Hashable, ...]
+        _hash: int
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        implements: t.Sequence[t.Type[commands.Command]],
+        options: t.Sequence[commands.OptionLike] = (),
+        checks: t.Sequence[lightbulb.Check] = (),
+        aliases: t.Sequence[str] = (),
+        guilds: t.Union[int, t.Sequence[int], hikari.UndefinedType] = hikari.UNDEFINED,
+        parser: t.Optional[t.Type[lightbulb.utils.BaseParser]] = None,
+        cooldown_manager: t.Optional[lightbulb.CooldownManager] = None,
+        auto_defer: bool = False,
+        ephemeral: bool = False,
+        hidden: bool = False,
+        inherit_checks: bool = False,
+        limits: t.Sequence[limits_.Limit] = (),
+    ) -> None:
+        if isinstance(guilds, int):
+            guilds = (guilds,)
+        elif guilds is not hikari.UNDEFINED:
+            guilds = tuple(guilds)
+
+        fields = {
+            "name": name,
+            "description": description,
+            "implements": tuple(implements),
+            "options": tuple(options),
+            "checks": tuple(checks),
+            "aliases": tuple(aliases),
+            "guilds": guilds,
+            "parser": parser,
+            "cooldown_manager": cooldown_manager,
+            "auto_defer": auto_defer,
+            "ephemeral": ephemeral,
+            "hidden": hidden,
+            "inherit_checks": inherit_checks,
+            "limits": tuple(limits),
+        }
+        for attr, value in fields.items():
+            object.__setattr__(self, attr, value)
+
+        key = tuple(
+            tuple(_option_key(o) for o in value) if attr == "options" else _hashable(value)
+            for attr, value in fields.items()
+            if attr not in _RUNTIME_FIELDS
+        )
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_hash", hash(key))
+
+    def __setattr__(self, key: str, value: t.Any) -> None:
+        raise AttributeError(f"cannot assign to field {key!r} of immutable {type(self).__name__}")
+
+    def __delattr__(self, item: str) -> None:
+        raise AttributeError(f"cannot delete field {item!r} of immutable {type(self).__name__}")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CommandSpec):
+            return NotImplemented
+        return self._hash == other._hash and self._key == other._key
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"CommandSpec(name={self.name!r}, implements={[i.__name__ for i in self.implements]!r})"
+
+    def __reduce__(self) -> t.Tuple[t.Any, ...]:
+        return CommandSpec, tuple(getattr(self, attr) for attr in self.__slots__[:-2])
+
+    @property
+    def option_names(self) -> t.Tuple[str, ...]:
+        """The names of the command's options, in order."""
+        return tuple(o.name for o in self.options)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["shape_hash", "sync_application_commands", "install_command_sync", "SyncResult"]
+
+import hashlib
+import json
+import logging
+import os
+import typing as t
+
+import hikari
+
+from lightbulb import commands
+
+if t.TYPE_CHECKING:
+    import lightbulb
+
+_LOGGER = logging.getLogger("lightbulb.ext.filament.sync")
+_STATE_VERSION = 1
+_GLOBAL_SCOPE = "global"
+
+_PathT = t.Union[str, "os.PathLike[str]"]
+
+
+def _option_shape(option: hikari.CommandOption) -> t.Dict[str, t.Any]:
+    return {
+        "type": int(option.type),
+        "name": option.name,
+        "description": option.description,
+        "required": option.is_required,
+        "choices": [[c.name, c.value] for c in option.choices or []],
+        "options": [_option_shape(o) for o in option.options or []],
+        "channel_types": sorted(int(c) for c in option.channel_types or []),
+        "min_value": option.min_value,
+        "max_value": option.max_value,
+        "min_length": option.min_length,
+        "max_length": option.max_length,
+        "autocomplete": option.autocomplete,
+        "name_localizations": {str(k): v for k, v in option.name_localizations.items()},
+        "description_localizations": {str(k): v for k, v in option.description_localizations.items()},
+    }
+
+
+def _command_shape(command: commands.ApplicationCommand) -> t.Dict[str, t.Any]:
+    kwargs = command.as_create_kwargs()
+    permissions = command.app_command_default_member_permissions
+    return {
+        "type": int(kwargs["type"]),
+        "name": kwargs["name"],
+        "description": kwargs.get("description"),
+        # Subcommands and subgroups are included in the options of the command
+        "options": [_option_shape(o) for o in kwargs.get("options", [])],
+        "name_localizations": {str(k): v for k, v in command.name_localizations.items()},
+        "description_localizations": {str(k): v for k, v in command.description_localizations.items()},
+        "guilds": sorted(command.guilds),
+        "dm_enabled": command.app_command_dm_enabled,
+        "nsfw": command.nsfw,
+        "default_member_permissions": int(permissions) if permissions is not None else None,
+    }
+
+
+def shape_hash(command: commands.ApplicationCommand) -> str:
+    """
+    Computes a stable hash of the declared shape of an application command - its name, description, options,
+    guilds and subcommands. The hash only depends on what would be sent to discord when the command is created,
+    so is the same across restarts and between machines.
+
+    Args:
+        command (:obj:`lightbulb.commands.base.ApplicationCommand`): The command to hash.
+
+    Returns:
+        :obj:`str`: The hex digest of the command's shape.
+    """
+    encoded = json.dumps(_command_shape(command), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SyncResult:
+    """
+    The result of syncing application commands using :obj:`~sync_application_commands`. Each list contains
+    tuples of the guild ID (or ``None`` for global commands) and the name of the command.
+    """
+
+    __slots__ = ("created", "updated", "deleted", "unchanged")
+
+    def __init__(self) -> None:
+        self.created: t.List[t.Tuple[t.Optional[int], str]] = []
+        """Commands that did not exist in the previous sync and were created."""
+        self.updated: t.List[t.Tuple[t.Optional[int], str]] = []
+        """Commands whose shape changed since the previous sync and were recreated."""
+        self.deleted: t.List[t.Tuple[t.Optional[int], str]] = []
+        """Commands that existed in the previous sync but are no longer registered to the bot."""
+        self.unchanged: t.List[t.Tuple[t.Optional[int], str]] = []
+        """Commands that are unchanged since the previous sync. No requests were made for these commands."""
+
+    @property
+    def request_count(self) -> int:
+        """The number of REST requests made to sync the commands."""
+        return len(self.created) + len(self.updated) + len(self.deleted)
+
+    def __repr__(self) -> str:
+        return (
+            f"SyncResult(created={len(self.created)}, updated={len(self.updated)}, "
+            f"deleted={len(self.deleted)}, unchanged={len(self.unchanged)})"
+        )
+
+
+def _load_state(path: _PathT, application_id: int) -> t.Dict[str, t.Dict[str, t.Dict[str, t.Any]]]:
+    try:
+        with open(path, encoding="utf-8") as fp:
+            data = json.load(fp)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != _STATE_VERSION or data.get("application") != application_id:
+        return {}
+    return data["scopes"]
+
+
+def _save_state(path: _PathT, application_id: int, scopes: t.Dict[str, t.Dict[str, t.Dict[str, t.Any]]]) -> None:
+    # Write to a temporary file first so that the state is not corrupted if the process is killed mid-write
+    tmp = f"{os.fspath(path)}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fp:
+        json.dump({"version": _STATE_VERSION, "application": application_id, "scopes": scopes}, fp, indent=2)
+    os.replace(tmp, path)
+
+
+async def _create_command(
+    rest: hikari.api.RESTClient,
+    application: hikari.SnowflakeishOr[hikari.PartialApplication],
+    command: commands.ApplicationCommand,
+    guild: t.Optional[int],
+) -> hikari.PartialCommand:
+    # Mirrors lightbulb's ApplicationCommand.create, but allows the REST client to be specified
+    kwargs = command.as_create_kwargs()
+    if guild is not None:
+        kwargs["guild"] = guild
+    else:
+        kwargs["dm_enabled"] = command.app_command_dm_enabled
+    kwargs["nsfw"] = command.nsfw
+    if command.app_command_default_member_permissions is not None:
+        kwargs["default_member_permissions"] = command.app_command_default_member_permissions
+    if command.name_localizations:
+        kwargs["name_localizations"] = command.name_localizations
+    if command.description_localizations:
+        kwargs["description_localizations"] = command.description_localizations
+
+    cmd_type: hikari.CommandType = kwargs.pop("type")
+    created: hikari.PartialCommand
+    if cmd_type is hikari.CommandType.SLASH:
+        created = await rest.create_slash_command(application, **kwargs)
+    else:
+        created = await rest.create_context_menu_command(application, type=cmd_type, **kwargs)
+    command.instances[guild] = created
+    return created
+
+
+async def sync_application_commands(
+    app: lightbulb.BotApp,
+    path: _PathT,
+    *,
+    force: bool = False,
+    rest: t.Optional[hikari.api.RESTClient] = None,
+) -> SyncResult:
+    """
+    Syncs the application commands registered to the bot with discord, skipping any commands that have not
+    changed since the previous sync. The hash (see :obj:`~shape_hash`) and ID of each command created are stored
+    in the given file, and compared against on the next sync. Commands are only created if their hash has changed
+    or they did not exist in the previous sync, and are only deleted if they existed in the previous sync.
+
+    Unlike lightbulb's own syncing, this does not fetch the existing commands from discord, so commands which were
+    created or modified outside of this function will not be detected. Delete the state file, or pass
+    ``force=True``, to recreate all the commands.
+
+    Args:
+        app (:obj:`lightbulb.app.BotApp`): The bot to sync the application commands for.
+        path (Union[:obj:`str`, :obj:`os.PathLike`]): The file to store the command hashes in. It will be created
+            if it does not exist.
+
+    Keyword Args:
+        force (:obj:`bool`): Whether to recreate all commands, even if they are unchanged. Defaults to ``False``.
+        rest (Optional[:obj:`hikari.api.rest.RESTClient`]): The REST client to use to make requests. Defaults to
+            the bot's REST client.
+
+    Returns:
+        :obj:`~SyncResult`: The commands that were created, updated, deleted or left unchanged.
+    """
+    rest = rest if rest is not None else app.rest
+    if app.application is None:
+        app.application = await rest.fetch_application()
+    application_id = int(app.application.id)
+
+    desired: t.Dict[str, t.Dict[str, t.Tuple[commands.ApplicationCommand, str]]] = {}
+    for command in [*app.slash_commands.values(), *app.message_commands.values(), *app.user_commands.values()]:
+        assert isinstance(command, commands.ApplicationCommand)
+        key, digest = f"{command.as_create_kwargs()['type'].name}:{command.name}", shape_hash(command)
+        for guild in command.guilds or [None]:
+            desired.setdefault(_GLOBAL_SCOPE if guild is None else str(guild), {})[key] = (command, digest)
+
+    previous = {} if force else _load_state(path, application_id)
+    state: t.Dict[str, t.Dict[str, t.Dict[str, t.Any]]] = {}
+    done: t.Set[str] = set()
+    result = SyncResult()
+    try:
+        for scope in {**previous, **desired}:
+            guild = None if scope == _GLOBAL_SCOPE else int(scope)
+            previous_entries, entries = previous.get(scope, {}), state.setdefault(scope, {})
+
+            for key, (command, digest) in desired.get(scope, {}).items():
+                entry = previous_entries.get(key)
+                if entry is not None and entry["hash"] == digest:
+                    entries[key] = entry
+                    result.unchanged.append((guild, command.name))
+                    continue
+
+                created = await _create_command(rest, app.application, command, guild)
+                entries[key] = {"hash": digest, "id": int(created.id)}
+                (result.created if entry is None else result.updated).append((guild, command.name))
+
+            for key, entry in previous_entries.items():
+                if key in entries:
+                    continue
+                if app._delete_unbound_commands:
+                    await rest.delete_application_command(
+                        app.application, entry["id"], guild if guild is not None else hikari.UNDEFINED
+                    )
+                    result.deleted.append((guild, key.partition(":")[2]))
+                else:
+                    entries[key] = entry
+
+            if not entries:
+                del state[scope]
+            done.add(scope)
+    finally:
+        # Keep the previous entries for any scopes that were not completed, so they are retried next time
+        for scope, entries in previous.items():
+            if scope not in done:
+                state[scope] = entries
+        _save_state(path, application_id, state)
+
+    _LOGGER.debug("Application command sync completed - %r", result)
+    return result
+
+
+def install_command_sync(app: lightbulb.BotApp, path: _PathT) -> None:
+    """
+    Replaces lightbulb's automatic application command syncing with :obj:`~sync_application_commands`, so that
+    unchanged commands are not recreated when the bot starts.
+
+    Args:
+        app (:obj:`lightbulb.app.BotApp`): The bot to install the command syncing for.
+        path (Union[:obj:`str`, :obj:`os.PathLike`]): The file to store the command hashes in.
+
+    Returns:
+        ``None``
+
+    Example:
+
+        .. code-block:: python
+
+            bot = lightbulb.BotApp(...)
+            filament.install_command_sync(bot, "command_sync.json")
+    """
+
+    async def _sync(_: hikari.StartedEvent) -> None:
+        await sync_application_commands(app, path)
+
+    app.unsubscribe(hikari.StartedEvent, app._manage_application_commands)
+    app.subscribe(hikari.StartedEvent, _sync)
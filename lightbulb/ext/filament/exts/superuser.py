@@ -17,25 +17,44 @@
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
 import ast
 import asyncio
-import contextlib
+import codecs
+import collections
+import concurrent.futures
+import contextvars
+import ctypes
+import functools
 import io
+import linecache
+import logging
 import os
 import re
 import shutil
+import signal
 import sys
+import tempfile
 import textwrap
+import threading
 import time
 import traceback
+import types
 import typing as t
+import weakref
 
+import hikari
 from lightbulb.utils import nav
-from lightbulb.utils import pag
 
 import lightbulb
 from lightbulb import commands
 
 __all__: t.Final[t.List[str]] = ["load", "unload"]
 
+_LOGGER = logging.getLogger("lightbulb.ext.filament.superuser")
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on windows
+    resource = None  # type: ignore
+
 SHELL = os.getenv("SHELL", os.name in ("win32", "win64", "winnt", "nt") and "cmd" or "bash")
 CODEBLOCK_REGEX: t.Final[t.Pattern[str]] = re.compile(r"```(?P<lang>[a-zA-Z0-9]*)\s(?P<code>[\s\S(^\\`{3})]*?)\s*```")
 LANGUAGES: t.Final[t.Mapping[str, str]] = {
@@ -49,54 +68,593 @@ LANGUAGES: t.Final[t.Mapping[str, str]] = {
     "bash": SHELL,
 }
 
+# The below settings can be changed at runtime by assigning to the attribute of this module
+OUTPUT_LIMIT: int = 1_000_000
+"""Maximum number of characters of each of stdout and stderr kept for each execution."""
+LIVE_UPDATE_INTERVAL: float = 2.0
+"""Minimum number of seconds between edits of the output message while an execution is running."""
+PAGE_LIMIT: int = 50
+"""Maximum number of pages of output to display. Longer output is also sent as an attached file."""
+TIMEOUT: t.Optional[float] = 300.0
+"""Wall-clock time in seconds after which an execution is stopped. ``None`` to disable. Python code running on the
+event loop can only be stopped while it is awaiting something."""
+CPU_TIME_LIMIT: t.Optional[int] = None
+"""CPU time limit in seconds applied to shell subprocesses. Only supported on unix systems."""
+MEMORY_LIMIT: t.Optional[int] = None
+"""Address space limit in bytes applied to shell subprocesses. Only supported on unix systems."""
+THREADED_EXECUTION: t.Optional[bool] = None
+"""Whether python code that does not use ``await`` should be run in a thread instead of on the event loop. ``None``
+to decide for each execution, running code in a thread unless it uses ``ctx``, ``bot`` or ``asyncio``."""
+MAX_EXECUTION_THREADS: int = 4
+"""Maximum number of threads used to run python code that does not use ``await``."""
+PERSISTENT_SESSIONS: bool = True
+"""Whether variables defined by python code should be kept between executions in the same channel by the same user."""
+SESSION_IDLE_TIMEOUT: float = 900.0
+"""Number of seconds after the last execution that a session's variables are discarded."""
+SESSION_MEMORY_LIMIT: int = 64 * 1024 * 1024
+"""Approximate size in bytes of a session's variables, including the objects they refer to, after which the session
+is discarded."""
+MAX_SESSIONS: int = 16
+"""Maximum number of sessions kept at once. The least recently used session is discarded first."""
+CODE_CACHE_SIZE: int = 128
+"""Maximum number of compiled python snippets to cache."""
+_READ_SIZE: t.Final[int] = 4096
+_WRITE_CHUNK_SIZE: t.Final[int] = 65536
+_PAGE_PREFIX: t.Final[str] = "```diff\n"
+_PAGE_SUFFIX: t.Final[str] = "```"
+_PAGE_SIZE: t.Final[int] = 2000
+_PYTHON_VERSION: t.Final[str] = "Python " + sys.version.replace("\n", " ")
 
-async def execute_in_session(ctx: lightbulb.context.Context, program: str, code: str):
-    sout = io.StringIO()
-    serr = io.StringIO()
 
-    nl = "\n"
+class _OutputBuffer(io.TextIOBase):
+    # Bounded buffer holding the most recent output of a stream. Once the limit is
+    # exceeded the oldest output is discarded and a marker is added to the start of the output.
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self._limit = limit
+        self._chunks: t.Deque[str] = collections.deque()
+        self._size = 0
+        self._dropped = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
 
-    with contextlib.redirect_stdout(sout):
-        with contextlib.redirect_stderr(serr):
+    def writable(self) -> bool:
+        return True
 
-            start_time = float("nan")
-            try:
+    def write(self, text: str) -> int:
+        if not text:
+            return 0
+        self._chunks.append(text)
+        self._size += len(text)
+        while self._size > self._limit:
+            excess = self._size - self._limit
+            head = self._chunks[0]
+            if len(head) <= excess:
+                self._chunks.popleft()
+                self._size -= len(head)
+                self._dropped += len(head)
+            else:
+                self._chunks[0] = head[excess:]
+                self._size -= excess
+                self._dropped += excess
+        return len(text)
+
+    def feed(self, data: bytes) -> None:
+        self.write(self._decoder.decode(data))
+
+    def finish(self) -> None:
+        self.write(self._decoder.decode(b"", final=True))
+
+    def getvalue(self) -> str:
+        value = "".join(self._chunks)
+        if self._dropped:
+            return f"[... {self._dropped} characters truncated ...]\n{value}"
+        return value
+
+
+_executor: t.Optional[concurrent.futures.ThreadPoolExecutor] = None
+_execution_loop: contextvars.ContextVar[asyncio.AbstractEventLoop] = contextvars.ContextVar("_execution_loop")
+_stdout: contextvars.ContextVar[t.TextIO] = contextvars.ContextVar("_stdout")
+_stderr: contextvars.ContextVar[t.TextIO] = contextvars.ContextVar("_stderr")
+
+
+class _StreamProxy:
+    # Replacement for sys.stdout and sys.stderr which writes to the stream set in the given context
+    # variable if there is one, or the original stream otherwise. This means that output is only captured
+    # from the task (or thread) running the code, instead of from everything running in the process.
+    __slots__ = ("_var", "_original")
+
+    def __init__(self, var: contextvars.ContextVar[t.TextIO], original: t.TextIO) -> None:
+        self._var = var
+        self._original = original
+
+    def write(self, s: str) -> int:
+        return self._var.get(self._original).write(s)
+
+    def flush(self) -> None:
+        self._var.get(self._original).flush()
+
+    def __getattr__(self, item: str) -> t.Any:
+        return getattr(self._var.get(self._original), item)
+
+
+def _install_stream_proxies() -> None:
+    if not isinstance(sys.stdout, _StreamProxy):
+        sys.stdout = _StreamProxy(_stdout, sys.stdout)  # type: ignore[assignment]
+    if not isinstance(sys.stderr, _StreamProxy):
+        sys.stderr = _StreamProxy(_stderr, sys.stderr)  # type: ignore[assignment]
+
+
+def _uninstall_stream_proxies() -> None:
+    if isinstance(sys.stdout, _StreamProxy):
+        sys.stdout = sys.stdout._original
+    if isinstance(sys.stderr, _StreamProxy):
+        sys.stderr = sys.stderr._original
+
+
+_MISSING: t.Final[t.Any] = object()
+
+
+# Objects shared with the rest of the process, which are not counted towards the size of a session
+_UNSIZED_TYPES: t.Final[t.Tuple[type, ...]] = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+)
+_SIZE_WALK_LIMIT: t.Final[int] = 10_000
+_SIZE_SAMPLE: t.Final[int] = 100
+
+
+class _Session:
+    # Variables kept between executions by the same user in the same channel
+    __slots__ = ("namespace", "last_used", "lock", "filename")
+
+    def __init__(self, filename: str) -> None:
+        self.namespace: t.Dict[str, t.Any] = dict(globals())
+        self.last_used = time.monotonic()
+        # Executions in the same session share its variables, so they are run one at a time
+        self.lock = asyncio.Lock()
+        self.filename = filename
+
+    def exceeds_size(self, limit: int) -> bool:
+        # Walks the objects reachable from the session's variables, stopping as soon as the limit is exceeded.
+        # Only a sample of the items of large containers is visited, with their sizes scaled up to the size of
+        # the container, so that checking a large session doesn't block the event loop.
+        module_globals = globals()
+        stack = [
+            (value, 1.0)
+            for name, value in list(self.namespace.items())
+            if name not in ("ctx", "bot") and module_globals.get(name, _MISSING) is not value
+        ]
+        seen: t.Set[int] = set()
+        size = 0.0
+        while stack and len(seen) < _SIZE_WALK_LIMIT:
+            obj, weight = stack.pop()
+            if id(obj) in seen or isinstance(obj, _UNSIZED_TYPES):
+                continue
+            seen.add(id(obj))
+            size += sys.getsizeof(obj) * weight
+            if size > limit:
+                return True
+
+            children: t.List[t.Any]
+            if isinstance(obj, dict):
+                children = [*obj.keys(), *obj.values()]
+            elif isinstance(obj, (list, tuple, set, frozenset, collections.deque)):
+                children = list(obj)
+            else:
                 try:
-                    abstract_syntax_tree = ast.parse(code, filename=f"{ctx.guild_id}_{ctx.channel_id}.py")
+                    children = [object.__getattribute__(obj, "__dict__")]
+                except AttributeError:
+                    continue
+
+            if len(children) > _SIZE_SAMPLE:
+                step = len(children) / _SIZE_SAMPLE
+                children = [children[int(i * step)] for i in range(_SIZE_SAMPLE)]
+                weight *= step
+            stack.extend((child, weight) for child in children)
+        return False
+
+    def close(self) -> None:
+        # The source is only needed for tracebacks of code run in this session
+        linecache.cache.pop(self.filename, None)
+
+
+_sessions: t.OrderedDict[t.Tuple[int, int], _Session] = collections.OrderedDict()
+_code_cache: t.OrderedDict[t.Tuple[str, str, t.Optional[bool]], t.Tuple[types.CodeType, bool]] = (
+    collections.OrderedDict()
+)
+
+
+def _snippet_filename(ctx: lightbulb.context.Context) -> str:
+    return f"{ctx.guild_id}_{ctx.channel_id}_{ctx.author.id}.py"
+
+
+def _end_session(key: t.Tuple[int, int]) -> None:
+    session = _sessions.pop(key, None)
+    if session is not None:
+        session.close()
+
+
+def _get_session(ctx: lightbulb.context.Context) -> t.Optional[_Session]:
+    if not PERSISTENT_SESSIONS:
+        return None
+
+    now = time.monotonic()
+    for key in [k for k, v in _sessions.items() if now - v.last_used > SESSION_IDLE_TIMEOUT]:
+        _end_session(key)
+
+    key = (ctx.author.id, ctx.channel_id)
+    session = _sessions.get(key)
+    if session is None:
+        session = _sessions[key] = _Session(_snippet_filename(ctx))
+        while len(_sessions) > MAX_SESSIONS:
+            _end_session(next(iter(_sessions)))
+    _sessions.move_to_end(key)
+    session.last_used = now
+    return session
+
+
+_RESULT_NAME: t.Final[str] = "__filament_result__"
+_RETURN_NAME: t.Final[str] = "__filament_return__"
+
+
+class _Return(BaseException):
+    # Raised in place of a top-level return statement in an executed snippet. Derives from BaseException,
+    # like StopIteration, so that it is not caught by "except Exception" handlers in the snippet.
+    def __init__(self, value: t.Any) -> None:
+        super().__init__(value)
+        self.value = value
+
+
+class _SnippetTransformer(ast.NodeTransformer):
+    # Replaces top-level return statements so that they can be used outside of a function. Nested
+    # function and class bodies are left untouched as return statements in them are already valid.
+    def visit_Return(self, node: ast.Return) -> ast.AST:
+        call = ast.Call(
+            func=ast.Name(id=_RETURN_NAME, ctx=ast.Load()),
+            args=[node.value or ast.Constant(value=None)],
+            keywords=[],
+        )
+        return ast.copy_location(ast.Raise(exc=call, cause=None), node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.AST:
+        return node
+
+    visit_AsyncFunctionDef = visit_FunctionDef  # type: ignore[assignment]
+    visit_ClassDef = visit_FunctionDef  # type: ignore[assignment]
+    visit_Lambda = visit_FunctionDef  # type: ignore[assignment]
+
+
+def _compile_snippet(code: str, filename: str) -> t.Tuple[types.CodeType, bool]:
+    key = (code, filename, THREADED_EXECUTION)
+    cached = _code_cache.get(key)
+    if cached is not None:
+        _code_cache.move_to_end(key)
+        return cached
+
+    tree = ast.parse(code, filename=filename)
+    # Code that never awaits anything can be run in a thread so that it cannot block the event loop
+    if THREADED_EXECUTION is None:
+        threaded = not _uses_async(tree) and not _may_need_event_loop(tree)
+    else:
+        threaded = THREADED_EXECUTION and not _uses_async(tree)
+
+    tree = _SnippetTransformer().visit(tree)
+    # If the last statement is an expression then store its value so that it can be returned
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = tree.body[-1]
+        tree.body[-1] = ast.copy_location(
+            ast.Assign(targets=[ast.Name(id=_RESULT_NAME, ctx=ast.Store())], value=last.value), last
+        )
+    ast.fix_missing_locations(tree)
+
+    # The snippet is compiled as a module so that the variables it defines are stored directly in the
+    # session, and the positions from the original source are kept so that tracebacks match the input
+    compiled = _code_cache[key] = (compile(tree, filename, "exec", flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT), threaded)
+    while len(_code_cache) > CODE_CACHE_SIZE:
+        _code_cache.popitem(last=False)
+    return compiled
+
+
+def _print_snippet_traceback(ex: BaseException, filename: str) -> None:
+    # Skip the frames from this module so that the traceback starts at the executed code
+    tb = ex.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != filename:
+        tb = tb.tb_next
+    traceback.print_exception(type(ex), ex, tb)
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(MAX_EXECUTION_THREADS, thread_name_prefix="filament-exec")
+    return _executor
+
+
+def _uses_async(tree: ast.AST) -> bool:
+    # Checks for any async constructs that would be executed directly by the snippet. Function
+    # and class bodies are skipped as anything inside them does not run in the snippet's own scope.
+    stack = list(ast.iter_child_nodes(tree))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Await, ast.AsyncFor, ast.AsyncWith)):
+            return True
+        if isinstance(node, ast.comprehension) and node.is_async:
+            return True
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        stack.extend(ast.iter_child_nodes(node))
+    return False
+
+
+_EVENT_LOOP_NAMES: t.Final[t.FrozenSet[str]] = frozenset(("ctx", "bot", "asyncio"))
+
+
+def _may_need_event_loop(tree: ast.AST) -> bool:
+    # Code that uses the bot or asyncio directly may call something that needs a running event loop, so it is
+    # kept on the loop unless it uses block_on, which means that it was written to be run in a thread.
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+    return "block_on" not in names and not names.isdisjoint(_EVENT_LOOP_NAMES)
+
+
+def block_on(awaitable: t.Awaitable[t.Any]) -> t.Any:
+    """
+    Runs the given awaitable on the bot's event loop and waits for its result. Available to python code
+    run through the ``exec`` command which does not use ``await``, and is therefore run in a separate thread.
+
+    Args:
+        awaitable: The awaitable to run.
+
+    Returns:
+        Any: The result of the awaitable.
+
+    Example:
+
+        .. code-block:: python
+
+            # Run using the exec command
+            user = block_on(bot.rest.fetch_user(123))
+    """
+    loop = _execution_loop.get(None)
+    if loop is None:
+        raise RuntimeError("block_on can only be used by code running in an execution thread")
+
+    async def wrap() -> t.Any:
+        return await awaitable
+
+    return asyncio.run_coroutine_threadsafe(wrap(), loop).result()
+
+
+# Executions cancelled using the cancel button, as opposed to being cancelled because the command was cancelled
+_cancelled_executions: "weakref.WeakSet[asyncio.Future[t.Any]]" = weakref.WeakSet()
+
+
+class _ExecutionInterrupted(BaseException):
+    # Raised inside an execution thread to stop the code it is running once the execution has timed out or
+    # been cancelled. Derives from BaseException so that it is not caught by "except Exception" handlers.
+    pass
+
+
+def _set_async_exc(ident: int, exc: t.Optional[t.Type[BaseException]]) -> None:
+    # Only CPython allows an exception to be raised in another thread. Passing None clears a pending exception.
+    if hasattr(ctypes, "pythonapi"):
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(ident), ctypes.py_object(exc) if exc else None)
+
+
+class _ExecutionThread:
+    # Keeps track of the thread running a threaded execution so that the code can be interrupted. The
+    # exception is only raised while the executed code is running, so it can never reach the executor itself.
+    __slots__ = ("_lock", "_ident", "_interrupted")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ident: t.Optional[int] = None
+        self._interrupted = False
+
+    def run(self, func: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        with self._lock:
+            if self._interrupted:
+                raise _ExecutionInterrupted
+            self._ident = threading.get_ident()
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._ident = None
+                if self._interrupted:
+                    # The code may have finished before the exception was raised in it
+                    _set_async_exc(threading.get_ident(), None)
+
+    def interrupt(self) -> None:
+        with self._lock:
+            if self._interrupted:
+                return
+            self._interrupted = True
+            if self._ident is not None:
+                _set_async_exc(self._ident, _ExecutionInterrupted)
 
-                    node: list = abstract_syntax_tree.body
 
-                    if node and type(node[0]) is ast.Expr:
-                        code = f"return " + code.strip()
+class _ExecutionTimeout(Exception):
+    # Raised when an execution takes longer than TIMEOUT. asyncio.TimeoutError is not used, as it could
+    # not be told apart from a TimeoutError raised by the executed code.
+    pass
 
-                except Exception:
-                    pass
 
-                func = f"async def aexec(ctx, bot):\n{textwrap.indent(code, '    ')}"
+async def _run_with_timeout(coro: t.Awaitable[t.Any]) -> t.Any:
+    task = asyncio.ensure_future(coro)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=TIMEOUT)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        await asyncio.wait({task})
+        if not task.cancelled():
+            task.exception()
+        raise _ExecutionTimeout
+    return task.result()
 
-                start_time = time.monotonic()
-                exec(func, globals(), locals())
 
-                result = await locals()["aexec"](ctx, ctx.bot)
-                if hasattr(result, "__await__"):
-                    print(f"Returned awaitable {result}. Awaiting it.", file=sys.stderr)
-                    result = await result
-            except BaseException as ex:
-                traceback.print_exc()
-                result = type(ex)
-            finally:
-                exec_time = time.monotonic() - start_time
+def _cancelled_by_user() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task in _cancelled_executions
+
+
+async def execute_in_session(ctx: lightbulb.context.Context, program: str, code: str):
+    session = _get_session(ctx)
+    if session is None:
+        return await _execute_python(ctx, code, None)
+
+    async with session.lock:
+        return await _execute_python(ctx, code, session)
+
+
+async def _execute_python(ctx: lightbulb.context.Context, code: str, session: t.Optional[_Session]):
+    # Output is kept in bounded buffers so that code printing a lot can't use up all of the memory
+    sout = _OutputBuffer(OUTPUT_LIMIT)
+    serr = _OutputBuffer(OUTPUT_LIMIT)
+
+    # Output is captured using context variables rather than by redirecting sys.stdout so that
+    # output from other tasks is not captured, and concurrent executions don't interfere with each other
+    _install_stream_proxies()
+    sout_token = _stdout.set(sout)
+    serr_token = _stderr.set(serr)
+
+    start_time = float("nan")
+    namespace = session.namespace if session is not None else dict(globals())
+    filename = _snippet_filename(ctx)
+    # Make the source available to the traceback module so that it can display the lines that errors occurred on
+    source = linecache.cache[filename] = (len(code), None, code.splitlines(True), filename)
+    try:
+        code_obj, threaded = _compile_snippet(code, filename)
+        namespace.update({"ctx": ctx, "bot": ctx.bot, _RETURN_NAME: _Return})
+
+        async def run() -> t.Any:
+            try:
+                if threaded:
+                    _execution_loop.set(asyncio.get_running_loop())
+                    thread = _ExecutionThread()
+                    call = functools.partial(contextvars.copy_context().run, thread.run, eval, code_obj, namespace)
+                    try:
+                        await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+                    except asyncio.CancelledError:
+                        # Cancelling the future does not stop the thread, so the code has to be interrupted as well
+                        thread.interrupt()
+                        raise
+                else:
+                    # Evaluating code compiled with top-level await returns a coroutine if the code awaits anything
+                    maybe_coro = eval(code_obj, namespace)
+                    if maybe_coro is not None:
+                        await maybe_coro
+                result_ = namespace.pop(_RESULT_NAME, None)
+            except _Return as ret:
+                result_ = ret.value
+
+            if hasattr(result_, "__await__"):
+                print(f"Returned awaitable {result_}. Awaiting it.", file=sys.stderr)
+                result_ = await result_
+            return result_
+
+        start_time = time.monotonic()
+        result = await _run_with_timeout(run())
+    except _ExecutionTimeout:
+        print(f"Execution timed out after {TIMEOUT}s.", file=sys.stderr)
+        result = asyncio.TimeoutError
+    except asyncio.CancelledError:
+        if not _cancelled_by_user():
+            raise
+        print("Execution cancelled.", file=sys.stderr)
+        result = asyncio.CancelledError
+    except BaseException as ex:
+        _print_snippet_traceback(ex, filename)
+        result = type(ex)
+    finally:
+        namespace.pop(_RESULT_NAME, None)
+        exec_time = time.monotonic() - start_time
+        if session is None:
+            if linecache.cache.get(filename) is source:
+                del linecache.cache[filename]
+        elif session.exceeds_size(SESSION_MEMORY_LIMIT):
+            print("Session exceeded the memory limit and has been reset.", file=sys.stderr)
+            if _sessions.get((ctx.author.id, ctx.channel_id)) is session:
+                _end_session((ctx.author.id, ctx.channel_id))
+        _stdout.reset(sout_token)
+        _stderr.reset(serr_token)
 
     return (
         sout.getvalue(),
         serr.getvalue(),
         result,
         exec_time,
-        f'Python {sys.version.replace(nl, " ")}',
+        _PYTHON_VERSION,
     )
 
 
-async def execute_in_shell(_: lightbulb.context.Context, program: str, code: str):
+async def _write_stdin(stream: asyncio.StreamWriter, data: bytes) -> None:
+    try:
+        stream.write(data)
+        await stream.drain()
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    finally:
+        stream.close()
+
+
+async def _read_stream(
+    stream: asyncio.StreamReader,
+    buffer: _OutputBuffer,
+    on_output: t.Optional[t.Callable[[], None]],
+) -> None:
+    while True:
+        chunk = await stream.read(_READ_SIZE)
+        if not chunk:
+            break
+        buffer.feed(chunk)
+        if on_output is not None:
+            on_output()
+    buffer.finish()
+
+
+def _set_resource_limits() -> None:
+    # Runs in the child process before the shell is executed
+    if CPU_TIME_LIMIT is not None:
+        resource.setrlimit(resource.RLIMIT_CPU, (CPU_TIME_LIMIT, CPU_TIME_LIMIT))
+    if MEMORY_LIMIT is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (MEMORY_LIMIT, MEMORY_LIMIT))
+
+
+def _subprocess_kwargs() -> t.Dict[str, t.Any]:
+    if os.name == "nt":
+        return {}
+    # Start the shell in a new session so that it and any children it creates can be killed together
+    kwargs: t.Dict[str, t.Any] = {"start_new_session": True}
+    if resource is not None and (CPU_TIME_LIMIT is not None or MEMORY_LIMIT is not None):
+        kwargs["preexec_fn"] = _set_resource_limits
+    return kwargs
+
+
+def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def execute_in_shell(
+    _: lightbulb.context.Context,
+    program: str,
+    code: str,
+    *,
+    on_output: t.Optional[t.Callable[[_OutputBuffer, _OutputBuffer], None]] = None,
+    output_limit: t.Optional[int] = None,
+):
     path = shutil.which(program)
     if not path:
         return "", f"{program} not found.", 127, 0.0, ""
@@ -108,35 +666,430 @@ async def execute_in_shell(_: lightbulb.context.Context, program: str, code: str
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
         stdin=asyncio.subprocess.PIPE,
+        **_subprocess_kwargs(),
     )
 
-    sout, serr = await process.communicate(bytes(code, "utf-8"))
-    exec_time = time.monotonic() - start_time
+    # Read the output incrementally into bounded buffers instead of using communicate() so
+    # that memory usage stays bounded and the output can be displayed while the process runs
+    limit = OUTPUT_LIMIT if output_limit is None else output_limit
+    sout_buf, serr_buf = _OutputBuffer(limit), _OutputBuffer(limit)
+    notify = (lambda: on_output(sout_buf, serr_buf)) if on_output is not None else None
 
-    exit_code = process.returncode
+    async def communicate() -> int:
+        await asyncio.gather(
+            _write_stdin(process.stdin, bytes(code, "utf-8")),
+            _read_stream(process.stdout, sout_buf, notify),
+            _read_stream(process.stderr, serr_buf, notify),
+        )
+        return await process.wait()
 
-    sout = sout.decode()
-    serr = serr.decode()
+    status = ""
+    try:
+        exit_code = await _run_with_timeout(communicate())
+    except (_ExecutionTimeout, asyncio.CancelledError) as ex:
+        # Kill the whole process group so that no children of the shell are left running
+        _kill_process_group(process)
+        exit_code = await process.wait()
+        if isinstance(ex, asyncio.CancelledError) and not _cancelled_by_user():
+            raise
+        status = f" (timed out after {TIMEOUT}s)" if isinstance(ex, _ExecutionTimeout) else " (cancelled)"
+    exec_time = time.monotonic() - start_time
 
-    return sout, serr, str(exit_code), exec_time, path
+    return sout_buf.getvalue(), serr_buf.getvalue(), f"{exit_code}{status}", exec_time, path
 
 
-def _paginate_output(pag_, sout, serr, result, exec_time, prog):
-    pag_.add_line(f"---- {prog} ----")
+def _render_output(sout: str, serr: str, status: str, prog: str) -> t.List[str]:
+    # The parts are kept separate rather than joined, so that the output is not copied. Tabs and carriage
+    # returns are replaced as each line is added to a page, or as each chunk is written to a file.
+    parts = [f"---- {prog} ----"]
     if sout:
-        pag_.add_line("- /dev/stdout:")
-        pag_.add_line(sout)
+        parts.extend(["- /dev/stdout:", sout])
     if serr:
-        pag_.add_line("- /dev/stderr:")
-        pag_.add_line(serr)
-    pag_.add_line(f"+ Returned {result} in approx {(exec_time * 1000):.2f}ms")
+        parts.extend(["- /dev/stderr:", serr])
+    parts.append(status)
+    return parts
+
+
+def _result_status(result: t.Any, exec_time: float) -> str:
+    return f"+ Returned {result} in approx {(exec_time * 1000):.2f}ms"
+
+
+class _PageBuilder:
+    # Splits lines into pages in exactly the same way as lightbulb's StringPaginator does when it is
+    # only limited by characters. The state is kept here so that finished pages can be read while
+    # lines are still being added, which the paginator itself does not allow.
+    __slots__ = ("_max_chars", "_current", "_started", "pages")
+
+    def __init__(self) -> None:
+        self._max_chars = _PAGE_SIZE - len(_PAGE_PREFIX) - len(_PAGE_SUFFIX)
+        self._current: t.List[str] = []
+        self._started = False
+        self.pages: t.List[str] = []
+
+    def add_line(self, line: str) -> None:
+        for part in line.replace("\t", " " * 4).replace("\r", "").split("\n"):
+            self._add_one_line(part)
+
+    def _add_one_line(self, line: str) -> None:
+        self._started = True
+        if len(line) > self._max_chars:
+            self._chunk_add(line)
+            return
+
+        if self._max_chars - sum(map(len, self._current)) < len(line):
+            self.new_page()
+            self._add_one_line(line)
+            return
+
+        self._current.append(line + "\n")
+
+    def _chunk_add(self, line: str) -> None:
+        wrapper = textwrap.TextWrapper(width=self._max_chars, expand_tabs=True, tabsize=4)
+        for wrapped in wrapper.wrap(line):
+            if len(wrapped) > self._max_chars - 1:
+                for i in range(0, len(wrapped), self._max_chars):
+                    self.add_line(wrapped[i : i + self._max_chars])
+            else:
+                self.add_line(wrapped)
+
+    def new_page(self) -> None:
+        content = "".join(self._current)
+        if content.endswith("\n"):
+            content = content[:-1]
+        self.pages.append(f"{_PAGE_PREFIX}{content}{_PAGE_SUFFIX}")
+        self._current.clear()
+        self._started = False
+
+    def finish(self) -> None:
+        if self._started:
+            self.new_page()
+
+
+class _OutputPages(t.Sequence[str]):
+    # Page source for the navigator that builds pages from the output text as they are requested, instead
+    # of building every page up front. If the output needs more than the given number of pages, the last
+    # page is replaced with a notice.
+    __slots__ = ("_parts", "_limit", "_notice", "_builder", "_lines", "_complete")
+
+    def __init__(self, parts: t.Sequence[str], limit: int, notice: str) -> None:
+        self._parts = parts
+        self._limit = max(limit, 1)
+        self._notice = notice
+        self._builder = _PageBuilder()
+        self._lines = _iter_lines(parts)
+        self._complete = False
+
+    def _find_pages(self, count: int) -> None:
+        # A page is only finished once a line does not fit on it, so finished pages never change
+        while len(self._builder.pages) < count and not self._complete:
+            line = next(self._lines, None)
+            if line is None:
+                self._complete = True
+                self._builder.finish()
+            else:
+                self._builder.add_line(line)
+
+    @property
+    def overflowed(self) -> bool:
+        self._find_pages(self._limit + 1)
+        return len(self._builder.pages) > self._limit
+
+    @property
+    def parts(self) -> t.Sequence[str]:
+        return self._parts
+
+    def __len__(self) -> int:
+        self._find_pages(self._limit + 1)
+        return max(min(len(self._builder.pages), self._limit), 1)
+
+    @t.overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.Sequence[str]:
+        ...
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Union[str, t.Sequence[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("page index out of range")
+
+        if index == self._limit - 1 and self.overflowed:
+            status = self._parts[-1][self._parts[-1].rfind("\n") + 1 :]
+            return f"{_PAGE_PREFIX}{self._notice}\n{status}{_PAGE_SUFFIX}"
+        if not self._builder.pages:
+            return f"{_PAGE_PREFIX}{_PAGE_SUFFIX}"
+        return self._builder.pages[index]
+
+
+def _iter_lines(parts: t.Iterable[str]) -> t.Iterator[str]:
+    for text in parts:
+        start = 0
+        while (end := text.find("\n", start)) != -1:
+            yield text[start:end]
+            start = end + 1
+        yield text[start:]
+
+
+def _write_temp_file(parts: t.Sequence[str]) -> str:
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".txt", delete=False) as fp:
+        for i, text in enumerate(parts):
+            if i:
+                fp.write("\n")
+            # Written in chunks so that only a small part of the output is copied at a time
+            for start in range(0, len(text), _WRITE_CHUNK_SIZE):
+                fp.write(text[start : start + _WRITE_CHUNK_SIZE].replace("\t", " " * 4).replace("\r", ""))
+        return fp.name
+
+
+async def _cancel_execution(nav_: "_LiveNavigator", _: hikari.Event) -> None:
+    if nav_._execution is not None:
+        _cancelled_executions.add(nav_._execution)
+        nav_._execution.cancel()
+
+
+async def _stop_navigation(nav_: "_LiveNavigator", _: hikari.Event) -> None:
+    await nav_.stop()
+
+
+class _LiveNavigator:
+    # Button navigator whose pages are replaced with the output produced so far while an execution is
+    # running. Message edits are throttled to at most one per LIVE_UPDATE_INTERVAL seconds. While the
+    # execution is running an additional button is displayed that allows it to be cancelled. Behaves like
+    # lightbulb's ButtonNavigator, but keeps track of its own message and timeout so that the listener can
+    # always be removed, even if the execution fails.
+    __slots__ = (
+        "pages",
+        "buttons",
+        "current_page_index",
+        "_timeout",
+        "_prog",
+        "_start_time",
+        "_buffers",
+        "_dirty",
+        "_updater",
+        "_execution",
+        "_context",
+        "_message",
+        "_timeout_task",
+        "_subscribed",
+    )
+
+    def __init__(self, prog: str, *, timeout: float = 120) -> None:
+        self._prog = prog
+        self._timeout = timeout
+        self._start_time = time.monotonic()
+        self._buffers: t.Optional[t.Tuple[_OutputBuffer, _OutputBuffer]] = None
+        self._dirty = asyncio.Event()
+        self._updater: t.Optional[asyncio.Task[None]] = None
+        self._execution: t.Optional[asyncio.Future[t.Any]] = None
+        self._context: t.Optional[lightbulb.context.Context] = None
+        self._message: t.Optional[hikari.Message] = None
+        self._timeout_task: t.Optional[asyncio.Task[None]] = None
+        self._subscribed = False
+        self.current_page_index = 0
+        self.pages: t.Sequence[str] = self._running_pages("", "")
+        self.buttons: t.Sequence[nav.ComponentButton] = [
+            *self._default_buttons(),
+            nav.ComponentButton("Cancel", False, hikari.ButtonStyle.DANGER, "cancel_exec", _cancel_execution),
+        ]
+
+    @staticmethod
+    def _default_buttons() -> t.List[nav.ComponentButton]:
+        return [
+            nav.ComponentButton(
+                "\N{BLACK LEFT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\N{VARIATION SELECTOR-16}",
+                True,
+                hikari.ButtonStyle.PRIMARY,
+                "first_page",
+                nav.first_page,
+            ),
+            nav.ComponentButton(
+                "\N{BLACK LEFT-POINTING TRIANGLE}\N{VARIATION SELECTOR-16}",
+                True,
+                hikari.ButtonStyle.PRIMARY,
+                "prev_page",
+                nav.prev_page,
+            ),
+            nav.ComponentButton(
+                "\N{HEAVY MULTIPLICATION X}\N{VARIATION SELECTOR-16}",
+                True,
+                hikari.ButtonStyle.DANGER,
+                "stop",
+                _stop_navigation,
+            ),
+            nav.ComponentButton(
+                "\N{BLACK RIGHT-POINTING TRIANGLE}\N{VARIATION SELECTOR-16}",
+                True,
+                hikari.ButtonStyle.PRIMARY,
+                "next_page",
+                nav.next_page,
+            ),
+            nav.ComponentButton(
+                "\N{BLACK RIGHT-POINTING DOUBLE TRIANGLE WITH VERTICAL BAR}\N{VARIATION SELECTOR-16}",
+                True,
+                hikari.ButtonStyle.PRIMARY,
+                "last_page",
+                nav.last_page,
+            ),
+        ]
+
+    def _running_pages(self, sout: str, serr: str) -> _OutputPages:
+        status = f"+ Running for approx {((time.monotonic() - self._start_time) * 1000):.2f}ms"
+        return _OutputPages(
+            _render_output(sout, serr, status, self._prog),
+            PAGE_LIMIT,
+            "- Output truncated, the full output will be attached once finished.",
+        )
+
+    def _build_buttons(self, disabled: bool = False) -> hikari.api.MessageActionRowBuilder:
+        assert self._context is not None
+        row = self._context.app.rest.build_message_action_row()
+        for button in self.buttons:
+            button.build(row, disabled)
+        return row
+
+    async def _process_interaction_create(self, event: hikari.InteractionCreateEvent) -> None:
+        if not isinstance(event.interaction, hikari.ComponentInteraction) or self._message is None:
+            return
+
+        assert self._context is not None
+        if event.interaction.message.id != self._message.id or event.interaction.user.id != self._context.author.id:
+            return
+
+        for button in self.buttons:
+            if button.is_pressed(event):
+                await button.press(self, event)  # type: ignore[arg-type]
+                if self._message is not None:
+                    page, row = self.pages[self.current_page_index], self._build_buttons()
+                    try:
+                        await event.interaction.create_initial_response(
+                            hikari.ResponseType.MESSAGE_UPDATE, page, component=row
+                        )
+                    except hikari.NotFoundError:
+                        await event.interaction.edit_initial_response(page, component=row)
+                break
+
+    def _unsubscribe(self) -> None:
+        if self._subscribed:
+            assert self._context is not None
+            self._context.app.unsubscribe(hikari.InteractionCreateEvent, self._process_interaction_create)
+            self._subscribed = False
+
+    async def _timeout_coro(self) -> None:
+        await asyncio.sleep(self._timeout)
+        self._unsubscribe()
+        if self._message is not None:
+            try:
+                await self._message.edit(component=self._build_buttons(True))
+            except hikari.NotFoundError:
+                pass
+
+    async def stop(self) -> None:
+        if self._timeout_task is not None:
+            self._timeout_task.cancel()
+        self._unsubscribe()
+        if self._message is not None:
+            message, self._message = self._message, None
+            await message.delete()
+
+    async def run(self, context: lightbulb.context.Context) -> None:
+        self._context = context
+        context.app.subscribe(hikari.InteractionCreateEvent, self._process_interaction_create)
+        self._subscribed = True
+        try:
+            resp = await context.respond(self.pages[self.current_page_index], component=self._build_buttons())
+            self._message = await resp.message()
+        except BaseException:
+            self._unsubscribe()
+            raise
+        self._updater = asyncio.create_task(self._update_loop())
+
+    async def execute(self, coro: t.Awaitable[t.Tuple[str, str, t.Any, float, str]]) -> None:
+        self._execution = asyncio.ensure_future(coro)
+        try:
+            sout, serr, result, exec_time, prog = await self._execution
+        except BaseException:
+            # Nothing more will be displayed, so the buttons should stop responding straight away
+            self._unsubscribe()
+            raise
+        finally:
+            self._execution = None
+            await self._stop_updater()
+
+        # The navigator should only time out once the execution has finished
+        self._timeout_task = asyncio.create_task(self._timeout_coro())
+        self.buttons = self._default_buttons()
+        pages = _OutputPages(
+            _render_output(sout, serr, _result_status(result, exec_time), prog),
+            PAGE_LIMIT,
+            "- Output truncated, the full output has been attached as a file.",
+        )
+        await self._set_pages(pages)
+
+        if pages.overflowed:
+            await self._send_as_file(pages.parts)
+
+    async def _stop_updater(self) -> None:
+        if self._updater is None:
+            return
+        updater, self._updater = self._updater, None
+        updater.cancel()
+        # Waiting on the task rather than awaiting it means that a cancellation of the current task is not swallowed
+        await asyncio.wait({updater})
+        if not updater.cancelled() and updater.exception() is not None:
+            _LOGGER.error("Failed to update the output of an execution", exc_info=updater.exception())
+
+    async def _send_as_file(self, parts: t.Sequence[str]) -> None:
+        assert self._context is not None
+        # Write the output to disk in a thread so that large outputs don't block the event loop
+        path = await asyncio.get_running_loop().run_in_executor(None, _write_temp_file, parts)
+        try:
+            await self._context.respond(attachment=hikari.File(path, filename="output.txt"))
+        finally:
+            os.remove(path)
+
+    def on_output(self, sout: _OutputBuffer, serr: _OutputBuffer) -> None:
+        self._buffers = (sout, serr)
+        self._dirty.set()
+
+    async def _set_pages(self, pages: t.Sequence[str]) -> None:
+        on_last_page = self.current_page_index >= len(self.pages) - 1
+        self.pages = pages
+        if on_last_page or self.current_page_index >= len(self.pages):
+            self.current_page_index = len(self.pages) - 1
+        if self._message is not None:
+            await self._message.edit(self.pages[self.current_page_index], component=self._build_buttons())
+
+    async def _update_loop(self) -> None:
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            assert self._buffers is not None
+            await self._set_pages(self._running_pages(self._buffers[0].getvalue(), self._buffers[1].getvalue()))
+            await asyncio.sleep(LIVE_UPDATE_INTERVAL)
 
 
 @lightbulb.add_checks(lightbulb.owner_only)
+@lightbulb.set_help(docstring=True)
 @lightbulb.option("code", "Code to evaluate", modifier=commands.OptionModifier.CONSUME_REST)
 @lightbulb.command("exec", "Evaluates the given python or shell code", aliases=["eval", "shell", "sh"])
 @lightbulb.implements(commands.PrefixCommand)
 async def execute(ctx: lightbulb.context.Context):
+    """
+    Runs the given python or shell code and displays its output. The code can be stopped using the cancel
+    button, and is stopped automatically once it has been running for longer than the configured timeout.
+
+    Python code running in a thread is interrupted between python instructions, so a call into a blocking
+    function such as time.sleep is only stopped once it returns. Python code running on the event loop can only
+    be stopped while it is awaiting something - code that blocks the loop runs until it finishes.
+    """
     code = ctx.options.code
 
     if code.startswith("```"):
@@ -148,13 +1101,14 @@ async def execute(ctx: lightbulb.context.Context):
         else:
             lang = "python"
 
-    executor = execute_in_session if lang == "python" else execute_in_shell
-    sout, serr, result, exec_time, prog = await executor(ctx, lang, code)
-
-    pag_ = pag.StringPaginator(prefix="```diff\n", suffix="```")
-    _paginate_output(pag_, sout, serr, result, exec_time, prog)
-    nav_ = nav.ButtonNavigator(pag_.build_pages())
-    await nav_.run(ctx)
+    if lang == "python":
+        live = _LiveNavigator(_PYTHON_VERSION)
+        await live.run(ctx)
+        await live.execute(execute_in_session(ctx, lang, code))
+    else:
+        live = _LiveNavigator(shutil.which(lang) or lang)
+        await live.run(ctx)
+        await live.execute(execute_in_shell(ctx, lang, code, on_output=live.on_output))
 
 
 def load(bot: lightbulb.BotApp):
@@ -162,4 +1116,13 @@ def load(bot: lightbulb.BotApp):
 
 
 def unload(bot: lightbulb.BotApp):
+    global _executor
     bot.remove_command(bot.get_prefix_command("exec"))
+    _uninstall_stream_proxies()
+    for key in list(_sessions):
+        _end_session(key)
+    _code_cache.clear()
+    if _executor is not None:
+        # Threads that are still running cannot be interrupted, so don't wait for them to finish
+        _executor.shutdown(wait=False)
+        _executor = None
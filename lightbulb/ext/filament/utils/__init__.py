@@ -15,14 +15,38 @@
 #
 # You should have received a copy of the GNU Lesser General Public License
 # along with Filament. If not, see <https://www.gnu.org/licenses/>.
-from . import misc
-from . import shorthand
-from .misc import *
-from .shorthand import *
+# Submodules are imported the first time one of their names is accessed, see filament._lazy
+import typing as t
+
+from .. import _lazy
+
+if t.TYPE_CHECKING:
+    from . import cache
+    from . import misc
+    from . import shorthand
+    from .cache import *
+    from .misc import *
+    from .shorthand import *
 
 __all__ = [
+    "cached_response",
+    "ResponseCache",
+    "CacheStats",
     "pass_options",
     "prefix_command",
     "slash_command",
     "prefix_slash_command",
 ]
+
+_SUBMODULES = ["cache", "misc", "shorthand"]
+_EXPORTS = {
+    "cached_response": "cache",
+    "ResponseCache": "cache",
+    "CacheStats": "cache",
+    "pass_options": "misc",
+    "prefix_command": "shorthand",
+    "slash_command": "shorthand",
+    "prefix_slash_command": "shorthand",
+}
+
+__getattr__, __dir__ = _lazy.attach(__name__, _SUBMODULES, _EXPORTS)
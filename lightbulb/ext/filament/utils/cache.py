@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+from __future__ import annotations
+
+__all__ = ["cached_response", "ResponseCache", "CacheStats"]
+
+import asyncio
+import collections
+import functools
+import inspect
+import time
+import typing as t
+
+from lightbulb import context
+
+from ..commands.spec import _hashable
+
+_CallbackT = t.Callable[..., t.Coroutine[t.Any, t.Any, None]]
+_RecordedT = t.List[t.Tuple[t.Tuple[t.Any, ...], t.Dict[str, t.Any]]]
+
+_SCOPES: t.Dict[str, t.Callable[[context.Context], t.Hashable]] = {
+    "user": lambda ctx: ctx.author.id,
+    "channel": lambda ctx: ctx.channel_id,
+    # Invocations in DMs have no guild, so are cached separately for each DM channel instead
+    "guild": lambda ctx: ctx.guild_id if ctx.guild_id is not None else ctx.channel_id,
+}
+
+
+class CacheStats:
+    """
+    Statistics for a :obj:`~ResponseCache`.
+    """
+
+    __slots__ = ("hits", "misses", "coalesced", "evictions")
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        """The number of invocations that were responded to from the cache."""
+        self.misses: int = 0
+        """The number of invocations that ran the callback."""
+        self.coalesced: int = 0
+        """
+        The number of invocations that waited for an identical invocation which was already running, instead of
+        running the callback themselves. These are also counted as hits.
+        """
+        self.evictions: int = 0
+        """The number of cached responses removed to make space for new responses."""
+
+    @property
+    def hit_rate(self) -> float:
+        """The proportion of invocations that were responded to from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"CacheStats(hits={self.hits}, misses={self.misses}, coalesced={self.coalesced}, "
+            f"evictions={self.evictions})"
+        )
+
+
+class _RecordingContext:
+    # Proxy for the context passed to a cached callback which records the calls made to respond
+    __slots__ = ("_context", "_calls")
+
+    def __init__(self, context_: context.Context) -> None:
+        object.__setattr__(self, "_context", context_)
+        object.__setattr__(self, "_calls", [])
+
+    @property  # type: ignore[misc]
+    def __class__(self) -> t.Type[t.Any]:
+        # Allows isinstance checks against the context type to still pass
+        return type(self._context)
+
+    async def respond(self, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        self._calls.append((args, kwargs))
+        return await self._context.respond(*args, **kwargs)
+
+    def __getattr__(self, item: str) -> t.Any:
+        return getattr(self._context, item)
+
+    def __setattr__(self, key: str, value: t.Any) -> None:
+        setattr(self._context, key, value)
+
+
+class ResponseCache:
+    """
+    Cache of the responses created by a command callback, created by :obj:`~cached_response`. The cache
+    for a decorated callback can be accessed through its ``cache`` attribute.
+
+    Args:
+        ttl (:obj:`float`): The number of seconds that responses are cached for.
+        maxsize (:obj:`int`): The maximum number of responses to cache. The least recently used response is
+            removed when the cache is full.
+        scope (Optional[:obj:`str`]): One of ``user``, ``channel`` or ``guild`` to cache responses separately
+            for each user, channel or guild, or ``None`` to share responses between all invocations. With the
+            ``guild`` scope, responses in DMs are cached separately for each DM channel.
+
+    Raises:
+        :obj:`ValueError`: If ``ttl`` or ``maxsize`` is not greater than ``0``, or ``scope`` is not valid.
+    """
+
+    __slots__ = ("ttl", "maxsize", "scope", "stats", "_entries", "_inflight")
+
+    def __init__(self, ttl: float, maxsize: int, scope: t.Optional[str]) -> None:
+        if scope is not None and scope not in _SCOPES:
+            raise ValueError(f"Invalid cache scope {scope!r} - must be one of {', '.join(_SCOPES)} or None")
+        if ttl <= 0 or maxsize <= 0:
+            raise ValueError("ttl and maxsize must both be greater than 0")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.scope = scope
+        self.stats = CacheStats()
+        """The statistics for this cache."""
+        self._entries: t.OrderedDict[t.Hashable, t.Tuple[float, _RecordedT]] = collections.OrderedDict()
+        self._inflight: t.Dict[t.Hashable, asyncio.Future[_RecordedT]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key_for(self, context_: context.Context) -> t.Hashable:
+        """
+        Gets the key that the response for the given context is cached under.
+
+        Args:
+            context_ (:obj:`lightbulb.context.base.Context`): The context to get the key for.
+
+        Returns:
+            Hashable: The cache key.
+        """
+        invoked = context_.invoked
+        name = invoked.qualname if invoked is not None else context_.command.name
+        options = tuple(sorted((k, _hashable(v)) for k, v in context_.raw_options.items()))
+        scope = _SCOPES[self.scope](context_) if self.scope is not None else None
+        return name, options, scope
+
+    def clear(self) -> None:
+        """
+        Removes all the cached responses.
+
+        Returns:
+            ``None``
+        """
+        self._entries.clear()
+
+    def invalidate(self, context_: context.Context) -> None:
+        """
+        Removes the cached response for the given context, if there is one.
+
+        Args:
+            context_ (:obj:`lightbulb.context.base.Context`): The context to remove the cached response for.
+
+        Returns:
+            ``None``
+        """
+        self._entries.pop(self.key_for(context_), None)
+
+    def _get(self, key: t.Hashable) -> t.Optional[_RecordedT]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put(self, key: t.Hashable, calls: _RecordedT) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, calls)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    @staticmethod
+    async def _replay(context_: context.Context, calls: _RecordedT) -> None:
+        for args, kwargs in calls:
+            await context_.respond(*args, **kwargs)
+
+    async def invoke(
+        self, callback: _CallbackT, context_: context.Context, args: t.Tuple[t.Any, ...], kwargs: t.Dict[str, t.Any]
+    ) -> None:
+        """
+        Responds to the given context from the cache if possible, otherwise invokes the callback and caches the
+        responses that it creates.
+
+        Args:
+            callback: The callback to invoke on a cache miss.
+            context_ (:obj:`lightbulb.context.base.Context`): The context the command was invoked under.
+            args: The positional arguments to pass to the callback, including the context.
+            kwargs: The keyword arguments to pass to the callback.
+
+        Returns:
+            ``None``
+        """
+        key = self.key_for(context_)
+        if (calls := self._get(key)) is not None:
+            self.stats.hits += 1
+            return await self._replay(context_, calls)
+
+        if (pending := self._inflight.get(key)) is not None:
+            try:
+                calls = await asyncio.shield(pending)
+            except Exception:
+                # The invocation we were waiting for failed, so run the callback for this invocation instead
+                pass
+            else:
+                self.stats.hits += 1
+                self.stats.coalesced += 1
+                return await self._replay(context_, calls)
+
+        self.stats.misses += 1
+        future: asyncio.Future[_RecordedT] = asyncio.get_running_loop().create_future()
+        self._inflight.setdefault(key, future)
+        recorder = _RecordingContext(context_)
+        try:
+            await callback(*(recorder if a is context_ else a for a in args), **kwargs)
+        except BaseException as ex:
+            # Waiters only retry on Exception, so don't propagate cancellation of this invocation to them
+            future.set_exception(ex if isinstance(ex, Exception) else RuntimeError("Invocation was cancelled"))
+            # Mark the exception as retrieved so it is not logged if there were no waiters
+            future.exception()
+            raise
+        else:
+            self._put(key, recorder._calls)
+            future.set_result(recorder._calls)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+@t.overload
+def cached_response(func: _CallbackT) -> _CallbackT:
+    ...
+
+
+@t.overload
+def cached_response(
+    *, ttl: float = 60.0, maxsize: int = 128, scope: t.Optional[str] = None
+) -> t.Callable[[_CallbackT], _CallbackT]:
+    ...
+
+
+def cached_response(
+    func: t.Optional[_CallbackT] = None, *, ttl: float = 60.0, maxsize: int = 128, scope: t.Optional[str] = None
+) -> t.Union[_CallbackT, t.Callable[[_CallbackT], _CallbackT]]:
+    """
+    First or second order decorator that caches the responses created by a command callback. Responses are cached
+    using the name of the invoked command and the values of its options, so invoking the command again with the same
+    options responds with the cached responses instead of running the callback. If an identical invocation is
+    already running then the new invocation waits for it to complete and reuses its responses.
+
+    Only calls to the context's ``respond`` method are cached. The callback should not have any side effects, or
+    edit or delete the responses it creates.
+
+    This decorator can be used on functional command callbacks, where it **must** be below all other command
+    decorators, or on the ``callback`` method of a :obj:`filament.commands.impl.CommandLike` subclass.
+
+    Args:
+        func: The command callback to decorate.
+
+    Keyword Args:
+        ttl (:obj:`float`): The number of seconds that responses are cached for. Defaults to ``60``.
+        maxsize (:obj:`int`): The maximum number of responses to cache. Defaults to ``128``.
+        scope (Optional[:obj:`str`]): One of ``user``, ``channel`` or ``guild`` to cache responses separately
+            for each user, channel or guild. Defaults to ``None``, sharing responses between all invocations.
+
+    Raises:
+        :obj:`ValueError`: If ``ttl`` or ``maxsize`` is not greater than ``0``, or ``scope`` is not valid.
+
+    Example:
+
+        .. code-block:: python
+
+            @filament.utils.slash_command("leaderboard", "Shows the leaderboard")
+            @filament.utils.cached_response(ttl=30, scope="guild")
+            async def leaderboard(ctx):
+                ...
+
+            class Stats(filament.CommandLike):
+                ...
+
+                @filament.utils.cached_response(ttl=30)
+                async def callback(self, ctx):
+                    ...
+
+            # Hit and miss statistics
+            print(leaderboard.callback.cache.stats)
+    """
+
+    def decorate(func_: _CallbackT) -> _CallbackT:
+        cache = ResponseCache(ttl, maxsize, scope)
+        params = list(inspect.signature(func_).parameters)
+        # The context is the second argument if decorating the callback method of a CommandLike
+        context_index = 1 if params and params[0] == "self" else 0
+
+        @functools.wraps(func_)
+        async def cached(*args: t.Any, **kwargs: t.Any) -> None:
+            await cache.invoke(func_, args[context_index], args, kwargs)
+
+        setattr(cached, "cache", cache)
+        return cached
+
+    if func is not None:
+        return decorate(func)
+    return decorate
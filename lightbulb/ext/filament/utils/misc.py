@@ -19,30 +19,189 @@ from __future__ import annotations
 
 __all__ = ["pass_options"]
 
+import functools
+import inspect
+import typing as t
+
+from lightbulb import commands
 from lightbulb import context
 
+_CallbackT = t.Callable[..., t.Coroutine[t.Any, t.Any, None]]
+_TargetT = t.TypeVar("_TargetT", _CallbackT, commands.CommandLike)
+_MISSING: t.Final[t.Any] = object()
+
+
+class _OptionsAdapter:
+    # Maps the context's options to the arguments of a callback decorated with pass_options. The callback's
+    # signature is inspected once when the adapter is created so that each invocation only has to look up
+    # the options the callback declares.
+    def __init__(self, func: _CallbackT, rename: t.Mapping[str, str]) -> None:
+        self._func = func
+        self._validated = False
+
+        params = list(inspect.signature(func).parameters.values())
+        if not params or params[0].kind not in (params[0].POSITIONAL_ONLY, params[0].POSITIONAL_OR_KEYWORD):
+            raise TypeError(f"{func!r} must accept the context as its first positional argument")
+
+        names = {p.name for p in params[1:] if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)}
+        unknown = set(rename.values()).difference(names)
+        if unknown:
+            raise TypeError(f"{func!r} has no parameters named: {', '.join(sorted(unknown))}")
+
+        param_to_option = {v: k for k, v in rename.items()}
+        self._var_keyword = False
+        self._positional: t.List[str] = []
+        self._keyword: t.List[t.Tuple[str, str]] = []
+        self._required: t.Set[str] = set()
+        for param in params[1:]:
+            if param.kind is param.VAR_KEYWORD:
+                self._var_keyword = True
+                continue
+            if param.kind is param.VAR_POSITIONAL:
+                continue
+
+            option_name = param_to_option.get(param.name, param.name)
+            if param.kind is param.POSITIONAL_ONLY:
+                self._positional.append(option_name)
+            else:
+                self._keyword.append((option_name, param.name))
+            if param.default is param.empty:
+                self._required.add(option_name)
+
+        self._declared = frozenset([*self._positional, *(o for o, _ in self._keyword)])
+        # Fast path if the callback's parameter names match the option names exactly
+        self._passthrough = self._var_keyword and not self._positional and not self._keyword
+
+    @property
+    def accepted_options(self) -> t.Optional[t.FrozenSet[str]]:
+        return None if self._var_keyword else self._declared
+
+    def validate(self, options: t.Mapping[str, t.Any]) -> None:
+        missing = self._required.difference(options)
+        accepted = self.accepted_options
+        unexpected = set() if accepted is None else set(options).difference(accepted)
+        if missing or unexpected:
+            problems = []
+            if missing:
+                problems.append(f"parameters without a matching option: {', '.join(sorted(missing))}")
+            if unexpected:
+                problems.append(f"options not accepted by the callback: {', '.join(sorted(unexpected))}")
+            raise TypeError(f"Callback {self._func.__qualname__!r} does not match its command - {'; '.join(problems)}")
+
+        self._validated = True
+        if (
+            not self._positional
+            and all(o == p for o, p in self._keyword)
+            and (self._var_keyword or accepted == set(options))
+        ):
+            self._passthrough = True
+
+    def __call__(self, ctx: context.Context) -> t.Coroutine[t.Any, t.Any, None]:
+        if not self._validated and getattr(ctx, "command", None) is not None:
+            # pass_options was applied to the callback before the command's options were known
+            self.validate(ctx.command.options)
+
+        raw = ctx.raw_options
+        if self._passthrough:
+            return self._func(ctx, **raw)
+
+        args = [raw[name] for name in self._positional]
+        kwargs = {}
+        for option_name, param_name in self._keyword:
+            value = raw.get(option_name, _MISSING)
+            if value is not _MISSING:
+                kwargs[param_name] = value
+        if self._var_keyword:
+            for name, value in raw.items():
+                if name not in self._declared:
+                    kwargs[name] = value
+        return self._func(ctx, *args, **kwargs)
+
+
+def _wrap(func: _CallbackT, rename: t.Mapping[str, str]) -> _CallbackT:
+    adapter = _OptionsAdapter(func, rename)
+
+    @functools.wraps(func)
+    async def callback(ctx: context.Context) -> None:
+        return await adapter(ctx)
 
-def pass_options(func):
+    callback.__options_adapter__ = adapter  # type: ignore[attr-defined]
+    return callback
+
+
+def _wrap_command(cmd_like: commands.CommandLike, rename: t.Mapping[str, str]) -> commands.CommandLike:
+    # All the command's options are known, so the callback can be checked against them immediately
+    callback = _wrap(cmd_like.callback, rename)
+    callback.__options_adapter__.validate(cmd_like.options)  # type: ignore[attr-defined]
+    cmd_like.callback = callback
+    return cmd_like
+
+
+def _apply(target: _TargetT, rename: t.Mapping[str, str]) -> _TargetT:
+    if isinstance(target, commands.CommandLike):
+        return _wrap_command(target, rename)  # type: ignore[return-value]
+    return _wrap(target, rename)  # type: ignore[return-value]
+
+
+@t.overload
+def pass_options(func: _TargetT) -> _TargetT:
+    ...
+
+
+@t.overload
+def pass_options(*, rename: t.Optional[t.Mapping[str, str]] = None) -> t.Callable[[_TargetT], _TargetT]:
+    ...
+
+
+def pass_options(
+    func: t.Optional[_TargetT] = None, *, rename: t.Optional[t.Mapping[str, str]] = None
+) -> t.Union[_TargetT, t.Callable[[_TargetT], _TargetT]]:
     """
-    First order decorator that causes the decorated command callback function
-    to have all options provided by the context passed as **keyword** arguments
-    on invocation. This allows you to access the options directly instead of through the
-    context object.
+    First or second order decorator that causes the decorated command callback function
+    to have the options provided by the context passed as arguments on invocation. This allows
+    you to access the options directly instead of through the context object.
+
+    The callback's signature is inspected once when it is decorated. Only the options that the callback declares
+    a parameter for are passed to it, unless it accepts ``**kwargs`` in which case all options are passed.
+    Positional-only parameters are passed positionally.
+
+    This decorator can either be placed above all other command decorators, or below all of them. When placed
+    above them, the callback's parameters are checked against the command's options as soon as the command is
+    defined, and a :obj:`TypeError` is raised if they do not match. When placed below them, the command's options
+    are not known yet, so the check happens the first time the command is invoked instead.
+
+    Args:
+        func: The command, or command callback, to decorate.
 
-    This decorator **must** be below all other command decorators.
+    Keyword Args:
+        rename (Optional[Mapping[:obj:`str`, :obj:`str`]]): Mapping of option name to the name of the callback
+            parameter that the option should be passed as. Useful for options whose names are not valid
+            python identifiers or that shadow builtins.
+
+    Raises:
+        :obj:`TypeError`: If ``rename`` contains a parameter that the callback does not have, or the callback's
+            parameters do not match the command's options.
 
     Example:
 
         .. code-block:: python
 
+            @filament.utils.pass_options
             @lightbulb.option("text", "Text to repeat")
             @filament.utils.prefix_command("echo", "Repeats the given text")
-            @filament.utils.pass_options
             async def echo(ctx, text):
                 await ctx.respond(text)
+
+            @filament.utils.pass_options(rename={"type": "type_"})
+            @lightbulb.option("type", "Type of thing to look up")
+            @filament.utils.prefix_command("lookup", "Looks something up")
+            async def lookup(ctx, type_):
+                ...
     """
+    if func is not None:
+        return _apply(func, rename or {})
 
-    async def decorated(ctx: context.Context) -> None:
-        await func(ctx, **ctx.raw_options)
+    def decorate(func_: _TargetT) -> _TargetT:
+        return _apply(func_, rename or {})
 
-    return decorated
+    return decorate
@@ -24,6 +24,7 @@ PATH_TO_PROJECT = os.path.join(".", "lightbulb", "ext", "filament")
 SCRIPT_PATHS = [
     PATH_TO_PROJECT,
     "noxfile.py",
+    "benchmarks",
     "docs/source/conf.py",
 ]
 
@@ -50,3 +51,18 @@ def sphinx(session):
     session.install("-Ur", "docs_requirements.txt")
     session.install("-Ur", "requirements.txt")
     session.run("python", "-m", "sphinx.cmd.build", "docs/source", "docs/build", "-b", "html")
+
+
+@nox.session(reuse_venv=True)
+def benchmark(session):
+    session.install("-Ur", "requirements.txt")
+    session.install(".")
+    session.run("python", os.path.join("benchmarks", "run.py"), *session.posargs)
+
+
+@nox.session(reuse_venv=True)
+def pytest(session):
+    session.install("-Ur", "requirements.txt")
+    session.install("pytest")
+    session.install(".")
+    session.run("python", "-m", "pytest", "tests", *session.posargs)
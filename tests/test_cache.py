@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import typing as t
+
+import lightbulb
+import pytest
+
+from lightbulb.ext import filament
+
+
+class FakeContext:
+    def __init__(self, guild_id: t.Optional[int] = 1, channel_id: int = 2, **options: t.Any) -> None:
+        self.invoked = None
+        self.command = type("Command", (), {"name": "command"})()
+        self.raw_options = options
+        self.author = type("Author", (), {"id": 3})()
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.responses: t.List[str] = []
+
+    async def respond(self, content: str) -> None:
+        self.responses.append(content)
+
+
+def _counting_callback(calls: t.List[int], delay: float = 0.0) -> t.Callable[..., t.Coroutine[t.Any, t.Any, None]]:
+    async def callback(ctx: t.Any) -> None:
+        calls.append(1)
+        await asyncio.sleep(delay)
+        await ctx.respond(f"response {len(calls)} for {ctx.raw_options.get('value')}")
+
+    return callback
+
+
+def test_identical_concurrent_invocations_run_callback_once() -> None:
+    calls: t.List[int] = []
+    callback = filament.utils.cached_response(_counting_callback(calls, 0.01))
+    contexts = [FakeContext(value=1) for _ in range(3)]
+
+    async def run() -> None:
+        await asyncio.gather(*(callback(ctx) for ctx in contexts))
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert [ctx.responses for ctx in contexts] == [["response 1 for 1"]] * 3
+    assert callback.cache.stats.coalesced == 2  # type: ignore[attr-defined]
+
+
+def test_responses_expire_after_ttl() -> None:
+    calls: t.List[int] = []
+    callback = filament.utils.cached_response(ttl=0.05)(_counting_callback(calls))
+
+    async def run() -> None:
+        await callback(FakeContext(value=1))
+        await callback(FakeContext(value=1))
+        await asyncio.sleep(0.06)
+        await callback(FakeContext(value=1))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_least_recently_used_response_is_evicted() -> None:
+    calls: t.List[int] = []
+    callback = filament.utils.cached_response(maxsize=2)(_counting_callback(calls))
+
+    async def run() -> None:
+        for value in (1, 2, 1, 3, 1, 2):
+            await callback(FakeContext(value=value))
+
+    asyncio.run(run())
+    # 2 is evicted when 3 is added, as 1 was used more recently
+    assert len(calls) == 4
+    assert callback.cache.stats.evictions == 2  # type: ignore[attr-defined]
+
+
+def test_guild_scope_falls_back_to_channel_in_dms() -> None:
+    calls: t.List[int] = []
+    callback = filament.utils.cached_response(scope="guild")(_counting_callback(calls))
+
+    async def run() -> None:
+        await callback(FakeContext(guild_id=None, channel_id=10))
+        await callback(FakeContext(guild_id=None, channel_id=11))
+        await callback(FakeContext(guild_id=None, channel_id=10))
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_commandlike_callback_can_be_decorated() -> None:
+    calls: t.List[int] = []
+
+    class Command(filament.CommandLike):
+        implements = [lightbulb.commands.SlashCommand]
+        name = "command"
+        description = "description"
+
+        @filament.utils.cached_response
+        async def callback(self, ctx: t.Any) -> None:
+            calls.append(1)
+            await ctx.respond(f"response from {type(self).__name__}")
+
+    context = FakeContext()
+
+    async def run() -> None:
+        await Command().callback(context)
+        await Command().callback(context)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert context.responses == ["response from Command"] * 2
+
+
+@pytest.mark.parametrize("kwargs", [{"ttl": -1}, {"ttl": 0}, {"maxsize": 0}, {"scope": "server"}])
+def test_invalid_cache_parameters_are_rejected(kwargs: t.Dict[str, t.Any]) -> None:
+    with pytest.raises(ValueError):
+        filament.utils.cached_response(**kwargs)(_counting_callback([]))
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import typing as t
+
+import lightbulb
+import pytest
+
+from lightbulb.ext import filament
+
+
+class FakeContext:
+    # lightbulb's Check dispatches on the type of the context
+    __class__ = property(lambda self: lightbulb.context.SlashContext)  # type: ignore
+
+
+def _counting_check(calls: t.List[str], name: str, result: bool = True) -> lightbulb.Check:
+    async def check(_: t.Any) -> bool:
+        calls.append(name)
+        await asyncio.sleep(0.01)
+        return result
+
+    return lightbulb.Check(check)
+
+
+def test_check_shared_by_nested_groups_is_evaluated_once() -> None:
+    calls: t.List[str] = []
+    shared = _counting_check(calls, "shared")
+    group = filament.CheckGroup(
+        filament.CheckGroup(shared), filament.CheckGroup(shared, _counting_check(calls, "other"))
+    )
+
+    async def run() -> bool:
+        return await group(FakeContext())
+
+    assert asyncio.run(run()) is True
+    assert calls == ["shared", "other"]
+
+
+def test_check_is_evaluated_again_after_group_fails_before_awaiting_it() -> None:
+    calls: t.List[str] = []
+    shared = _counting_check(calls, "shared")
+
+    async def run() -> bool:
+        context = FakeContext()
+        with pytest.raises(lightbulb.errors.CheckFailure):
+            await filament.CheckGroup(shared, filament.with_cost(lambda _: False, 5))(context)
+        return await asyncio.wait_for(filament.CheckGroup(shared)(context), 1)
+
+    assert asyncio.run(run()) is True
+    assert calls == ["shared"]
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+import importlib
+import subprocess
+import sys
+import typing as t
+
+import pytest
+
+# Checks that importing filament, and running its command line interface without creating a project, stays cheap.
+# The import time of each scenario is measured with ``python -X importtime`` in a fresh interpreter, and the best
+# time of several runs is compared against a budget. The time taken to import hikari and lightbulb is not included,
+# as filament cannot be imported without them.
+PACKAGE = "lightbulb.ext.filament"
+BUDGET_MS = 5.0
+REPEAT = 3
+# The only modules from filament which should be loaded by each scenario
+SCENARIOS: t.Mapping[str, t.Tuple[t.Sequence[str], t.FrozenSet[str]]] = {
+    "import": (["-c", f"import {PACKAGE}"], frozenset({PACKAGE, f"{PACKAGE}._lazy"})),
+    "cli": (["-m", PACKAGE], frozenset({PACKAGE, f"{PACKAGE}._lazy", f"{PACKAGE}.__main__"})),
+}
+LAZY_PACKAGES = [PACKAGE, f"{PACKAGE}.commands", f"{PACKAGE}.utils"]
+
+
+def _import_times(args: t.Sequence[str]) -> t.Dict[str, int]:
+    # Maps the name of each imported module to its cumulative import time in microseconds
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module", params=list(SCENARIOS))
+def scenario(request: pytest.FixtureRequest) -> t.Tuple[str, t.List[t.Dict[str, int]]]:
+    return request.param, [_import_times(SCENARIOS[request.param][0]) for _ in range(REPEAT)]
+
+
+def test_import_time_within_budget(scenario: t.Tuple[str, t.List[t.Dict[str, int]]]) -> None:
+    # Modules are only listed the first time they are imported, so the package's time includes its submodules
+    _, runs = scenario
+    assert min(times.get(PACKAGE, 0) for times in runs) / 1000 <= BUDGET_MS
+
+
+def test_submodules_are_loaded_lazily(scenario: t.Tuple[str, t.List[t.Dict[str, int]]]) -> None:
+    name, runs = scenario
+    loaded = {m for times in runs for m in times if m == PACKAGE or m.startswith(PACKAGE + ".")}
+    assert sorted(loaded - SCENARIOS[name][1]) == []
+
+
+@pytest.mark.parametrize("package", LAZY_PACKAGES)
+def test_all_names_resolve(package: str) -> None:
+    module = importlib.import_module(package)
+    assert [name for name in module.__all__ if not hasattr(module, name)] == []
+
+
+@pytest.mark.parametrize("package", LAZY_PACKAGES)
+def test_submodule_names_are_exported(package: str) -> None:
+    # Otherwise a name could be added to a submodule without being exported from the package
+    module = importlib.import_module(package)
+    for submodule in getattr(module, "_SUBMODULES", ()):
+        names = importlib.import_module(f"{package}.{submodule}").__all__
+        assert sorted(set(names) - set(module.__all__)) == [], submodule
+
+
+def test_package_exports_all_of_commands() -> None:
+    filament = importlib.import_module(PACKAGE)
+    commands = importlib.import_module(f"{PACKAGE}.commands")
+    assert filament.__all__ == commands.__all__
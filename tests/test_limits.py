@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+import asyncio
+import typing as t
+
+import lightbulb
+import pytest
+
+from lightbulb.ext import filament
+
+
+class FakeContext:
+    def __init__(self, app: lightbulb.BotApp, user_id: int = 1) -> None:
+        self.app = app
+        self.author = type("Author", (), {"id": user_id})()
+
+
+def _build(limit: filament.ConcurrencyLimit, fail: bool = False) -> lightbulb.commands.Command:
+    class Command(filament.CommandLike):
+        implements = [lightbulb.commands.SlashCommand]
+        name = "command"
+        description = "description"
+        limits = [limit]
+
+        async def callback(self, ctx: t.Any) -> None:
+            await asyncio.sleep(0.01)
+            if fail:
+                raise RuntimeError("failed")
+
+    bot = lightbulb.BotApp("token", banner=None)
+    bot.command(Command())
+    command = bot.get_slash_command("command")
+    assert command is not None
+    return command
+
+
+async def _invoke(command: lightbulb.commands.Command, context: FakeContext) -> str:
+    try:
+        await command.evaluate_cooldowns(context)  # type: ignore[arg-type]
+        await command(context)  # type: ignore[arg-type]
+    except lightbulb.errors.MaxConcurrencyLimitReached:
+        return "limited"
+    except RuntimeError:
+        return "failed"
+    return "ok"
+
+
+def test_concurrency_limit_rejects_invocations_over_the_limit() -> None:
+    command = _build(filament.ConcurrencyLimit(1, store=filament.InMemoryLimitStore()))
+
+    async def run() -> t.List[str]:
+        context = FakeContext(command.app)
+        results = await asyncio.gather(_invoke(command, context), _invoke(command, context))
+        return [*results, await _invoke(command, context)]
+
+    assert asyncio.run(run()) == ["ok", "limited", "ok"]
+
+
+def test_concurrency_slot_is_released_when_invocation_fails() -> None:
+    command = _build(filament.ConcurrencyLimit(1, store=filament.InMemoryLimitStore()), fail=True)
+
+    async def run() -> t.List[str]:
+        context = FakeContext(command.app)
+        # Lightbulb evaluates cooldowns before parsing arguments, so the callback may never be invoked
+        await command.evaluate_cooldowns(context)  # type: ignore[arg-type]
+        return [await _invoke(command, context), await _invoke(command, context)]
+
+    assert asyncio.run(run()) == ["failed", "failed"]
+
+
+def test_concurrency_slot_expires_after_timeout() -> None:
+    limit = filament.ConcurrencyLimit(1, store=filament.InMemoryLimitStore(), timeout=0.05)
+
+    async def run() -> t.List[bool]:
+        context = FakeContext(lightbulb.BotApp("token", banner=None))
+        acquired = [await limit.acquire("prefix", context), await limit.acquire("prefix", context)]  # type: ignore
+        await asyncio.sleep(0.1)
+        return [*acquired, await limit.acquire("prefix", context)]  # type: ignore[arg-type]
+
+    assert asyncio.run(run()) == [True, False, True]
+
+
+@pytest.mark.parametrize(
+    "factory",
+    [
+        lambda: filament.TokenBucket(0, 1),
+        lambda: filament.TokenBucket(1, 0),
+        lambda: filament.SlidingWindow(0, 1),
+        lambda: filament.SlidingWindow(1, -1),
+        lambda: filament.ConcurrencyLimit(0),
+        lambda: filament.ConcurrencyLimit(1, timeout=0),
+    ],
+)
+def test_limits_reject_parameters_that_are_not_positive(factory: t.Callable[[], filament.Limit]) -> None:
+    with pytest.raises(ValueError):
+        factory()
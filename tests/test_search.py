@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright © tandemdude 2020-present
+#
+# This file is part of Filament.
+#
+# Filament is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Filament is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with Filament. If not, see <https://www.gnu.org/licenses/>.
+import typing as t
+
+import lightbulb
+import pytest
+
+from lightbulb.ext import filament
+from lightbulb.ext.filament.commands import search
+
+
+def _command(name: str, description: str, **attrs: t.Any) -> filament.CommandLike:
+    attrs.setdefault("implements", [lightbulb.SlashCommand, lightbulb.PrefixCommand])
+    return type(name.title(), (filament.CommandLike,), {"name": name, "description": description, **attrs})()
+
+
+@pytest.fixture()
+def bot() -> lightbulb.BotApp:
+    bot = lightbulb.BotApp("x" * 60, banner=None)
+    bot.command(_command("ping", "Checks the latency of the bot", aliases=["latency"]))
+    bot.command(_command("play", "Plays a song in your voice channel"))
+    bot.command(_command("playlist", "Manages your saved playlists"))
+    bot.command(_command("queue", "Shows the songs waiting to be played"))
+    bot.command(_command("ban", "Bans a user from the server"))
+    bot.command(_command("shutdown", "Stops the bot", hidden=True))
+    return bot
+
+
+def _names(results: t.Sequence[search.SearchResult]) -> t.List[str]:
+    return [result.entry.qualname for result in results]
+
+
+def test_exact_name_ranks_first(bot: lightbulb.BotApp) -> None:
+    results = filament.CommandIndex(bot).search("play")
+    assert _names(results)[:2] == ["play", "playlist"]
+    assert results[0].score == 1.0
+    assert results[0].score > results[1].score
+
+
+def test_partial_name_is_completed(bot: lightbulb.BotApp) -> None:
+    results = filament.CommandIndex(bot).search("playl")
+    assert _names(results)[0] == "playlist"
+    assert results[0].score > 0.75
+
+
+def test_alias_matches_command(bot: lightbulb.BotApp) -> None:
+    result = filament.CommandIndex(bot).search("latency")[0]
+    assert result.entry.qualname == "ping"
+    assert result.term == "latency"
+
+
+def test_name_matches_rank_above_description_matches(bot: lightbulb.BotApp) -> None:
+    assert _names(filament.CommandIndex(bot).search("queue", limit=2))[0] == "queue"
+    assert _names(filament.CommandIndex(bot).search("song")) == ["play", "queue"]
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [("pign", ["ping"]), ("queeu", ["queue"]), ("palylist", ["playlist"]), ("bann", ["ban"]), ("xyzzy", [])],
+)
+def test_suggest_misspelled_names(bot: lightbulb.BotApp, name: str, expected: t.List[str]) -> None:
+    assert filament.CommandIndex(bot).suggest(name)[:1] == expected
+
+
+def test_suggest_ignores_descriptions(bot: lightbulb.BotApp) -> None:
+    assert filament.CommandIndex(bot).suggest("server") == []
+
+
+def test_hidden_commands_are_excluded_by_default(bot: lightbulb.BotApp) -> None:
+    index = filament.CommandIndex(bot)
+    assert index.search("shutdown") == []
+    assert _names(index.search("shutdown", include_hidden=True)) == ["shutdown"]
+
+
+def test_index_follows_added_and_removed_commands(bot: lightbulb.BotApp) -> None:
+    index = filament.CommandIndex(bot)
+    assert index.get("kick") is None
+
+    kick = _command("kick", "Kicks a user from the server")
+    bot.command(kick)
+    assert index.get("kick") is not None
+
+    # Replacing a command with another keeps the number of commands the same
+    bot.remove_command(kick)
+    bot.command(_command("mute", "Mutes a user"))
+    assert index.get("kick") is None
+    assert _names(index.search("mute")) == ["mute"]
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("ping", "ping", 0),
+        ("ping", "pign", 1),
+        ("ping", "pin", 1),
+        ("play", "playlist", 3),
+        ("queue", "qeueu", 2),
+        ("cmd500", "cmd512", 2),
+        ("ab", "ba", 1),
+    ],
+)
+def test_edit_distance(a: str, b: str, expected: int) -> None:
+    assert search._edit_distance(a, b, 2) == min(expected, 3)